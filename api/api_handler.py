@@ -1,156 +1,717 @@
-import requests
+import asyncio
+import json
+import os
 import time
 import threading
+import httpx
 from google import genai
+from google.genai import errors as genai_errors
+
+from api.cache import ConversionCache
+from api.hedging import HedgeStats, LatencyTracker
+from api.rate_limit import RateLimiter
+from api.resilience import (FAILED, SUCCEEDED, THROTTLED, DeadlineExceededError, ProviderResilience,
+                            RequestTimeoutError, RetryBudget, RETRY_STATUS, retry_after_seconds)
+from api.streaming import TokenStream, iter_sse
+from api.context import ContextWindow, ConversationHistory, estimate_tokens
+from api.chunker import chunk_text, chunk_token_budget, token_counter
+from utils.ollama_manager import keep_alive_value
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Models of providers without a model selection
+PROVIDER_MODELS = {
+    "Anthropic": "claude-3-opus-20240229",
+    "Perplexity": "sonar-medium-online",
+    "Mistral": "mistral-large-latest",
+    "Google Gemini": "gemini-2.5-pro-exp-03-25"
+}
+
+# Prompt modes whose chunks can be converted without context from earlier chunks
+INDEPENDENT_CHUNK_MODES = ("Direct Transcription", "Clean Transcription")
+
+# (connect, read) timeouts in seconds for providers missing from settings.provider_timeouts
+DEFAULT_TIMEOUTS = (10, 60)
+
+# Seconds of a conversion time limit held back for each chunk after the one being converted
+DEADLINE_RESERVE_SECONDS = 10
+
+# Keep-alive connections kept open per provider; with HTTP/2 one connection carries all concurrent requests
+HTTP_POOL_SIZE = 4
+
+def create_async_client(verify=True):
+    """httpx client used for provider requests: HTTP/2 when available, pooled keep-alive otherwise"""
+    limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+    # LLM responses can take minutes, so timeouts are set per request (see APIHandler._request_timeout)
+    return httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, timeout=None, verify=verify)
 
 class APIHandler:
     def __init__(self, settings):
         self.settings = settings
+        
+        # One event loop thread drives every provider request; started on first use
+        self.loop = None
+        self.loop_thread = None
+        self.loop_lock = threading.Lock()
+        
+        # TokenStream of the most recent conversion (time to first token, tokens/s)
+        self.last_stream = None
+        
+        # Async HTTP clients by provider, reused across conversions for the life of the app.
+        # Only touched from the event loop thread.
+        self.clients = {}
+        
+        # Gemini SDK clients by API key, reused the same way
+        self.gemini_clients = {}
+        
+        # (limit, asyncio.Semaphore) capping concurrent requests per provider across conversions
+        self.semaphores = {}
+        
+        # Retry policy, circuit breaker and metrics by provider; only touched from the event loop thread
+        self.resilience = {}
+        
+        # RPM/TPM pacing by (provider, model); only touched from the event loop thread
+        self.rate_limiters = {}
+        
+        # Request latencies by (provider, model) and the budget and results of hedged requests
+        self.latencies = {}
+        self.hedge_budget = RetryBudget(settings.hedge_budget_percent / 100, reserve=2)
+        self.hedge_stats = HedgeStats()
+        
+        # Outputs of earlier requests, consulted before calling a provider
+        self.cache = ConversionCache(os.path.join(settings.app_dir, "llm_cache"),
+                                     settings.llm_cache_max_mb * 1024 * 1024,
+                                     settings.llm_cache_ttl_days * 24 * 3600)
+    
+    def _get_loop(self):
+        """Return the provider event loop, starting its thread if needed"""
+        with self.loop_lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+                self.loop_thread.start()
+            return self.loop
     
-    def convert_text(self, text, callback=None):
-        """Convert text to LaTeX using the selected API provider"""
+    def run(self, coroutine):
+        """Schedule a coroutine on the provider event loop and return its concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+    
+    def _get_client(self, provider):
+        """Return the async HTTP client for a provider, creating it on first use
+        
+        Reusing one client per provider skips DNS, TCP and TLS setup on every
+        chunk after the first, and with HTTP/2 concurrent chunk requests share
+        a single connection per host.
+        """
+        client = self.clients.get(provider)
+        if client is None:
+            client = create_async_client()
+            self.clients[provider] = client
+        return client
+    
+    def _get_semaphore(self, provider):
+        """Semaphore limiting in-flight requests to a provider to its configured concurrency"""
+        limit = max(1, self.settings.provider_concurrency.get(provider, 1))
+        entry = self.semaphores.get(provider)
+        if entry is None or entry[0] != limit:
+            entry = (limit, asyncio.Semaphore(limit))
+            self.semaphores[provider] = entry
+        return entry[1]
+    
+    def _get_resilience(self, provider):
+        """Return the retry and circuit breaker state of a provider, applying the current settings"""
+        resilience = self.resilience.get(provider)
+        if resilience is None:
+            resilience = ProviderResilience(provider)
+            self.resilience[provider] = resilience
+        resilience.max_retries = self.settings.max_retries
+        resilience.breaker.failure_threshold = self.settings.breaker_failure_threshold
+        resilience.breaker.reset_timeout = self.settings.breaker_reset_seconds
+        return resilience
+    
+    def _get_rate_limiter(self, provider):
+        """Return the rate limiter of the provider's current model, applying the configured limits"""
+        key = (provider, self._model_name(provider))
+        rpm, tpm = self.settings.rate_limits.get(provider, (0, 0))
+        limiter = self.rate_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rpm, tpm)
+            self.rate_limiters[key] = limiter
+        limiter.configure(rpm, tpm)
+        return limiter
+    
+    def describe_resilience(self):
+        """One line of request metrics per provider used so far"""
+        lines = [resilience.describe() for resilience in list(self.resilience.values())]
+        for (provider, model), limiter in list(self.rate_limiters.items()):
+            if limiter.granted:
+                lines.append(f"{provider} {model}: {limiter.describe()}")
+        if self.settings.hedging_enabled:
+            lines.append(self.hedge_stats.describe())
+        return "\n".join(lines)
+    
+    def _request_timeout(self, provider):
+        """httpx timeout of one request to a provider
+        
+        The read timeout bounds each wait for data rather than the whole
+        response, so long streamed answers are fine while a provider that
+        goes silent fails.
+        """
+        connect, read = self.settings.provider_timeouts.get(provider, DEFAULT_TIMEOUTS)
+        return httpx.Timeout(read, connect=connect)
+    
+    def _timeout_error(self, provider, error):
+        """Readable replacement for an httpx timeout, whose own message is usually empty"""
+        connect, read = self.settings.provider_timeouts.get(provider, DEFAULT_TIMEOUTS)
+        if isinstance(error, httpx.ConnectTimeout):
+            return RequestTimeoutError(f"Could not connect to {provider} within {connect:g}s")
+        return RequestTimeoutError(f"{provider} sent nothing for {read:g}s and the request was abandoned")
+    
+    def _get_gemini_client(self, api_key):
+        """Return the Gemini SDK client for an API key, creating it on first use"""
+        client = self.gemini_clients.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            self.gemini_clients[api_key] = client
+        return client
+    
+    async def _close_clients(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+        for client in self.gemini_clients.values():
+            await client.aio.aclose()
+        self.gemini_clients.clear()
+    
+    def close(self):
+        """Close all pooled connections and stop the event loop"""
+        with self.loop_lock:
+            loop = self.loop
+            self.loop = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing API clients: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+    
+    def convert_text(self, text, callback=None, segments=None):
+        """Convert text to LaTeX using the selected API provider
+        
+        If segments (a SegmentStore for this transcript) is given, chunks are cut
+        on segment boundaries as long as the text has not been edited.
+        """
         provider = self.settings.selected_provider
         mode = self.settings.selected_prompt_mode
         system_prompt = self.settings.system_prompt
         prompt_template = self.settings.mode_prompts[mode]
         
-        # Start conversion in a separate thread
-        threading.Thread(
-            target=self._convert_text_thread,
-            args=(text, provider, mode, prompt_template, system_prompt, callback),
-            daemon=True
-        ).start()
+        # Run the conversion on the provider event loop; callback is called from the loop thread
+        return self.run(self._convert_text(text, provider, mode, prompt_template, system_prompt, callback, segments))
     
-    def _convert_text_thread(self, text, provider, mode, prompt_template, system_prompt, callback):
-        """Thread function to handle text conversion"""
+    async def _convert_text(self, text, provider, mode, prompt_template, system_prompt, callback, segments=None):
+        """Coroutine handling one text conversion
+        
+        With a conversion time limit, a chunk may use the time left except a
+        small reserve for each chunk after it, so a slow start (a cold model,
+        rate limit waits) does not fail a conversion that has time to spare.
+        On failure the output of the chunks converted so far is passed to the
+        callback.
+        """
+        # Output of the finished chunks
+        final_output = ""
+        deadline_minutes = self.settings.conversion_deadline_minutes
+        deadline = time.monotonic() + deadline_minutes * 60 if deadline_minutes else None
         try:
-            start_time = time.time()
+            # Token deltas of the chunk in progress, shown after the finished chunks
+            partial = []
+            status = "Streaming response"
+            progress = 0
             
-            # For Google Gemini, process the entire text at once
-            if provider == "Google Gemini":
-                if mode == "Class Notes (PDF Style)":
-                    # Use string replacement instead of format() for PDF Style
-                    combined_prompt = prompt_template.replace("{INPUT_TEXT}", text)
-                else:
-                    combined_prompt = prompt_template.format(text=text)
-                
-                # Process the entire text with Google Gemini
-                final_output = self._convert_using_gemini(text, combined_prompt, system_prompt)
-                
+            def on_delta(delta):
+                partial.append(delta)
                 if callback:
-                    callback(True, "LaTeX conversion complete", final_output)
+                    callback(True, status, final_output + "".join(partial), progress)
+            
+            stream = TokenStream(on_delta)
+            self.last_stream = stream
+            
+            # Chunk the text to fit the model
+            parallel = self.settings.parallel_conversion and mode in INDEPENDENT_CHUNK_MODES
+            chunks = self._chunk_text(text, provider, prompt_template, system_prompt, segments,
+                                      with_context=not parallel)
+            
+            # Chunks that need no context from each other are converted concurrently
+            if parallel and len(chunks) > 1:
+                # Totals only; each chunk streams to the UI through its own TokenStream
+                totals = TokenStream()
+                self.last_stream = totals
+                outputs = [None] * len(chunks)
+                try:
+                    final_output = await asyncio.wait_for(
+                        self._convert_chunks_parallel(provider, mode, prompt_template, system_prompt,
+                                                      chunks, totals, callback, outputs),
+                        deadline_minutes * 60 if deadline else None)
+                except asyncio.TimeoutError:
+                    # Keep the chunks finished in order before the first unfinished one
+                    kept = outputs.index(None) if None in outputs else len(outputs)
+                    final_output = "".join(output + "\n" for output in outputs[:kept])
+                    finished = len(chunks) - outputs.count(None)
+                    raise DeadlineExceededError(
+                        f"only {finished} of {len(chunks)} chunks finished within the {deadline_minutes}-minute "
+                        f"conversion time limit; kept the first {kept} in order")
+                if callback:
+                    callback(True, f"LaTeX conversion complete ({totals.describe()})", final_output, 100)
                 return
             
-            # For other providers, chunk the text if needed
-            max_chunk_length = 10000  # Define maximum chunk length (adjust based on model limits)
-            if len(text) > max_chunk_length:
-                chunks = self._chunk_text(text, max_length=max_chunk_length)
-            else:
-                chunks = [text]
-                
-            final_output = ""
-            accumulated_context = ""
+            # Bounded context carried between chunks
+            async def summarize(prompt, summary_system_prompt):
+                return await self._convert_chunk(provider, prompt, prompt, summary_system_prompt, TokenStream())
+            context = ContextWindow(self.settings.context_strategy, self.settings.context_chunks,
+                                    self.settings.context_token_budget, summarize)
+            
+            # Ollama keeps earlier turns of a chat in its KV cache, so they are not evaluated again
+            conversation = None
+            if self._uses_ollama_chat(provider):
+                budget = self.settings.context_token_budget if self.settings.context_strategy == "token_budget" else None
+                conversation = ConversationHistory(budget)
             
             for i, chunk in enumerate(chunks):
-                # If there is already context, prepend it to the prompt
-                if accumulated_context:
-                    if mode == "Class Notes (PDF Style)":
-                        # Use string replacement instead of format() for PDF Style
-                        combined_prompt = f"CONTEXT:\n{accumulated_context}\n\n" + prompt_template.replace("{INPUT_TEXT}", chunk)
-                    else:
-                        combined_prompt = f"CONTEXT:\n{accumulated_context}\n\n" + prompt_template.format(text=chunk)
+                status = f"Streaming chunk {i+1}/{len(chunks)}"
+                partial.clear()
+                if conversation:
+                    history = list(conversation.messages)
+                    context_tokens = conversation.tokens()
+                    combined_prompt = self._build_prompt(mode, prompt_template, chunk)
                 else:
-                    if mode == "Class Notes (PDF Style)":
-                        # Use string replacement instead of format() for PDF Style
-                        combined_prompt = prompt_template.replace("{INPUT_TEXT}", chunk)
-                    else:
-                        combined_prompt = prompt_template.format(text=chunk)
-                  
+                    history = None
+                    context_text = context.text()
+                    context_tokens = estimate_tokens(context_text)
+                    combined_prompt = self._build_prompt(mode, prompt_template, chunk, context_text)
+                
+                prompt_tokens = estimate_tokens(system_prompt) + context_tokens + estimate_tokens(combined_prompt)
+                print(f"LaTeX chunk {i+1}/{len(chunks)}: ~{prompt_tokens} prompt tokens "
+                      f"(~{context_tokens} context, {self.settings.context_strategy}"
+                      f"{', Ollama chat' if conversation else ''})")
+                
+                # A chunk may use the time left, except a reserve for the chunks after it, but at
+                # least an equal share of it
+                timeout = None
+                if deadline is not None:
+                    time_left = max(0.0, deadline - time.monotonic())
+                    chunks_after = len(chunks) - i - 1
+                    timeout = max(time_left / (chunks_after + 1), time_left - chunks_after * DEADLINE_RESERVE_SECONDS)
+                
                 # Process chunk according to provider
-                if provider == "Ollama (Local)":
-                    model = self.settings.ollama_model_name
-                    latex_chunk = self._convert_using_ollama(chunk, combined_prompt, system_prompt, model)
-                elif provider == "OpenAI":
-                    latex_chunk = self._convert_using_openai(chunk, combined_prompt, system_prompt)
-                elif provider == "Anthropic":
-                    latex_chunk = self._convert_using_anthropic(chunk, combined_prompt, system_prompt)
-                elif provider == "Perplexity":
-                    latex_chunk = self._convert_using_perplexity(chunk, combined_prompt, system_prompt)
-                elif provider == "Mistral":
-                    latex_chunk = self._convert_using_mistral(chunk, combined_prompt, system_prompt)
-                else:
-                    raise ValueError(f"Unsupported provider: {provider}")
-                  
+                try:
+                    latex_chunk = await asyncio.wait_for(
+                        self._convert_chunk(provider, chunk, combined_prompt, system_prompt, stream, history),
+                        timeout)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError(
+                        f"chunk {i+1}/{len(chunks)} did not finish within the {timeout:.0f}s left of the "
+                        f"{deadline_minutes}-minute conversion time limit ({i} of {len(chunks)} chunks converted)")
+                
                 final_output += latex_chunk + "\n"
-                accumulated_context += latex_chunk + "\n"
+                if conversation:
+                    conversation.add(combined_prompt, latex_chunk)
+                else:
+                    await context.add(latex_chunk)
                 
                 # Calculate progress
                 progress = (i + 1) / len(chunks) * 100
                 if callback:
-                    callback(True, f"Processing chunk {i+1}/{len(chunks)}", final_output, progress)
+                    callback(True, f"Processing chunk {i+1}/{len(chunks)} (~{prompt_tokens} prompt tokens)",
+                             final_output, progress)
             
             if callback:
-                callback(True, "LaTeX conversion complete", final_output, 100)
+                callback(True, f"LaTeX conversion complete ({stream.describe()})", final_output, 100)
             
         except Exception as e:
             if callback:
-                callback(False, f"LaTeX conversion error: {str(e)}", None)
-    
-    def _chunk_text(self, text, max_length=2000):
-        """Splits text into chunks not exceeding max_length characters."""
-        words = text.split()
-        chunks = []
-        current_chunk = ""
-        for word in words:
-            if len(current_chunk) + len(word) + 1 > max_length:
-                chunks.append(current_chunk)
-                current_chunk = word
+                callback(False, f"LaTeX conversion error: {str(e)}", final_output or None)
+    
+    def _build_prompt(self, mode, prompt_template, chunk, context_text=""):
+        """Fill the mode's prompt template with a chunk, prefixed by context if there is any"""
+        if mode == "Class Notes (PDF Style)":
+            # Use string replacement instead of format() for PDF Style
+            prompt = prompt_template.replace("{INPUT_TEXT}", chunk)
+        else:
+            prompt = prompt_template.format(text=chunk)
+        
+        # If there is already context, prepend it to the prompt
+        if context_text:
+            prompt = f"CONTEXT:\n{context_text}\n\n" + prompt
+        return prompt
+    
+    async def _convert_chunks_parallel(self, provider, mode, prompt_template, system_prompt, chunks, stream, callback,
+                                       outputs=None):
+        """Convert independent chunks concurrently and return the outputs in order
+        
+        The callback receives the longest finished prefix of chunks, followed by
+        the streaming text of the first unfinished one. outputs, a list with
+        one None per chunk, is filled in as chunks finish, so a caller that
+        cancels the conversion can keep the finished ones.
+        """
+        if outputs is None:
+            outputs = [None] * len(chunks)
+        partials = [[] for _ in chunks]
+        finished = 0
+        
+        def report(status):
+            prefix = []
+            for output, partial in zip(outputs, partials):
+                if output is None:
+                    prefix.append("".join(partial))
+                    break
+                prefix.append(output + "\n")
+            callback(True, status, "".join(prefix), finished / len(chunks) * 100)
+        
+        async def convert(i, chunk):
+            nonlocal finished
+            
+            def on_delta(delta):
+                partials[i].append(delta)
+                # Only the first unfinished chunk is visible
+                if callback and all(output is not None for output in outputs[:i]):
+                    report(f"Streaming chunk {i+1}/{len(chunks)} ({finished} finished)")
+            
+            combined_prompt = self._build_prompt(mode, prompt_template, chunk)
+            outputs[i] = await self._convert_chunk(provider, chunk, combined_prompt, system_prompt,
+                                                   TokenStream(on_delta, parent=stream))
+            finished += 1
+            if callback:
+                report(f"Converted {finished}/{len(chunks)} chunks")
+        
+        tasks = [asyncio.ensure_future(convert(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+        return "".join(output + "\n" for output in outputs)
+    
+    async def _convert_chunk(self, provider, chunk, prompt, system_prompt, stream, history=None):
+        """Send one prompt to the selected provider and return its output
+        
+        Outputs of identical earlier requests are served from the conversion
+        cache without a network call. Requests that run unusually long are
+        hedged (see _convert_hedged); an output is cached under the provider
+        that produced it. history holds earlier chat turns for Ollama's
+        /api/chat.
+        """
+        cache_prompt = prompt if history is None else json.dumps(history) + prompt
+        key = self.cache.key(provider, self._model_name(provider), system_prompt, cache_prompt)
+        if self.settings.llm_cache_enabled:
+            output = self.cache.get(key)
+            if output is not None:
+                stream.cached(output)
+                return output
+        
+        # A duplicate to another provider would lose the chat history
+        answered_by = provider
+        if self.settings.hedging_enabled and history is None:
+            answered_by, output = await self._convert_hedged(provider, chunk, prompt, system_prompt, stream)
+        else:
+            output = await self._send(provider, chunk, prompt, system_prompt, stream, history=history)
+        
+        if self.settings.llm_cache_enabled and output:
+            if answered_by != provider:
+                key = self.cache.key(answered_by, self._model_name(answered_by), system_prompt, cache_prompt)
+            request_bytes = len(system_prompt.encode("utf-8")) + len(cache_prompt.encode("utf-8"))
+            self.cache.put(key, output, request_bytes)
+        return output
+    
+    async def _send(self, provider, chunk, prompt, system_prompt, stream, started=None, history=None):
+        """Send one request and record its latency
+        
+        Requests are paced to the provider's RPM/TPM limits, taking turns
+        between conversions, and at most the provider's configured number of
+        requests run at once. started (an asyncio.Event) is set once the
+        request is actually sent.
+        """
+        # Prompt plus an output about as long as the chunk
+        expected_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt) + estimate_tokens(chunk)
+        await self._get_rate_limiter(provider).acquire(expected_tokens, stream.root)
+        
+        async with self._get_semaphore(provider):
+            if started:
+                started.set()
+            start_time = time.perf_counter()
+            output = await self._convert_chunk_now(provider, chunk, prompt, system_prompt, stream, history)
+            self._get_latency_tracker(provider).record(time.perf_counter() - start_time)
+        return output
+    
+    def _get_latency_tracker(self, provider):
+        key = (provider, self._model_name(provider))
+        tracker = self.latencies.get(key)
+        if tracker is None:
+            tracker = LatencyTracker()
+            self.latencies[key] = tracker
+        return tracker
+    
+    async def _convert_hedged(self, provider, chunk, prompt, system_prompt, stream):
+        """Send a request, and a duplicate if it runs past the p95 latency; the first valid output wins
+        
+        The duplicate goes to the configured fallback provider, or the same
+        provider if none is set, and the slower request is cancelled. Only the
+        original request streams to the UI. Hedges are limited to a
+        percentage of requests by the hedge budget. Returns the provider that
+        answered and its output.
+        """
+        hedge_provider = self.settings.hedge_fallback_provider or provider
+        if hedge_provider == provider and self.settings.provider_concurrency.get(provider, 1) <= 1:
+            # A duplicate would only queue behind the original
+            return provider, await self._send(provider, chunk, prompt, system_prompt, stream)
+        
+        tracker = self._get_latency_tracker(provider)
+        hedge_after = tracker.percentile(0.95) or self.settings.hedge_default_seconds
+        self.hedge_budget.ratio = self.settings.hedge_budget_percent / 100
+        self.hedge_budget.deposit()
+        
+        started = asyncio.Event()
+        primary = asyncio.ensure_future(self._send(provider, chunk, prompt, system_prompt, stream, started))
+        sending = asyncio.ensure_future(started.wait())
+        hedge = None
+        try:
+            # The latency clock starts when the request is sent, not while it waits for its turn
+            await asyncio.wait([primary, sending], return_when=asyncio.FIRST_COMPLETED)
+            await asyncio.wait([primary], timeout=hedge_after)
+            if primary.done() or not self.hedge_budget.withdraw():
+                return provider, await primary
+            
+            sent_at = time.perf_counter() - hedge_after
+            hedge = asyncio.ensure_future(self._send(hedge_provider, chunk, prompt, system_prompt, TokenStream()))
+            self.hedge_stats.fired += 1
+            stream.hedged()
+            print(f"Hedging {provider} request after {hedge_after:.1f}s with {hedge_provider}")
+            
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        if task is hedge:
+                            elapsed = time.perf_counter() - sent_at
+                            self.hedge_stats.won += 1
+                            self.hedge_stats.saved_seconds += tracker.expected_remaining(elapsed)
+                            return hedge_provider, task.result()
+                        self.hedge_stats.wasted += 1
+                        return provider, task.result()
+            # Neither produced a valid output: report the original request's outcome
+            return provider, primary.result()
+        finally:
+            for task in (primary, sending, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _convert_chunk_now(self, provider, chunk, prompt, system_prompt, stream, history=None):
+        try:
+            return await self._convert_using(provider, chunk, prompt, system_prompt, stream, history)
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(provider, e) from e
+    
+    async def _convert_using(self, provider, chunk, prompt, system_prompt, stream, history=None):
+        if provider == "Ollama (Local)":
+            model = self.settings.ollama_model_name
+            return await self._convert_using_ollama(chunk, prompt, system_prompt, model, stream, history)
+        elif provider == "OpenAI":
+            return await self._convert_using_openai(chunk, prompt, system_prompt, stream)
+        elif provider == "Anthropic":
+            return await self._convert_using_anthropic(chunk, prompt, system_prompt, stream)
+        elif provider == "Perplexity":
+            return await self._convert_using_perplexity(chunk, prompt, system_prompt, stream)
+        elif provider == "Mistral":
+            return await self._convert_using_mistral(chunk, prompt, system_prompt, stream)
+        elif provider == "Google Gemini":
+            return await self._convert_using_gemini(chunk, prompt, system_prompt, stream)
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+    
+    def _model_name(self, provider):
+        """Model the provider is called with"""
+        if provider == "Ollama (Local)":
+            return self.settings.ollama_model_name
+        if provider == "OpenAI":
+            return self.settings.selected_openai_model
+        return PROVIDER_MODELS.get(provider, "")
+    
+    def _uses_ollama_chat(self, provider):
+        """Whether chunk context is carried as cached /api/chat turns instead of in the prompt"""
+        return (provider == "Ollama (Local)" and self.settings.ollama_chat_context
+                and self.settings.context_strategy in ("token_budget", "full"))
+    
+    def _chunk_text(self, text, provider, prompt_template, system_prompt, segments=None, with_context=True):
+        """Split text into chunks sized to the provider's model
+        
+        Tokens are counted with the model's tokenizer where available. Each
+        chunk leaves room in the context window for the system prompt, the
+        mode template, the carried context and the output. Chunks end on
+        Whisper segment boundaries while the transcript is unedited, else on
+        sentence and paragraph boundaries.
+        
+        Gemini's long context takes transcripts up to the configured
+        threshold in a single request, which keeps long notes coherent.
+        """
+        model = self._model_name(provider)
+        count = token_counter(provider, model)
+        if provider == "Google Gemini" and count(text) <= self.settings.gemini_single_request_tokens:
+            return [text]
+        
+        # Room for the context the strategy carries: a bounded tail, summary or chat history, or whole previous outputs
+        prompt_overhead = count(system_prompt) + count(prompt_template)
+        chunks_in_context = 0
+        if with_context:
+            if self.settings.context_strategy == "last_chunks":
+                chunks_in_context = self.settings.context_chunks
             else:
-                current_chunk = current_chunk + " " + word if current_chunk else word
-        if current_chunk:
-            chunks.append(current_chunk)
-        return chunks
-    
-    def _call_api_with_retry(self, api_call, max_retries=5):
-        """Call API with retry logic for rate limiting"""
-        retries = 0
-        while retries < max_retries:
-            response = api_call()
-            if response.status_code != 429:
-                return response
-            # Use the Retry-After header if provided, otherwise exponential backoff
-            retry_after = response.headers.get("Retry-After")
-            wait_time = float(retry_after) if retry_after else (2 ** retries)
-            time.sleep(wait_time)
-            retries += 1
-        raise Exception("Maximum retries reached; API rate limit persists.")
-    
-    def _convert_using_ollama(self, text, prompt, system_prompt, model):
-        """Convert text to LaTeX using Ollama API"""
+                prompt_overhead += self.settings.context_token_budget
+        
+        # Ollama's window is the num_ctx sent with each request, shared by prompt and output
+        limits = None
+        if provider == "Ollama (Local)":
+            limits = (self.settings.ollama_num_ctx, self.settings.ollama_num_ctx)
+        budget, clamped = chunk_token_budget(model, prompt_overhead, limits, chunks_in_context)
+        if clamped:
+            print(f"Warning: the context window of {model} leaves little room after ~{prompt_overhead} prompt "
+                  f"tokens; using {budget}-token chunks. Raise the context window or lower the context budget.")
+        return chunk_text(text, budget, count, segments)
+    
+    @staticmethod
+    def _classify_response(response, error):
+        """Retry connection failures, rate limits and server errors, honoring Retry-After"""
+        if error is not None:
+            return (FAILED if isinstance(error, httpx.TransportError) else SUCCEEDED), None
+        if response.status_code == 429:
+            return THROTTLED, retry_after_seconds(response.headers)
+        if response.status_code in RETRY_STATUS:
+            return FAILED, retry_after_seconds(response.headers)
+        return SUCCEEDED, None
+    
+    async def _stream_request(self, provider, url, headers, payload, stream=None):
+        """POST payload and return the response with its body still streaming
+        
+        Connection errors, timeouts, 429 and 5xx responses are retried with
+        jittered backoff through the provider's circuit breaker. Error responses are
+        read in full so their JSON can be inspected; the caller must aclose()
+        the response.
+        """
+        client = self._get_client(provider)
+        
+        def api_call():
+            request = client.build_request("POST", url, headers=headers, json=payload,
+                                           timeout=self._request_timeout(provider))
+            return client.send(request, stream=True)
+        
+        async def discard(response):
+            await response.aclose()
+        
+        response = await self._get_resilience(provider).call(
+            api_call, self._classify_response, discard, stream.retried if stream else None)
+        if response.status_code != 200:
+            await response.aread()
+        return response
+    
+    def _api_error(self, provider, response):
+        """Exception describing a failed provider response"""
+        error_message = f"{provider} API error: {response.status_code}"
+        try:
+            error_data = response.json()
+            if "error" in error_data:
+                error_message += f" - {error_data['error']['message']}"
+        except:
+            error_message += f" - {response.text}"
+        return Exception(error_message)
+    
+    async def _read_chat_stream(self, response, stream):
+        """Collect the text of an OpenAI-compatible chat completions stream"""
+        parts = []
+        async for event in iter_sse(response):
+            choices = event.get("choices") or []
+            if choices:
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    stream.delta(delta)
+            if event.get("usage"):
+                stream.usage(event["usage"].get("completion_tokens"))
+        return "".join(parts).strip()
+    
+    async def _convert_using_ollama(self, text, prompt, system_prompt, model, stream=None, history=None):
+        """Convert text to LaTeX using Ollama API
+        
+        With history (previous chat messages), the request goes to /api/chat
+        so Ollama reuses the KV cache of the earlier turns.
+        """
+        stream = stream or TokenStream()
+        
         # Prepare the request
         request_data = {
             "model": model,
-            "prompt": prompt,
-            "system": system_prompt,
-            "stream": False,
-            "temperature": 0.2
+            "stream": True,
+            "temperature": 0.2,
+            # Keep the model loaded between chunks and conversions instead of reloading it
+            "keep_alive": keep_alive_value(self.settings.ollama_keep_alive),
+            # The window chunks are sized for; Ollama's own default is smaller
+            "options": {"num_ctx": self.settings.ollama_num_ctx}
         }
+        if history is None:
+            endpoint = "generate"
+            request_data["prompt"] = prompt
+            request_data["system"] = system_prompt
+        else:
+            endpoint = "chat"
+            request_data["messages"] = ([{"role": "system", "content": system_prompt}] + history
+                                        + [{"role": "user", "content": prompt}])
         
-        # Send request to Ollama
-        response = requests.post(
-            f"{self.settings.ollama_base_url}/generate",
-            json=request_data,
-            headers={"Content-Type": "application/json"}
+        # Send request to Ollama; the reply arrives as one JSON object per line
+        response = await self._stream_request(
+            "Ollama (Local)",
+            f"{self.settings.ollama_base_url}/{endpoint}",
+            {"Content-Type": "application/json"},
+            request_data,
+            stream
         )
         
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("response", "")
-        else:
-            raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+        try:
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+            
+            parts = []
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                if "error" in result:
+                    raise Exception(f"Ollama API error: {result['error']}")
+                delta = result.get("response") or (result.get("message") or {}).get("content", "")
+                if delta:
+                    parts.append(delta)
+                    stream.delta(delta)
+                if result.get("done"):
+                    stream.usage(result.get("eval_count"))
+                    # Durations are in nanoseconds; a long load means the model was not resident
+                    load_seconds = result.get("load_duration", 0) / 1e9
+                    if load_seconds > 1:
+                        print(f"Ollama loaded {model} in {load_seconds:.1f}s before answering")
+                    # Prompt tokens found in Ollama's cache are not evaluated again
+                    prompt_tokens = result.get("prompt_eval_count", 0)
+                    prompt_seconds = result.get("prompt_eval_duration", 0) / 1e9
+                    stream.prompt_eval(prompt_tokens, prompt_seconds)
+                    print(f"Ollama /{endpoint}: evaluated {prompt_tokens} prompt tokens in {prompt_seconds:.2f}s")
+            return "".join(parts)
+        finally:
+            await response.aclose()
     
-    def _convert_using_openai(self, text, prompt, system_prompt):
+    async def _convert_using_openai(self, text, prompt, system_prompt, stream=None):
         """Convert text to LaTeX using OpenAI API"""
+        stream = stream or TokenStream()
         api_key = self.settings.api_keys["OpenAI"]
         if not api_key:
             raise ValueError("OpenAI API key is not configured. Please add your API key in the settings.")
@@ -169,29 +730,22 @@ class APIHandler:
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            "stream": True,
+            "stream_options": {"include_usage": True}
         }
         
-        def api_call():
-            return requests.post(endpoint, headers=headers, json=payload)
-        
-        response = self._call_api_with_retry(api_call)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-        else:
-            error_message = f"OpenAI API error: {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_message += f" - {error_data['error']['message']}"
-            except:
-                error_message += f" - {response.text}"
-            raise Exception(error_message)
+        response = await self._stream_request("OpenAI", endpoint, headers, payload, stream)
+        try:
+            if response.status_code != 200:
+                raise self._api_error("OpenAI", response)
+            return await self._read_chat_stream(response, stream)
+        finally:
+            await response.aclose()
     
-    def _convert_using_anthropic(self, text, prompt, system_prompt):
+    async def _convert_using_anthropic(self, text, prompt, system_prompt, stream=None):
         """Convert text to LaTeX using Anthropic API"""
+        stream = stream or TokenStream()
         api_key = self.settings.api_keys["Anthropic"]
         if not api_key:
             raise ValueError("Anthropic API key is not configured. Please add your API key in the settings.")
@@ -204,30 +758,38 @@ class APIHandler:
         }
         
         payload = {
-            "model": "claude-3-opus-20240229",
+            "model": PROVIDER_MODELS["Anthropic"],
             "system": system_prompt,
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 4000,
-            "temperature": 0.3
+            "temperature": 0.3,
+            "stream": True
         }
         
-        response = requests.post(endpoint, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["content"][0]["text"]
-        else:
-            error_message = f"Anthropic API error: {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_message += f" - {error_data['error']['message']}"
-            except:
-                error_message += f" - {response.text}"
-            raise Exception(error_message)
+        response = await self._stream_request("Anthropic", endpoint, headers, payload, stream)
+        try:
+            if response.status_code != 200:
+                raise self._api_error("Anthropic", response)
+            
+            parts = []
+            async for event in iter_sse(response):
+                event_type = event.get("type")
+                if event_type == "content_block_delta":
+                    delta = event.get("delta", {}).get("text")
+                    if delta:
+                        parts.append(delta)
+                        stream.delta(delta)
+                elif event_type == "message_delta":
+                    stream.usage(event.get("usage", {}).get("output_tokens"))
+                elif event_type == "error":
+                    raise Exception(f"Anthropic API error: {event['error']['message']}")
+            return "".join(parts)
+        finally:
+            await response.aclose()
     
-    def _convert_using_perplexity(self, text, prompt, system_prompt):
+    async def _convert_using_perplexity(self, text, prompt, system_prompt, stream=None):
         """Convert text to LaTeX using Perplexity API"""
+        stream = stream or TokenStream()
         api_key = self.settings.api_keys["Perplexity"]
         if not api_key:
             raise ValueError("Perplexity API key is not configured. Please add your API key in the settings.")
@@ -239,32 +801,27 @@ class APIHandler:
         }
         
         payload = {
-            "model": "sonar-medium-online",
+            "model": PROVIDER_MODELS["Perplexity"],
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.3,
-            "max_tokens": 4000
+            "max_tokens": 4000,
+            "stream": True
         }
         
-        response = requests.post(endpoint, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-        else:
-            error_message = f"Perplexity API error: {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_message += f" - {error_data['error']['message']}"
-            except:
-                error_message += f" - {response.text}"
-            raise Exception(error_message)
+        response = await self._stream_request("Perplexity", endpoint, headers, payload, stream)
+        try:
+            if response.status_code != 200:
+                raise self._api_error("Perplexity", response)
+            return await self._read_chat_stream(response, stream)
+        finally:
+            await response.aclose()
     
-    def _convert_using_mistral(self, text, prompt, system_prompt):
+    async def _convert_using_mistral(self, text, prompt, system_prompt, stream=None):
         """Convert text to LaTeX using Mistral API"""
+        stream = stream or TokenStream()
         api_key = self.settings.api_keys["Mistral"]
         if not api_key:
             raise ValueError("Mistral API key is not configured. Please add your API key in the settings.")
@@ -276,53 +833,72 @@ class APIHandler:
         }
         
         payload = {
-            "model": "mistral-large-latest",
+            "model": PROVIDER_MODELS["Mistral"],
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.3,
-            "max_tokens": 4000
+            "max_tokens": 4000,
+            "stream": True
         }
         
-        response = requests.post(endpoint, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-        else:
-            error_message = f"Mistral API error: {response.status_code}"
-            try:
-                error_data = response.json()
-                if "error" in error_data:
-                    error_message += f" - {error_data['error']['message']}"
-            except:
-                error_message += f" - {response.text}"
-            raise Exception(error_message)
+        response = await self._stream_request("Mistral", endpoint, headers, payload, stream)
+        try:
+            if response.status_code != 200:
+                raise self._api_error("Mistral", response)
+            return await self._read_chat_stream(response, stream)
+        finally:
+            await response.aclose()
     
-    def _convert_using_gemini(self, text, prompt, system_prompt):
+    async def _convert_using_gemini(self, text, prompt, system_prompt, stream=None):
         """Convert text to LaTeX using Google Gemini API"""
+        stream = stream or TokenStream()
         api_key = self.settings.api_keys["Google Gemini"]
         if not api_key:
             raise ValueError("Google Gemini API key is not configured. Please add your API key in the settings.")
         
-        # Create a client instance
-        client = genai.Client(api_key=api_key)
+        client = self._get_gemini_client(api_key)
         
-        try:
-            # Generate content using the Gemini model
-            response = client.models.generate_content(
-                model="gemini-2.5-pro-exp-03-25",
+        def classify(result, error):
+            # The SDK raises APIError (with the HTTP status as code) or httpx transport errors
+            if isinstance(error, genai_errors.APIError):
+                if error.code == 429:
+                    return THROTTLED, None
+                return (FAILED if error.code in RETRY_STATUS else SUCCEEDED), None
+            return (FAILED if isinstance(error, httpx.TransportError) else SUCCEEDED), None
+        
+        def api_call():
+            return client.aio.models.generate_content_stream(
+                model=PROVIDER_MODELS["Google Gemini"],
                 contents=prompt,
                 config=genai.types.GenerateContentConfig(
                     system_instruction=system_prompt,
-                    temperature=0.3
+                    temperature=0.3,
+                    # The SDK takes one timeout in milliseconds, applied to connecting and to each read
+                    http_options=genai.types.HttpOptions(timeout=int(self._request_timeout("Google Gemini").read * 1000))
                 )
             )
+        
+        try:
+            # Stream content from the Gemini model (async API, so the event loop is not blocked)
+            parts = []
+            usage = None
+            response_stream = await self._get_resilience("Google Gemini").call(
+                api_call, classify, on_retry=stream.retried)
+            async for chunk in response_stream:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    stream.delta(chunk.text)
+                if chunk.usage_metadata is not None:
+                    usage = chunk.usage_metadata.candidates_token_count
+            stream.usage(usage)
             
             # Extract the response text
-            return response.text.strip()
+            return "".join(parts).strip()
             
+        except httpx.TimeoutException:
+            raise
         except Exception as e:
             error_message = f"Google Gemini API error: {str(e)}"
-            raise Exception(error_message)
\ No newline at end of file
+            raise Exception(error_message)
@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import requests
+
+from api.api_handler import APIHandler, create_async_client
+from api.chunker import chunk_text, token_counter
+from api.context import estimate_tokens
+from api.rate_limit import RateLimiter
+from api.resilience import ProviderResilience
+from api.standin import WIRE_FORMAT_PATHS, LocalHTTPSStandIn
+from config.settings import Settings
+
+def _latency_stats(latencies):
+    """(mean, p50, p95) in milliseconds"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.mean(ordered) * 1000, statistics.median(ordered) * 1000, p95 * 1000
+
+async def _timed_post(client, url, payload):
+    start_time = time.perf_counter()
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+    return time.perf_counter() - start_time
+
+async def _async_latencies(url, cert_path, payload, requests_count, concurrent):
+    """Per-request latencies through the provider layer's async client"""
+    async with create_async_client(verify=cert_path) as client:
+        if concurrent:
+            return await asyncio.gather(*[_timed_post(client, url, payload) for _ in range(requests_count)])
+        return [await _timed_post(client, url, payload) for _ in range(requests_count)]
+
+def benchmark_sessions(requests_count=50, latency=0.0, wire_format="openai"):
+    """Per-request latency against a local HTTPS stand-in for each client style
+
+    Compares one-shot requests.post, a pooled requests.Session and the async
+    httpx client of the provider layer, sequentially and with all requests in
+    flight at once. Responses stream in the provider's wire format, as in
+    conversions; latency is until the stream ends. Returns
+    [(label, mean_ms, p50_ms, p95_ms, wall_seconds)].
+    """
+    payload = {"model": "stand-in", "messages": [{"role": "user", "content": "x squared"}], "stream": True}
+    results = []
+    with LocalHTTPSStandIn(latency=latency, wire_format=wire_format) as standin:
+        # Module-level requests.post: new DNS lookup, TCP connection and TLS handshake every time
+        wall_start = time.perf_counter()
+        latencies = []
+        for _ in range(requests_count):
+            start_time = time.perf_counter()
+            requests.post(standin.url, json=payload, verify=standin.cert_path).raise_for_status()
+            latencies.append(time.perf_counter() - start_time)
+        results.append(("requests.post", *_latency_stats(latencies), time.perf_counter() - wall_start))
+
+        # Pooled keep-alive session
+        wall_start = time.perf_counter()
+        latencies = []
+        with requests.Session() as session:
+            for _ in range(requests_count):
+                start_time = time.perf_counter()
+                session.post(standin.url, json=payload, verify=standin.cert_path).raise_for_status()
+                latencies.append(time.perf_counter() - start_time)
+        results.append(("requests.Session", *_latency_stats(latencies), time.perf_counter() - wall_start))
+
+        # Async provider layer, one request at a time and all at once
+        for label, concurrent in (("httpx async", False), ("httpx concurrent", True)):
+            wall_start = time.perf_counter()
+            latencies = asyncio.run(_async_latencies(standin.url, standin.cert_path, payload, requests_count, concurrent))
+            results.append((label, *_latency_stats(latencies), time.perf_counter() - wall_start))
+    return results
+
+async def _simulate_jobs(url, cert_path, payload, jobs, requests_per_job, stagger, limiter):
+    """Run staggered jobs of concurrent requests; returns (wall_seconds, job_finish_seconds, resilience)"""
+    # Generous retries so the unpaced run completes and its 429s are all counted
+    resilience = ProviderResilience("stand-in", max_retries=50, budget_reserve=10000)
+    tokens = estimate_tokens(json.dumps(payload))
+    start_time = time.perf_counter()
+    
+    async with create_async_client(verify=cert_path) as client:
+        async def request(job):
+            if limiter:
+                await limiter.acquire(tokens, job)
+            
+            def api_call():
+                return client.send(client.build_request("POST", url, json=payload), stream=True)
+            
+            async def discard(response):
+                await response.aclose()
+            
+            response = await resilience.call(api_call, APIHandler._classify_response, discard)
+            await response.aread()
+            await response.aclose()
+        
+        async def job(index):
+            await asyncio.sleep(index * stagger)
+            await asyncio.gather(*[request(index) for _ in range(requests_per_job)])
+            return time.perf_counter() - start_time
+        
+        finish_times = await asyncio.gather(*[job(index) for index in range(jobs)])
+    return time.perf_counter() - start_time, finish_times, resilience
+
+def benchmark_rate_limit(jobs=3, requests_per_job=20, rpm=60, tpm=0, window=6.0, stagger=0.5, latency=0.05):
+    """Batch jobs against a stand-in enforcing RPM/TPM limits, with and without client-side pacing
+    
+    Limits apply per `window` seconds instead of per minute so a simulation
+    takes seconds. Jobs start `stagger` seconds apart and send all their
+    requests at once. Returns [(label, wall_seconds, responses_429,
+    failed_requests, job_finish_seconds)].
+    """
+    payload = {"model": "stand-in", "messages": [{"role": "user", "content": "x squared " * 100}], "stream": True}
+    results = []
+    for label, paced in (("retry on 429", False), ("client pacing", True)):
+        with LocalHTTPSStandIn(latency=latency, rpm=rpm, tpm=tpm, window=window) as standin:
+            # Pace slightly under the server's limits, whose window is measured from when requests arrive
+            limiter = RateLimiter(int(rpm * 0.95), int(tpm * 0.95), window) if paced else None
+            wall, finish_times, resilience = asyncio.run(_simulate_jobs(
+                standin.url, standin.cert_path, payload, jobs, requests_per_job, stagger, limiter))
+            results.append((label, wall, standin.rejected, resilience.failures, finish_times))
+    return results
+
+def _synthetic_transcript(characters):
+    """Lecture-like text with sentences, inline math and paragraph breaks"""
+    sentences = [
+        "Now consider the integral of x squared from zero to one.",
+        "By the fundamental theorem this equals one third, i.e. $\\frac{1}{3}$.",
+        "See Fig. 2 for the area under the curve.",
+        "What happens if we replace x squared by e to the minus x?",
+    ]
+    parts = []
+    length = 0
+    while length < characters:
+        paragraph = " ".join(sentences[i % len(sentences)] for i in range(len(parts) % 7 + 3))
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)[:characters]
+
+def _whitespace_chunks(text, max_length):
+    """The previous chunker: whitespace splitting by character count"""
+    chunks = []
+    current_chunk = ""
+    for word in text.split():
+        if len(current_chunk) + len(word) + 1 > max_length:
+            chunks.append(current_chunk)
+            current_chunk = word
+        else:
+            current_chunk = current_chunk + " " + word if current_chunk else word
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def benchmark_chunker(sizes=(10000, 40000, 400000), max_tokens=2500, repeats=5):
+    """Time each chunker on synthetic transcripts
+
+    Returns [(characters, label, milliseconds_per_run, chunk_count)].
+    """
+    chunkers = [
+        ("whitespace (old)", lambda text: _whitespace_chunks(text, max_tokens * 4)),
+        ("sentence, estimate", lambda text: chunk_text(text, max_tokens, estimate_tokens)),
+    ]
+    openai_count = token_counter("OpenAI", "gpt-4o")
+    if openai_count is not estimate_tokens:
+        chunkers.append(("sentence, tiktoken", lambda text: chunk_text(text, max_tokens, openai_count)))
+
+    results = []
+    for size in sizes:
+        text = _synthetic_transcript(size)
+        for label, chunker in chunkers:
+            chunks = chunker(text)
+            start_time = time.perf_counter()
+            for _ in range(repeats):
+                chunker(text)
+            elapsed = (time.perf_counter() - start_time) / repeats
+            results.append((size, label, elapsed * 1000, len(chunks)))
+    return results
+
+def benchmark_ollama_context(model, text=None, characters=12000, url="http://localhost:11434/api"):
+    """Prompt tokens Ollama evaluates per chunk with text context and with cached chat turns
+    
+    Converts the same transcript (synthetic unless text is given) in Direct
+    Transcription mode with the token-budget context, once through
+    /api/generate with the context pasted into each prompt and once through
+    /api/chat. Returns [(label, [(prompt_tokens, seconds) per chunk])].
+    """
+    settings = Settings()
+    settings.selected_provider = "Ollama (Local)"
+    settings.ollama_model_name = model
+    settings.ollama_base_url = url
+    settings.selected_prompt_mode = "Direct Transcription"
+    settings.context_strategy = "token_budget"
+    settings.parallel_conversion = False
+    settings.llm_cache_enabled = False
+    settings.hedging_enabled = False
+    text = text or _synthetic_transcript(characters)
+    
+    results = []
+    for label, chat_context in (("generate + text context", False), ("chat + cached turns", True)):
+        settings.ollama_chat_context = chat_context
+        handler = APIHandler(settings)
+        errors = []
+        
+        def callback(success, message, output, progress=None):
+            if not success:
+                errors.append(message)
+        try:
+            handler.convert_text(text, callback).result()
+        finally:
+            handler.close()
+        if errors:
+            raise RuntimeError(errors[0])
+        results.append((label, handler.last_stream.prompt_evals))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM provider request handling")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sessions_parser = subparsers.add_parser("sessions", help="Per-request latency with and without pooled sessions")
+    sessions_parser.add_argument("--requests", type=int, default=50, help="Requests per configuration")
+    sessions_parser.add_argument("--latency", type=float, default=0.0, help="Simulated server time per request (s)")
+    sessions_parser.add_argument("--wire-format", default="openai", choices=sorted(WIRE_FORMAT_PATHS),
+                                 help="Provider streaming format of the stand-in")
+
+    chunker_parser = subparsers.add_parser("chunker", help="Time the transcript chunkers")
+    chunker_parser.add_argument("--sizes", default="10000,40000,400000", help="Comma-separated transcript lengths")
+    chunker_parser.add_argument("--max-tokens", type=int, default=2500, help="Tokens per chunk")
+    chunker_parser.add_argument("--repeats", type=int, default=5, help="Runs averaged per measurement")
+
+    rate_limit_parser = subparsers.add_parser("ratelimit", help="Simulate batch jobs against a rate-limited stand-in")
+    rate_limit_parser.add_argument("--jobs", type=int, default=3, help="Concurrent conversion jobs")
+    rate_limit_parser.add_argument("--requests", type=int, default=20, help="Requests per job")
+    rate_limit_parser.add_argument("--rpm", type=int, default=60, help="Requests allowed per window")
+    rate_limit_parser.add_argument("--tpm", type=int, default=0, help="Tokens allowed per window")
+    rate_limit_parser.add_argument("--window", type=float, default=6.0, help="Simulated minute (s)")
+    rate_limit_parser.add_argument("--stagger", type=float, default=0.5, help="Delay between job starts (s)")
+    
+    ollama_parser = subparsers.add_parser("ollama-context", help="Prompt evaluation per chunk with and without cached chat turns")
+    ollama_parser.add_argument("model", help="Ollama model name")
+    ollama_parser.add_argument("--text", help="Transcript file (default: synthetic)")
+    ollama_parser.add_argument("--characters", type=int, default=12000, help="Length of the synthetic transcript")
+    ollama_parser.add_argument("--url", default="http://localhost:11434/api", help="Ollama API base URL")
+    
+    args = parser.parse_args()
+
+    if args.command == "sessions":
+        results = benchmark_sessions(args.requests, args.latency, args.wire_format)
+
+        print(f"Local HTTPS stand-in ({args.wire_format} stream), {args.requests} requests per client")
+        print(f"{'client':<16}  {'mean (ms)':>9}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'wall (s)':>8}")
+        for label, mean_ms, p50_ms, p95_ms, wall_seconds in results:
+            print(f"{label:<16}  {mean_ms:>9.2f}  {p50_ms:>9.2f}  {p95_ms:>9.2f}  {wall_seconds:>8.2f}")
+    elif args.command == "ratelimit":
+        results = benchmark_rate_limit(args.jobs, args.requests, args.rpm, args.tpm, args.window, args.stagger)
+        
+        print(f"{args.jobs} jobs x {args.requests} requests, limits {args.rpm} requests / {args.tpm or 'unlimited'} "
+              f"tokens per {args.window:g}s")
+        print(f"{'client':<14}  {'wall (s)':>8}  {'429s':>5}  {'failed':>6}  job finish times (s)")
+        for label, wall, rejected, failed, finish_times in results:
+            finishes = ", ".join(f"{finish:.1f}" for finish in finish_times)
+            print(f"{label:<14}  {wall:>8.2f}  {rejected:>5}  {failed:>6}  {finishes}")
+    elif args.command == "ollama-context":
+        text = None
+        if args.text:
+            with open(args.text, "r", encoding="utf-8") as f:
+                text = f.read()
+        results = benchmark_ollama_context(args.model, text, args.characters, args.url)
+        
+        for label, evals in results:
+            print(label)
+            print(f"  {'chunk':>5}  {'prompt tokens':>13}  {'eval (s)':>8}")
+            for i, (tokens, seconds) in enumerate(evals):
+                print(f"  {i + 1:>5}  {tokens:>13}  {seconds:>8.2f}")
+            print(f"  {'total':>5}  {sum(t for t, _ in evals):>13}  {sum(s for _, s in evals):>8.2f}")
+    elif args.command == "chunker":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        results = benchmark_chunker(sizes, args.max_tokens, args.repeats)
+
+        print(f"{'chars':>8}  {'chunker':<20}  {'ms/run':>8}  {'chunks':>6}")
+        for size, label, milliseconds, count in results:
+            print(f"{size:>8}  {label:<20}  {milliseconds:>8.2f}  {count:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class ConversionCache:
+    """On-disk cache of LLM conversion outputs, addressed by a hash of the request
+
+    The key covers the provider, the model, the system prompt and the
+    rendered prompt (mode template, chunk text and carried context), so any
+    change to what the model would see is a miss. Each entry is a JSON file
+    named after its key; a hit refreshes the file's mtime, which orders
+    entries for least-recently-used eviction once the cache grows past
+    max_bytes. Entries older than ttl_seconds are treated as misses and
+    removed.
+    """
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, ttl_seconds=30 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Session statistics shown in the settings
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # Prompt and output bytes not sent to or received from a provider
+        self.size = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(provider, model, system_prompt, prompt):
+        """Hash identifying one conversion request"""
+        request = json.dumps([provider, model, system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _entries(self):
+        """(path, size, mtime) of every cache entry"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.size -= size
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        """Cached output for key, or None"""
+        path = self._path(key)
+        with self.lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            except Exception as e:
+                print(f"Error reading conversion cache entry: {e}")
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds and time.time() - entry["created"] > self.ttl_seconds:
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            # Mark as recently used
+            os.utime(path)
+            self.hits += 1
+            self.bytes_saved += entry["request_bytes"] + len(entry["output"].encode("utf-8"))
+            return entry["output"]
+
+    def put(self, key, output, request_bytes=0):
+        """Store the output of a request, evicting least recently used entries beyond max_bytes"""
+        path = self._path(key)
+        with self.lock:
+            self._remove(path)
+            partial_path = path + ".part"
+            with open(partial_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "request_bytes": request_bytes, "output": output}, f)
+            os.replace(partial_path, path)
+            self.size += os.path.getsize(path)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Trim to 90% so every put past the limit does not rescan the directory
+        target = self.max_bytes * 0.9
+        for path, _, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self.size <= target:
+                break
+            self._remove(path)
+
+    def clear(self):
+        """Remove every entry; statistics are kept"""
+        with self.lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+            self.size = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def describe(self):
+        if self.hit_rate is None:
+            text = "No lookups yet"
+        else:
+            text = (f"Hit rate {self.hit_rate:.0%} ({self.hits}/{self.hits + self.misses}), "
+                    f"{self.bytes_saved / 1024:.1f} KB saved")
+        return f"{text}; {self.size / (1024 * 1024):.1f} MB on disk"
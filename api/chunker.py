@@ -0,0 +1,174 @@
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from api.context import estimate_tokens
+
+# (context window, maximum output tokens requested) per model
+MODEL_LIMITS = {
+    "gpt-4o": (128000, 16384),
+    "gpt-4o-mini": (128000, 16384),
+    "o3-mini": (200000, 100000),
+    "o1": (200000, 100000),
+    "claude-3-opus-20240229": (200000, 4000),
+    "sonar-medium-online": (12000, 4000),
+    "mistral-large-latest": (128000, 4000),
+    "gemini-2.5-pro-exp-03-25": (1000000, 65536),
+}
+# Models not listed above; Ollama models are sized from the num_ctx sent with each request instead
+DEFAULT_LIMITS = (8192, 4096)
+
+# Larger chunks gain little, but delay the first finished chunk and defeat parallel conversion
+MAX_CHUNK_TOKENS = 4000
+# Smaller chunks multiply requests and the prompt overhead resent with each; a budget this low
+# means the context window is too small for the prompts and is worth a warning
+MIN_CHUNK_TOKENS = 512
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Candidate sentence ends: terminal punctuation followed by whitespace
+SENTENCE_END = re.compile(r"[.!?]['\")\]]*\s+")
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "cf.", "fig.", "eq.", "eqs.", "dr.", "prof.", "mr.", "mrs.",
+                 "ms.", "no.", "approx.", "resp.", "sec.", "ch.", "thm.", "def.", "prop.", "lem."}
+
+_encodings = {}
+
+def token_counter(provider, model):
+    """Return a function counting tokens of text for the given provider and model
+
+    OpenAI models are counted exactly with tiktoken when it is installed; all
+    other models use the four-characters-per-token estimate.
+    """
+    if provider == "OpenAI" and tiktoken is not None:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        encoding = _encodings[model]
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens
+
+def chunk_token_budget(model, prompt_overhead, limits=None, chunks_in_context=0):
+    """Tokens of transcript per chunk that leave room for the prompt and the model's output
+
+    The output is about as long as the chunk, so the window left after the
+    fixed prompt overhead is shared by the chunk, its output and the
+    chunks_in_context previous outputs carried as context. Chunks are also
+    kept within the output limit. limits overrides the model's
+    (context window, maximum output) pair. Returns (budget, clamped), where
+    clamped means the window was too small and MIN_CHUNK_TOKENS was used.
+    """
+    context_window, max_output = limits or MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+    room = (context_window - prompt_overhead) // (2 + chunks_in_context)
+    budget = min(room, max_output, MAX_CHUNK_TOKENS)
+    if budget < MIN_CHUNK_TOKENS:
+        return MIN_CHUNK_TOKENS, True
+    return budget, False
+
+def split_sentences(text):
+    """Split a paragraph into sentences, ignoring abbreviations and periods inside $...$ math"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        end = match.end()
+        candidate = text[start:end]
+        last_word = candidate.split()[-1].lower() if candidate.split() else ""
+        # An odd number of $ means the period sits inside inline math
+        if last_word in ABBREVIATIONS or candidate.count("$") % 2 == 1:
+            continue
+        sentences.append(candidate.strip())
+        start = end
+    if text[start:].strip():
+        sentences.append(text[start:].strip())
+    return sentences
+
+def _split_long_word(word, max_tokens, count):
+    """Cut a run of text without whitespace (e.g. a long formula or URL) into pieces within max_tokens"""
+    pieces = []
+    while word:
+        size = max(1, (max_tokens - 1) * 4)
+        while size > 1 and count(word[:size]) + 1 > max_tokens:
+            size = size * 3 // 4
+        pieces.append(word[:size])
+        word = word[size:]
+    return pieces
+
+def _split_words(text, max_tokens, count):
+    """Last resort for a sentence longer than a chunk: split on whitespace, and inside overlong words"""
+    pieces = []
+    current = []
+    current_tokens = 0
+    words = []
+    for word in text.split():
+        words.extend(_split_long_word(word, max_tokens, count) if count(word) + 1 > max_tokens else [word])
+    for word in words:
+        word_tokens = count(word) + 1
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def _units(text, segments=None):
+    """(unit_text, ends_paragraph) pairs in order: Whisper segments if they match the text, else sentences"""
+    if segments is not None and segments.matches(text):
+        return [(segment_text.strip(), False) for segment_text in segments.texts if segment_text.strip()]
+    units = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        sentences = split_sentences(paragraph)
+        for i, sentence in enumerate(sentences):
+            units.append((sentence, i == len(sentences) - 1))
+    return units
+
+def chunk_text(text, max_tokens, count=estimate_tokens, segments=None):
+    """Split text into chunks of at most max_tokens tokens on natural boundaries
+
+    Chunks end on segment or sentence boundaries, and on a paragraph
+    boundary when one falls in the second half of the chunk. Paragraph
+    breaks are kept inside chunks. Only a single sentence longer than
+    max_tokens is split between words.
+    """
+    chunks = []
+    current = []  # (unit_text, ends_paragraph, tokens)
+    current_tokens = 0
+    paragraph_cut = None  # Index in current just after the last paragraph end
+
+    def flush(upto):
+        parts = []
+        for unit_text, ends_paragraph, _ in current[:upto]:
+            parts.append(unit_text + ("\n\n" if ends_paragraph else " "))
+        chunks.append("".join(parts).strip())
+
+    for unit_text, ends_paragraph in _units(text, segments):
+        unit_tokens = count(unit_text) + 1
+        pieces = [(unit_text, ends_paragraph, unit_tokens)]
+        if unit_tokens > max_tokens:
+            words = _split_words(unit_text, max_tokens, count)
+            pieces = [(piece, ends_paragraph and i == len(words) - 1, count(piece) + 1)
+                      for i, piece in enumerate(words)]
+
+        for piece in pieces:
+            if current and current_tokens + piece[2] > max_tokens:
+                # Cut at the last paragraph end if it keeps at least half a chunk, else here
+                cut = paragraph_cut if paragraph_cut and paragraph_cut < len(current) else len(current)
+                if sum(tokens for _, _, tokens in current[:cut]) < max_tokens // 2:
+                    cut = len(current)
+                flush(cut)
+                current = current[cut:]
+                current_tokens = sum(tokens for _, _, tokens in current)
+                paragraph_cut = None
+            current.append(piece)
+            current_tokens += piece[2]
+            if piece[1]:
+                paragraph_cut = len(current)
+    if current:
+        flush(len(current))
+    return chunks
@@ -0,0 +1,104 @@
+import math
+
+# Context strategies by settings value, with the label shown in the settings
+CONTEXT_STRATEGIES = {
+    "last_chunks": "Last N chunks",
+    "token_budget": "Token-budgeted tail",
+    "summary": "Rolling summary",
+    "full": "Full history (unbounded)"
+}
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a compact running summary of LaTeX notes being produced chunk by chunk. Keep the notation and symbols defined so far, the current section structure, and any environment or list that is still open. Output only the summary."""
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English and LaTeX)"""
+    return math.ceil(len(text) / 4)
+
+def tail_within_budget(text, token_budget):
+    """Trailing part of text that fits token_budget, cut at a line boundary where possible
+
+    The tail starts after a newline only if one falls within its first fifth;
+    otherwise (e.g. one long paragraph) it is cut mid-line rather than lost.
+    """
+    max_chars = token_budget * 4
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    newline = tail.find("\n", 0, max_chars // 5)
+    return tail[newline + 1:] if newline != -1 else tail
+
+class ConversationHistory:
+    """Previous turns of a conversion, resent as chat messages to Ollama's /api/chat
+    
+    Each request repeats the previous request plus its answer, so Ollama
+    finds the history in its KV cache and only evaluates the new chunk.
+    With a token_budget, each turn is stored with its prompt and output cut
+    to a quarter of the budget, and when the history passes the budget the
+    oldest turns are dropped down to half of it at once: the next request
+    is evaluated in full, and the following ones reuse the cache again.
+    The latest turn is always kept.
+    """
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget  # None keeps every turn in full
+        self.messages = []
+    
+    def tokens(self):
+        return sum(estimate_tokens(message["content"]) for message in self.messages)
+    
+    def add(self, prompt, output):
+        if self.token_budget:
+            prompt = tail_within_budget(prompt, self.token_budget // 4)
+            output = tail_within_budget(output, self.token_budget // 4)
+        self.messages.append({"role": "user", "content": prompt})
+        self.messages.append({"role": "assistant", "content": output})
+        if self.token_budget and self.tokens() > self.token_budget:
+            while len(self.messages) > 2 and self.tokens() > self.token_budget // 2:
+                del self.messages[:2]
+
+class ContextWindow:
+    """Context carried from converted chunks into the prompt of the next one
+
+    Strategies:
+      last_chunks   the outputs of the last `last_chunks` chunks
+      token_budget  the tail of all outputs that fits in `token_budget` tokens
+      summary       a compact summary, refreshed after every chunk by calling
+                    summarize(prompt, system_prompt) (a coroutine function)
+      full          every previous output (cost grows quadratically)
+    """
+    def __init__(self, strategy="token_budget", last_chunks=2, token_budget=2000, summarize=None):
+        if strategy not in CONTEXT_STRATEGIES:
+            raise ValueError(f"Unknown context strategy: {strategy}")
+        if strategy == "summary" and summarize is None:
+            raise ValueError("The summary context strategy needs a summarize function")
+        self.strategy = strategy
+        self.last_chunks = max(1, last_chunks)
+        self.token_budget = max(1, token_budget)
+        self.summarize = summarize
+        self.outputs = []  # Outputs still needed to build the context
+        self.summary = ""
+
+    def text(self):
+        """Context to prepend to the next chunk's prompt ("" before the first chunk)"""
+        if self.strategy == "summary":
+            return self.summary
+        context = "".join(output + "\n" for output in self.outputs)
+        if self.strategy == "token_budget":
+            return tail_within_budget(context, self.token_budget)
+        return context
+
+    async def add(self, output):
+        """Record the output of a converted chunk"""
+        if self.strategy == "summary":
+            prompt = (f"Update the summary with the new output, in at most {self.token_budget} tokens.\n\n"
+                      f"PREVIOUS SUMMARY:\n{self.summary}\n\nNEW OUTPUT:\n{output}")
+            self.summary = tail_within_budget(await self.summarize(prompt, SUMMARY_SYSTEM_PROMPT),
+                                              self.token_budget)
+            return
+
+        self.outputs.append(output)
+        if self.strategy == "last_chunks":
+            del self.outputs[:-self.last_chunks]
+        elif self.strategy == "token_budget":
+            # Drop outputs that lie entirely outside the budget
+            while len(self.outputs) > 1 and estimate_tokens("\n".join(self.outputs[1:])) >= self.token_budget:
+                self.outputs.pop(0)
@@ -0,0 +1,36 @@
+from collections import deque
+
+class LatencyTracker:
+    """Recent request latencies of one provider model, for choosing when to hedge"""
+    def __init__(self, size=200, min_samples=20):
+        self.latencies = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+
+    def percentile(self, fraction):
+        """Latency below which `fraction` of recent requests finished, or None with too few samples"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def expected_remaining(self, elapsed):
+        """Mean further wait of past requests that were still running after `elapsed` seconds"""
+        slower = [latency - elapsed for latency in self.latencies if latency > elapsed]
+        return sum(slower) / len(slower) if slower else 0.0
+
+class HedgeStats:
+    """How often hedged requests fired, won, and roughly how much time they saved"""
+    def __init__(self):
+        self.fired = 0
+        self.won = 0  # The hedge answered first and the original request was cancelled
+        self.wasted = 0  # The original request answered first
+        self.saved_seconds = 0.0  # Estimated from how much longer slow requests used to take
+
+    def describe(self):
+        if not self.fired:
+            return "Hedging: not needed yet"
+        return (f"Hedging: fired {self.fired} times, won {self.won}, "
+                f"~{self.saved_seconds:.0f}s saved")
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+class SlidingWindow:
+    """Budget of capacity per `window` seconds, counting what was taken in the last window
+
+    Unlike a token bucket that refills continuously, this never lets more than
+    capacity through in any window, so it also stays within providers that
+    count usage over a sliding minute.
+    """
+    def __init__(self, capacity, window=60.0):
+        self.capacity = capacity
+        self.window = window
+        self.taken = deque()  # (monotonic time, amount)
+        self.total = 0
+
+    def _expire(self, now):
+        while self.taken and self.taken[0][0] <= now - self.window:
+            self.total -= self.taken.popleft()[1]
+
+    def wait_time(self, amount):
+        """Seconds until amount fits (amounts above capacity wait for an empty window)"""
+        now = time.monotonic()
+        self._expire(now)
+        excess = self.total + min(amount, self.capacity) - self.capacity
+        wait = 0.0
+        for taken_at, taken in self.taken:
+            if excess <= 0:
+                break
+            excess -= taken
+            wait = taken_at + self.window - now
+        return max(0.0, wait)
+
+    def take(self, amount):
+        amount = min(amount, self.capacity)
+        self.taken.append((time.monotonic(), amount))
+        self.total += amount
+
+class RateLimiter:
+    """Paces requests to one provider model within requests- and tokens-per-minute budgets
+
+    Callers await acquire() with the tokens a request is expected to use.
+    Waiting requests are granted round-robin across jobs (one conversion is
+    one job), so a long batch does not starve a conversion started after it.
+    A limit of 0 disables that budget. Runs on the provider event loop only.
+    """
+    def __init__(self, rpm=0, tpm=0, window=60.0):
+        self.window = window
+        self.configure(rpm, tpm)
+        self.queues = OrderedDict()  # job -> deque of (future, tokens)
+        self.dispatcher = None
+
+        # Metrics
+        self.granted = 0
+        self.waited = 0.0  # Total seconds requests spent queued
+
+    def configure(self, rpm, tpm):
+        """Apply new limits, keeping the usage recorded by unchanged windows"""
+        if getattr(self, "rpm", None) != rpm:
+            self.requests = SlidingWindow(rpm, self.window) if rpm else None
+        if getattr(self, "tpm", None) != tpm:
+            self.tokens = SlidingWindow(tpm, self.window) if tpm else None
+        self.rpm = rpm
+        self.tpm = tpm
+
+    def _wait_time(self, tokens):
+        wait = 0.0
+        if self.requests:
+            wait = self.requests.wait_time(1)
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    async def acquire(self, tokens, job=None):
+        """Wait until a request of about `tokens` tokens fits both budgets"""
+        if not self.requests and not self.tokens:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(job, deque()).append((future, tokens, time.monotonic()))
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self.queues:
+            # Next job in turn; it goes to the back of the line if it has more requests waiting
+            job, queue = next(iter(self.queues.items()))
+            future, tokens, queued_at = queue[0]
+            if future.cancelled():
+                queue.popleft()
+            else:
+                wait = self._wait_time(tokens)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                queue.popleft()
+                if self.requests:
+                    self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(tokens)
+                self.granted += 1
+                self.waited += time.monotonic() - queued_at
+                future.set_result(None)
+            del self.queues[job]
+            if queue:
+                self.queues[job] = queue
+
+    def describe(self):
+        limits = []
+        if self.rpm:
+            limits.append(f"{self.rpm} RPM")
+        if self.tpm:
+            limits.append(f"{self.tpm} TPM")
+        text = " / ".join(limits) or "unlimited"
+        if self.granted:
+            text += f", {self.granted} requests, {self.waited / self.granted:.1f}s average wait"
+        return text
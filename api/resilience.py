@@ -0,0 +1,213 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+# Statuses worth retrying: rate limits, server errors and Anthropic's "overloaded"
+RETRY_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+# Outcomes of an attempt, as classified by the caller
+SUCCEEDED = None
+THROTTLED = "throttled"  # Rate limited: retry, but the provider is healthy
+FAILED = "failed"  # Server or connection error: retry and count towards the circuit breaker
+
+# A Retry-After longer than this fails the request instead of stalling the conversion
+MAX_RETRY_AFTER = 120.0
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a provider that keeps failing"""
+
+class RequestTimeoutError(Exception):
+    """Raised when a provider does not connect or stops sending within its timeouts"""
+
+class DeadlineExceededError(Exception):
+    """Raised when a conversion runs out of its time limit"""
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]
+
+    Jitter keeps concurrent chunks that failed together from retrying in
+    lockstep and hitting the rate limit again.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def retry_after_seconds(headers):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), or None"""
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Stops requests to a provider after consecutive failures
+
+    After failure_threshold failures in a row the circuit opens and requests
+    fail immediately for reset_timeout seconds. Then a single probe request
+    is let through: success closes the circuit, failure opens it again.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.opens = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Whether a request may be sent now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def seconds_until_probe(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None or self.probe_in_flight:
+                self.opens += 1
+            self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+class RetryBudget:
+    """Caps retries at a fraction of requests so an outage does not multiply traffic
+
+    Every request deposits `ratio` retries and every retry withdraws one. The
+    balance starts at, and is capped by, `reserve`, which allows short bursts.
+    """
+    def __init__(self, ratio=0.2, reserve=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = float(reserve)
+
+    def deposit(self):
+        self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def withdraw(self):
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+class ProviderResilience:
+    """Retry policy, circuit breaker, retry budget and metrics for one provider
+
+    Only runs on the provider event loop, so it needs no locking.
+    """
+    def __init__(self, provider, max_retries=4, failure_threshold=5, reset_timeout=30.0,
+                 budget_ratio=0.2, budget_reserve=10):
+        self.provider = provider
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.budget = RetryBudget(budget_ratio, budget_reserve)
+
+        # Metrics
+        self.requests = 0
+        self.retried_requests = 0  # Requests that failed at least once and were retried
+        self.retries = 0
+        self.failures = 0  # Requests that still failed after retrying
+        self.rejected = 0  # Requests refused while the circuit was open
+
+    async def call(self, attempt, classify, discard=None, on_retry=None):
+        """Run attempt() until it succeeds, fails permanently or retries run out
+
+        classify(result, error) returns (outcome, retry_after_seconds) for
+        one attempt, where outcome is SUCCEEDED (also for errors not worth
+        retrying), THROTTLED or FAILED. discard(result) releases a result
+        that is being retried (e.g. closes a response). on_retry() is called
+        when the request is retried for the first time. The final result is
+        returned or its error raised, so callers report errors as before.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.provider} is failing repeatedly; requests paused for "
+                                   f"{self.breaker.seconds_until_probe():.0f}s")
+        # allow() marks a request let through while half-open as the probe
+        probing = self.breaker.probe_in_flight
+        self.requests += 1
+        self.budget.deposit()
+
+        retries = 0
+        try:
+            while True:
+                result, error = None, None
+                try:
+                    result = await attempt()
+                except Exception as e:
+                    error = e
+                outcome, retry_after = classify(result, error)
+
+                if outcome is SUCCEEDED:
+                    # The provider answered; a non-retryable error (bad key, bad request) is not an outage
+                    self.breaker.record_success()
+                    if error is not None:
+                        raise error
+                    return result
+
+                if outcome == FAILED:
+                    self.breaker.record_failure()
+                delay = retry_after if retry_after is not None else backoff_delay(retries)
+                if (retries >= self.max_retries or delay > MAX_RETRY_AFTER or self.breaker.state == "open"
+                        or not self.budget.withdraw()):
+                    self.failures += 1
+                    if error is not None:
+                        raise error
+                    return result
+
+                if retries == 0:
+                    self.retried_requests += 1
+                    if on_retry:
+                        on_retry()
+                retries += 1
+                self.retries += 1
+                if result is not None and discard:
+                    await discard(result)
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # A cancelled probe says nothing about the provider; let the next request probe
+            if probing:
+                self.breaker.probe_in_flight = False
+            raise
+        finally:
+            if probing and self.breaker.probe_in_flight:
+                # The probe gave up while still throttled: pause again rather than leave the probe pending
+                self.breaker.record_failure()
+
+    def describe(self):
+        text = f"{self.provider}: {self.requests} requests"
+        if self.retried_requests:
+            text += f", {self.retried_requests} retried ({self.retries} retries)"
+        if self.failures:
+            text += f", {self.failures} failed"
+        if self.rejected:
+            text += f", {self.rejected} rejected"
+        if self.breaker.state != "closed":
+            text += f", circuit {self.breaker.state}"
+        return text
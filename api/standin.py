@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Request path of each wire format the stand-in can stream
+WIRE_FORMAT_PATHS = {
+    "openai": "/v1/chat/completions",  # Also Perplexity and Mistral
+    "anthropic": "/v1/messages",
+    "ollama": "/api/generate",
+    "gemini": "/v1beta/models/stand-in:streamGenerateContent",
+}
+
+def create_self_signed_cert(directory):
+    """Write a localhost certificate and key with the openssl CLI; returns (cert_path, key_path)"""
+    openssl_cmd = shutil.which("openssl")
+    if not openssl_cmd:
+        raise RuntimeError("The local HTTPS stand-in needs the openssl command to create a certificate")
+    cert_path = os.path.join(directory, "standin.crt")
+    key_path = os.path.join(directory, "standin.key")
+    subprocess.run([
+        openssl_cmd, "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", key_path, "-out", cert_path, "-days", "1",
+        "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return cert_path, key_path
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls between them
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        retry_after = self.server.standin.admit(length)
+        if retry_after is not None:
+            body = json.dumps({"error": {"message": "Rate limit exceeded"}}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Retry-After", f"{retry_after:.3f}")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.server.standin.latency:
+            time.sleep(self.server.standin.latency)
+
+        standin = self.server.standin
+        if request.get("stream") or standin.wire_format == "gemini":
+            self._stream(standin.events(request))
+            return
+
+        body = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": self.server.standin.reply}}]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, events):
+        """Send events with chunked transfer encoding as they are produced"""
+        standin = self.server.standin
+        content_type = "application/x-ndjson" if standin.wire_format == "ollama" else "text/event-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, event in enumerate(events):
+            if i and standin.token_delay:
+                time.sleep(standin.token_delay)
+            data = event.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+
+class LocalHTTPSStandIn:
+    """LLM provider endpoint on https://localhost for benchmarks
+
+    Answers every POST with a fixed completion after latency seconds. A
+    request with "stream": true gets the completion as a stream in
+    wire_format ("openai", "anthropic", "ollama" or "gemini", which always
+    streams), a few characters per event, token_delay seconds apart;
+    other requests get one OpenAI-style JSON body. With rpm or tpm set, it
+    enforces limits per sliding `window` seconds (request tokens counted as
+    body bytes / 4), and answers requests over a limit with 429 and
+    Retry-After. Use as a context manager; url and cert_path (for verify=)
+    are set while it is running.
+    """
+    def __init__(self, latency=0.0, reply="\\[ x^2 \\]", rpm=0, tpm=0, window=60.0, wire_format="openai",
+                 token_delay=0.0):
+        if wire_format not in WIRE_FORMAT_PATHS:
+            raise ValueError(f"Unknown wire format: {wire_format}")
+        self.latency = latency
+        self.reply = reply
+        self.wire_format = wire_format
+        self.token_delay = token_delay
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.requests = 0
+        self.rejected = 0
+        self.admitted = deque()  # (monotonic time, tokens) of requests admitted in the last window
+        self.lock = threading.Lock()
+        self.url = None
+        self.cert_path = None
+        self.server = None
+        self.temp_dir = None
+
+    def admit(self, body_bytes):
+        """Count a request; returns None if it is within the limits, else seconds to retry after
+
+        Limits are checked against the requests admitted in the last `window`
+        seconds, independently of the client's rate limiter, so a flaw in
+        it shows up as 429s.
+        """
+        tokens = body_bytes // 4
+        with self.lock:
+            now = time.monotonic()
+            while self.admitted and self.admitted[0][0] <= now - self.window:
+                self.admitted.popleft()
+            wait = 0.0
+            if self.rpm and len(self.admitted) >= self.rpm:
+                # Until enough of the oldest requests leave the window
+                wait = self.admitted[len(self.admitted) - self.rpm][0] + self.window - now
+            if self.tpm:
+                excess = sum(used for _, used in self.admitted) + min(tokens, self.tpm) - self.tpm
+                for admitted_at, used in self.admitted:
+                    if excess <= 0:
+                        break
+                    excess -= used
+                    wait = max(wait, admitted_at + self.window - now)
+            if wait > 0:
+                self.rejected += 1
+                return wait
+            self.admitted.append((now, tokens))
+            self.requests += 1
+            return None
+
+    def events(self, request):
+        """The reply as the stream events of the wire format, usage included"""
+        pieces = [self.reply[i:i + 4] for i in range(0, len(self.reply), 4)]
+        if self.wire_format == "openai":
+            for piece in pieces:
+                yield _sse({"choices": [{"index": 0, "delta": {"content": piece}}]})
+            yield _sse({"choices": [], "usage": {"completion_tokens": len(pieces)}})
+            yield _sse("[DONE]")
+        elif self.wire_format == "anthropic":
+            yield _sse({"type": "message_start", "message": {"role": "assistant", "content": []}}, "message_start")
+            yield _sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                       "content_block_start")
+            for piece in pieces:
+                yield _sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+                           "content_block_delta")
+            yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            yield _sse({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                        "usage": {"output_tokens": len(pieces)}}, "message_delta")
+            yield _sse({"type": "message_stop"}, "message_stop")
+        elif self.wire_format == "ollama":
+            # /api/chat streams message objects, /api/generate plain response text
+            key = "message" if "messages" in request else "response"
+            for piece in pieces:
+                content = {"role": "assistant", "content": piece} if key == "message" else piece
+                yield json.dumps({key: content, "done": False}) + "\n"
+            yield json.dumps({"done": True, "eval_count": len(pieces), "prompt_eval_count": 0,
+                              "prompt_eval_duration": 0, "load_duration": 0}) + "\n"
+        else:
+            for i, piece in enumerate(pieces):
+                event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+                if i == len(pieces) - 1:
+                    event["usageMetadata"] = {"candidatesTokenCount": len(pieces)}
+                yield _sse(event)
+
+    def __enter__(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cert_path, key_path = create_self_signed_cert(self.temp_dir)
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_path, key_path)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self.server.daemon_threads = True
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.server.standin = self
+        self.url = f"https://localhost:{self.server.server_address[1]}{WIRE_FORMAT_PATHS[self.wire_format]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
@@ -0,0 +1,119 @@
+import json
+import time
+
+class TokenStream:
+    """Token deltas of one conversion, with time-to-first-token and generation speed
+
+    Providers call delta() for every piece of streamed text and usage() with
+    the output token count a response reports. Without reported usage, each
+    delta counts as one token. Outputs served from the conversion cache go
+    through cached() and are not counted as generated tokens; requests that
+    had to be retried are counted by retried(). Streams of
+    concurrently converted chunks pass everything on to a parent stream
+    holding the totals of the conversion.
+    """
+    def __init__(self, listener=None, parent=None):
+        self.listener = listener  # Called with each text delta
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.last_token_at = None
+        self.deltas = 0
+        self.reported_tokens = 0
+        self.cache_hits = 0
+        self.retried_requests = 0
+        self.hedged_requests = 0
+        self.prompt_evals = []  # (prompt tokens evaluated, seconds) per request, where reported
+
+    @property
+    def root(self):
+        """Stream of the whole conversion this stream belongs to"""
+        return self.parent.root if self.parent else self
+
+    def delta(self, text):
+        if not text:
+            return
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.deltas += 1
+        if self.listener:
+            self.listener(text)
+        if self.parent:
+            self.parent.delta(text)
+
+    def cached(self, text):
+        """Show an output taken from the conversion cache"""
+        self.cache_hits += 1
+        if self.listener:
+            self.listener(text)
+        if self.parent:
+            self.parent.cached(text)
+
+    def retried(self):
+        """Count a request that failed and was retried"""
+        self.retried_requests += 1
+        if self.parent:
+            self.parent.retried()
+
+    def hedged(self):
+        """Count a request that was duplicated because it ran long"""
+        self.hedged_requests += 1
+        if self.parent:
+            self.parent.hedged()
+
+    def prompt_eval(self, tokens, seconds):
+        """Record how many prompt tokens a request evaluated (not served from cache) and how long it took"""
+        self.prompt_evals.append((tokens, seconds))
+        if self.parent:
+            self.parent.prompt_eval(tokens, seconds)
+
+    def usage(self, output_tokens):
+        if output_tokens:
+            self.reported_tokens += output_tokens
+        if self.parent:
+            self.parent.usage(output_tokens)
+
+    @property
+    def tokens(self):
+        return self.reported_tokens or self.deltas
+
+    @property
+    def time_to_first_token(self):
+        """Seconds from the start of the conversion to the first token, or None"""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def tokens_per_second(self):
+        """Generation speed after the first token, or None if too few tokens arrived"""
+        if self.first_token_at is None or self.last_token_at <= self.first_token_at:
+            return None
+        return self.tokens / (self.last_token_at - self.first_token_at)
+
+    def describe(self):
+        parts = []
+        if self.time_to_first_token is not None:
+            parts.append(f"first token after {self.time_to_first_token:.1f}s")
+            if self.tokens_per_second is not None:
+                parts.append(f"{self.tokens_per_second:.1f} tokens/s")
+        if self.cache_hits:
+            parts.append(f"{self.cache_hits} from cache")
+        if self.retried_requests:
+            parts.append(f"{self.retried_requests} retried")
+        if self.hedged_requests:
+            parts.append(f"{self.hedged_requests} hedged")
+        return ", ".join(parts) or "no tokens received"
+
+async def iter_sse(response):
+    """Yield the JSON payloads of a server-sent events response until [DONE]"""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
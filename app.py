@@ -4,12 +4,18 @@ import os
 import threading
 import time
 import shutil
+from datetime import datetime
 
 # Import custom modules
 from config.settings import Settings
 from audio.recorder import AudioRecorder
 from audio.transcriber import Transcriber
+from audio.cancellation import CancellationToken
+from audio.model_store import ModelStore
+from audio.segments import SegmentStore
+from audio.realtime import RealtimeSession
 from api.api_handler import APIHandler
+from api.context import CONTEXT_STRATEGIES
 from utils.ollama_manager import OllamaManager
 from ui.recording_tab import RecordingTab
 from ui.settings_tab import SettingsTab
@@ -25,7 +31,14 @@ class SpeechToLatexApp:
         
         # Initialize components
         self.recorder = AudioRecorder(sample_rate=self.settings.sample_rate)
-        self.transcriber = Transcriber(model_name=self.settings.whisper_model_name, transcription_method=self.settings.transcription_method)
+        self.transcriber = Transcriber(model_name=self.settings.whisper_model_name, transcription_method=self.settings.transcription_method,
+                                       batch_size=self.settings.whisper_batch_size,
+                                       language=self.settings.transcription_language or None,
+                                       vocabulary=self.settings.transcription_vocabulary)
+        self.transcriber.state_callback = self.on_transcriber_state_change
+        self.model_store = ModelStore(self.settings.app_dir)
+        self.transcriber.model_store = self.model_store
+        self.transcriber.checkpoint_dir = os.path.join(self.settings.app_dir, "transcription_checkpoints")
         self.api_handler = APIHandler(self.settings)
         self.ollama_manager = OllamaManager(base_url=self.settings.ollama_base_url)
         
@@ -33,7 +46,11 @@ class SpeechToLatexApp:
         self.is_recording = False
         self.audio_thread = None
         self.timer_id = None
+        self.transcription_token = None  # CancellationToken of the running transcription
+        self.realtime_session = None  # RealtimeSession streaming the current recording
         self.ollama_models = []
+        self.segments = None  # SegmentStore of the current transcript
+        self.segments_file = os.path.join(self.settings.app_dir, "last_transcript_segments.npz")
         
         # Create StringVar for UI components
         self.status_var = tk.StringVar(value="Ready")
@@ -45,6 +62,9 @@ class SpeechToLatexApp:
         # Create GUI
         self.create_gui()
         
+        # Restore the last transcript with its segments
+        self.load_segments()
+        
         # Check Ollama status
         self.check_ollama_status()
         
@@ -55,12 +75,22 @@ class SpeechToLatexApp:
         # Load available Ollama models (on a delay to allow server to start)
         self.root.after(3000, self.load_ollama_models)
         
+        # Load the selected Ollama model into memory so the first conversion starts warm
+        if self.settings.ollama_preload and self.settings.ollama_model_name:
+            self.root.after(3500, self._preload_ollama_at_startup)
+        
         # Load transcription model/client in a separate thread to avoid blocking the GUI
-        self.root.after(500, lambda: threading.Thread(
-            target=self.load_whisper_model, 
-            args=(self.settings.whisper_model_name, self.settings.transcription_method), 
-            daemon=True
-        ).start())
+        if self.settings.preload_whisper:
+            self.root.after(500, lambda: threading.Thread(
+                target=self.load_whisper_model, 
+                args=(self.settings.whisper_model_name, self.settings.transcription_method), 
+                daemon=True
+            ).start())
+        
+        # Keep selected Whisper checkpoints downloaded for offline use
+        self.refresh_whisper_models()
+        if self.settings.prefetch_whisper_models:
+            self.model_store.prefetch(self.settings.prefetch_whisper_models, self._whisper_prefetch_callback)
         
         # Register window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -102,6 +132,10 @@ class SpeechToLatexApp:
         
         self.status_var.set("Recording...")
         
+        self.update_settings_from_ui()
+        if self.settings.realtime_transcription:
+            self.start_realtime_session()
+        
         # Start recording using the recorder
         self.recorder.start_recording()
     
@@ -112,6 +146,9 @@ class SpeechToLatexApp:
         
         # Stop recording
         self.recorder.stop_recording()
+        self.recorder.chunk_listener = None
+        if self.realtime_session is not None:
+            self.finish_realtime_session()
         
         # Periodically check if recording has stopped
         self.root.after(100, self._check_recording_stopped)
@@ -129,6 +166,53 @@ class SpeechToLatexApp:
             # Still waiting for recording to complete
             self.root.after(100, self._check_recording_stopped)
     
+    def start_realtime_session(self):
+        """Stream the recording to the realtime endpoint and show the transcript live"""
+        url = self.settings.realtime_url
+        api_key = None
+        if "openai.com" in url and "OpenAI" in self.settings_tab.api_key_vars:
+            api_key = self.settings_tab.api_key_vars["OpenAI"].get()
+        
+        def error_callback(message):
+            self.root.after(0, lambda: self.status_var.set(message))
+        
+        session = RealtimeSession(url, api_key=api_key, model=self.transcriber.openai_model,
+                                  language=self.transcriber.language, prompt=self.transcriber.initial_prompt(),
+                                  sample_rate=self.recorder.sample_rate,
+                                  partial_callback=self.latest_only(self.show_partial_transcript),
+                                  error_callback=error_callback)
+        self.realtime_session = session
+        self.recording_tab.set_transcribed_text("")
+        
+        # Audio is queued until the connection is up, so recording can start right away
+        self.recorder.chunk_listener = session.send_audio
+        
+        def connect_thread():
+            try:
+                session.start()
+                self.root.after(0, lambda: self.status_var.set("Recording (live transcription)..."))
+            except Exception as e:
+                error_callback(f"Realtime transcription unavailable: {str(e)}")
+                self.recorder.chunk_listener = None
+                session.finished.set()
+        
+        threading.Thread(target=connect_thread, daemon=True).start()
+    
+    def finish_realtime_session(self):
+        """Wait for the last final transcript of the realtime session in the background"""
+        session = self.realtime_session
+        self.realtime_session = None
+        
+        def finish_thread():
+            text = session.stop()
+            def update_ui():
+                if text:
+                    self.show_partial_transcript(text)
+                    self.status_var.set("Live transcription complete")
+            self.root.after(0, update_ui)
+        
+        threading.Thread(target=finish_thread, daemon=True).start()
+    
     # Whisper Transcription Functions
     def transcribe_audio(self):
         if not os.path.exists(self.recorder.temp_audio_file):
@@ -138,19 +222,48 @@ class SpeechToLatexApp:
         # Check if the appropriate model/client is loaded based on transcription method
         transcription_method = self.settings_tab.transcription_method_var.get() if hasattr(self.settings_tab, 'transcription_method_var') else self.settings.transcription_method
         
-        if transcription_method == "whisper" and self.transcriber.whisper_model is None:
-            messagebox.showerror("Error", "Whisper model not loaded yet")
-            return
-        elif transcription_method == "openai" and self.transcriber.openai_client is None:
-            messagebox.showerror("Error", "OpenAI client not initialized")
+        backend = self.transcriber.get_backend(transcription_method)
+        
+        if self.transcriber.model_state in ("loading", "warming"):
+            messagebox.showinfo("Transcription", "The transcription model is still loading. Please try again in a moment.")
             return
         
-        self.status_var.set(f"Transcribing audio using {transcription_method.capitalize()}...")
+        # transcribe() loads a backend that is not loaded yet, with the current method and API key
+        self.transcriber.transcription_method = transcription_method
+        if backend.requires_api_key and "OpenAI" in self.settings_tab.api_key_vars:
+            self.transcriber.openai_api_key = self.settings_tab.api_key_vars["OpenAI"].get()
+        
+        if not backend.is_loaded and not backend.offline:
+            self.status_var.set(f"Connecting to {backend.label} and transcribing...")
+        elif not backend.is_loaded:
+            # Not preloaded at startup, or released after a cancelled job; transcribe() loads it
+            self.status_var.set(f"Loading {backend.label} {self.transcriber.whisper_model_name} model and transcribing...")
+        else:
+            self.status_var.set(f"Transcribing audio using {backend.label}...")
         self.recording_tab.update_progress(0)
         
+        # Pick up per-session language and vocabulary from the settings tab
+        self.update_settings_from_ui()
+        
+        deadline_minutes = self.settings_tab.transcription_deadline_var.get()
+        token = CancellationToken(deadline_minutes * 60 if deadline_minutes > 0 else None)
+        self.transcription_token = token
+        self.recording_tab.update_transcribe_button(tk.DISABLED)
+        self.recording_tab.update_cancel_button(tk.NORMAL)
+        
         # Define callback for transcription updates
         def transcription_callback(success, message, text):
-            if success:
+            self.recording_tab.update_loading_label("")
+            self.recording_tab.update_cancel_button(tk.DISABLED)
+            self.recording_tab.update_transcribe_button(tk.NORMAL)
+            self.transcription_token = None
+            if token.is_cancelled:
+                # User-initiated cancellation is not an error
+                self.recording_tab.update_progress(0)
+                self.status_var.set(message)
+            elif success:
+                self.segments = self.transcriber.segments
+                self.save_segments()
                 self.recording_tab.set_transcribed_text(text)
                 self.recording_tab.update_progress(100)
                 self.recording_tab.convert_button.config(state=tk.NORMAL)
@@ -159,8 +272,78 @@ class SpeechToLatexApp:
                 self.status_var.set(message)
                 messagebox.showerror("Transcription Error", message)
         
+        # Progress events arrive on the transcription thread, so hand them to the Tk loop
+        def progress_callback(event):
+            def update_ui():
+                self.recording_tab.update_progress(event.percent)
+                self.recording_tab.update_loading_label(event.describe())
+            self.root.after(0, update_ui)
+        
+        # Partial transcripts can arrive per token, so only the latest one is drawn on each Tk pass
+        def show_partial(text):
+            if self.transcription_token is not token:
+                return  # The job already finished and drew the final text
+            self.show_partial_transcript(text)
+        partial_callback = self.latest_only(show_partial)
+        
         # Run transcription asynchronously with callback
-        self.transcriber.transcribe_async(transcription_callback)
+        self.transcriber.transcribe_async(transcription_callback, progress_callback, token, partial_callback)
+    
+    def latest_only(self, update):
+        """Wrap update so calls from worker threads run on the Tk loop, skipping superseded values"""
+        lock = threading.Lock()
+        latest = []
+        
+        def run():
+            with lock:
+                value = latest.pop()
+            update(value)
+        
+        def schedule(value):
+            with lock:
+                scheduled = bool(latest)
+                latest[:] = [value]
+            if not scheduled:
+                self.root.after(0, run)
+        return schedule
+    
+    def show_partial_transcript(self, text):
+        self.recording_tab.set_transcribed_text(text)
+        self.recording_tab.transcribed_text.see("end")
+        # Early text can already be converted while the rest is transcribed
+        self.recording_tab.convert_button.config(state=tk.NORMAL)
+    
+    def cancel_transcription(self):
+        """Ask the running transcription job to stop at the next window/chunk"""
+        if self.transcription_token is not None:
+            self.transcription_token.cancel()
+            self.recording_tab.update_cancel_button(tk.DISABLED)
+            self.status_var.set("Cancelling transcription...")
+    
+    def save_segments(self):
+        """Persist the current transcript segments so they survive the session"""
+        if self.segments is None or len(self.segments) == 0:
+            return
+        try:
+            self.segments.save(self.segments_file)
+        except Exception as e:
+            print(f"Error saving transcript segments: {e}")
+    
+    def load_segments(self):
+        """Restore the transcript segments saved by the previous session, if any"""
+        if not os.path.exists(self.segments_file):
+            return
+        try:
+            segments = SegmentStore.load(self.segments_file)
+        except Exception as e:
+            print(f"Error loading transcript segments: {e}")
+            return
+        if len(segments) == 0:
+            return
+        self.segments = segments
+        self.recording_tab.set_transcribed_text(segments.text())
+        self.recording_tab.convert_button.config(state=tk.NORMAL)
+        self.status_var.set("Restored the last transcript")
     
     def load_whisper_model(self, model_name, transcription_method=None):
         # If transcription_method is not provided, get it from UI or settings
@@ -172,16 +355,101 @@ class SpeechToLatexApp:
         if transcription_method == "openai" and hasattr(self.settings_tab, 'api_key_vars') and "OpenAI" in self.settings_tab.api_key_vars:
             api_key = self.settings_tab.api_key_vars["OpenAI"].get()
         
-        success, message = self.transcriber.load_model(model_name, transcription_method, api_key)
+        warm_up = self.settings_tab.warmup_whisper_var.get()
+        success, message = self.transcriber.load_model(model_name, transcription_method, api_key, warm_up=warm_up)
         self.root.after(0, lambda: self.status_var.set(message))
         if not success:
             self.root.after(0, lambda: messagebox.showerror("Transcription Error", message))
     
+    def on_transcriber_state_change(self, state):
+        """Show transcription model readiness next to the Transcribe button"""
+        labels = {
+            "unloaded": "Model: not loaded",
+            "loading": "Model: loading...",
+            "warming": "Model: warming up...",
+            "ready": "Model: ready",
+            "error": "Model: failed to load"
+        }
+        self.root.after(0, lambda: self.recording_tab.update_model_status(labels.get(state, state)))
+    
     def change_whisper_model(self, event=None):
         model_name = self.settings_tab.whisper_model_var.get()
         transcription_method = self.settings_tab.transcription_method_var.get()
         threading.Thread(target=self.load_whisper_model, args=(model_name, transcription_method), daemon=True).start()
     
+    # Whisper Checkpoint Store Functions
+    def refresh_whisper_models(self):
+        """Show installed checkpoints with size on disk and last load time"""
+        rows = []
+        for name in self.model_store.available_models():
+            if name in self.model_store.downloads:
+                status = "Downloading"
+            elif self.model_store.is_installed(name):
+                status = "Installed"
+            else:
+                status = "Not downloaded"
+            size = self.model_store.size_on_disk(name)
+            size_text = f"{size / 1024 / 1024:.0f} MB" if size else ""
+            load_time = self.model_store.load_time(name)
+            load_time_text = f"{load_time:.1f}s" if load_time is not None else ""
+            rows.append((name, status, size_text, load_time_text))
+        self.settings_tab.populate_whisper_model_tree(rows)
+    
+    def verify_whisper_models(self):
+        """Verify SHA256 of the selected checkpoints in the background"""
+        names = self.settings_tab.get_selected_whisper_models()
+        if not names:
+            messagebox.showinfo("Whisper Models", "Please select one or more models first")
+            return
+        
+        def verify_thread():
+            results = []
+            for name in names:
+                self.root.after(0, lambda name=name: self.settings_tab.whisper_store_status_var.set(f"Verifying {name}..."))
+                results.append(f"{name}: {'OK' if self.model_store.verify(name, force=True) else 'FAILED'}")
+            self.root.after(0, lambda: self.settings_tab.whisper_store_status_var.set("; ".join(results)))
+        
+        threading.Thread(target=verify_thread, daemon=True).start()
+    
+    def prefetch_whisper_models(self):
+        """Download the selected checkpoints and keep them prefetched on future launches"""
+        names = self.settings_tab.get_selected_whisper_models()
+        if not names:
+            messagebox.showinfo("Whisper Models", "Please select one or more models first")
+            return
+        
+        for name in names:
+            if name not in self.settings.prefetch_whisper_models:
+                self.settings.prefetch_whisper_models.append(name)
+        self.settings_tab.whisper_download_progress_var.set(0)
+        self.model_store.prefetch(names, self._whisper_prefetch_callback)
+        self.root.after(200, self.refresh_whisper_models)
+    
+    def _whisper_prefetch_callback(self, success, message, progress=None, in_progress=False):
+        def update_ui():
+            self.settings_tab.whisper_store_status_var.set(message)
+            if progress is not None:
+                self.settings_tab.whisper_download_progress_var.set(progress)
+            if not in_progress:
+                self.refresh_whisper_models()
+        self.root.after(0, update_ui)
+    
+    def delete_whisper_models(self):
+        """Delete the selected checkpoints from disk"""
+        names = self.settings_tab.get_selected_whisper_models()
+        if not names:
+            messagebox.showinfo("Whisper Models", "Please select one or more models first")
+            return
+        
+        if not messagebox.askyesno("Delete Models", f"Delete {', '.join(names)} from disk?"):
+            return
+        
+        for name in names:
+            self.model_store.delete(name)
+            if name in self.settings.prefetch_whisper_models:
+                self.settings.prefetch_whisper_models.remove(name)
+        self.refresh_whisper_models()
+    
     # LaTeX Conversion Functions
     def convert_to_latex(self):
         text = self.recording_tab.get_transcribed_text()
@@ -237,6 +505,8 @@ class SpeechToLatexApp:
                     # Conversion complete
                     self.recording_tab.save_button.config(state=tk.NORMAL)
                     self.status_var.set(message)
+                    self.settings_tab.llm_cache_stats_var.set(self.api_handler.cache.describe())
+                    self.settings_tab.request_metrics_var.set(self.api_handler.describe_resilience())
                     # Stop timer
                     if self.timer_id:
                         self.root.after_cancel(self.timer_id)
@@ -245,7 +515,12 @@ class SpeechToLatexApp:
                     # Still in progress
                     self.status_var.set(message)
             else:
+                # Keep the chunks converted before the failure, without the chunk that was streaming
+                if text is not None:
+                    self.recording_tab.set_latex_text(text)
+                    self.recording_tab.save_button.config(state=tk.NORMAL)
                 self.status_var.set(message)
+                self.settings_tab.request_metrics_var.set(self.api_handler.describe_resilience())
                 messagebox.showerror("Conversion Error", message)
                 # Stop timer
                 if self.timer_id:
@@ -255,8 +530,17 @@ class SpeechToLatexApp:
         # Save current settings to API handler
         self.update_settings_from_ui()
         
+        # Token deltas arrive on the API thread, so only the latest update is drawn on each Tk pass
+        conversion_update = self.latest_only(lambda update: conversion_callback(*update))
+        
         # Run conversion asynchronously with callback
-        self.api_handler.convert_text(text, conversion_callback)
+        self.api_handler.convert_text(text, lambda *update: conversion_update(update), segments=self.segments)
+    
+    def clear_llm_cache(self):
+        """Remove all cached LLM outputs"""
+        self.api_handler.cache.clear()
+        self.settings_tab.llm_cache_stats_var.set(self.api_handler.cache.describe())
+        self.status_var.set("LLM response cache cleared")
     
     def save_latex(self):
         latex_text = self.recording_tab.get_latex_text()
@@ -281,6 +565,9 @@ class SpeechToLatexApp:
     
     def clear_all(self):
         self.recording_tab.clear_text_areas()
+        self.segments = None
+        if os.path.exists(self.segments_file):
+            os.remove(self.segments_file)
         self.recording_tab.update_progress(0)
         self.recording_tab.update_transcribe_button(tk.DISABLED)
         self.recording_tab.convert_button.config(state=tk.DISABLED)
@@ -414,6 +701,76 @@ class SpeechToLatexApp:
         
         self.settings_tab.ollama_model_var.set(selected_model)
         messagebox.showinfo("Model Selection", f"Model '{selected_model}' selected for use")
+        
+        if self.settings_tab.ollama_preload_var.get():
+            self.preload_ollama_model()
+    
+    def _preload_ollama_at_startup(self):
+        if self.ollama_manager.is_ollama_running():
+            self.preload_ollama_model()
+    
+    def refresh_resident_models(self):
+        """Show models loaded in Ollama's memory with their size and unload time"""
+        # Query Ollama off the Tk thread so a slow server does not freeze the window
+        def query():
+            success, message, models = self.ollama_manager.running_models()
+            self.root.after(0, lambda: self._show_resident_models(success, message, models))
+        threading.Thread(target=query, daemon=True).start()
+    
+    def _show_resident_models(self, success, message, models):
+        if not success:
+            self.status_var.set(message)
+            return
+        
+        rows = []
+        for model in models:
+            size = model.get("size", 0)
+            gpu_share = model.get("size_vram", 0) / size if size else 0
+            expires_at = model.get("expires_at", "")
+            try:
+                until = datetime.fromisoformat(expires_at).astimezone().strftime("%H:%M")
+            except ValueError:
+                until = expires_at
+            rows.append((model["name"], f"{size / 1024 ** 3:.1f} GB", f"{gpu_share:.0%}", until))
+        self.settings_tab.populate_resident_model_tree(rows)
+    
+    def preload_ollama_model(self):
+        """Load the selected Ollama model into memory for the configured keep-alive time"""
+        model = self.settings_tab.ollama_model_var.get()
+        if not model:
+            self.status_var.set("Select an Ollama model to load")
+            return
+        
+        self.settings.ollama_keep_alive = self.settings_tab.ollama_keep_alive_var.get().strip() or "30m"
+        self.settings.ollama_num_ctx = self.settings_tab.ollama_num_ctx_var.get()
+        
+        def preload_callback(success, message, in_progress=False):
+            def update_ui():
+                self.status_var.set(message)
+                if not in_progress:
+                    self.refresh_resident_models()
+            self.root.after(0, update_ui)
+        
+        self.ollama_manager.preload_model(model, self.settings.ollama_keep_alive, preload_callback,
+                                          unload_others=self.settings_tab.ollama_unload_unused_var.get(),
+                                          num_ctx=self.settings.ollama_num_ctx)
+    
+    def unload_ollama_models(self):
+        """Unload the models selected in the loaded models table"""
+        models = self.settings_tab.get_selected_resident_models()
+        if not models:
+            messagebox.showinfo("Unload Models", "Please select a loaded model first")
+            return
+        
+        def unload():
+            messages = [self.ollama_manager.unload_model(model)[1] for model in models]
+            def update_ui():
+                self.status_var.set("; ".join(messages))
+                self.refresh_resident_models()
+            self.root.after(0, update_ui)
+        
+        self.status_var.set(f"Unloading {', '.join(models)}...")
+        threading.Thread(target=unload, daemon=True).start()
     
     def download_model(self):
         """Download a new Ollama model"""
@@ -482,8 +839,23 @@ class SpeechToLatexApp:
         self.settings.whisper_model_name = self.settings_tab.whisper_model_var.get()
         self.settings.ollama_base_url = self.settings_tab.ollama_url_var.get()
         self.settings.auto_start_ollama = self.settings_tab.auto_start_ollama_var.get()
+        self.settings.ollama_keep_alive = self.settings_tab.ollama_keep_alive_var.get().strip() or "30m"
+        self.settings.ollama_preload = self.settings_tab.ollama_preload_var.get()
+        self.settings.ollama_unload_unused = self.settings_tab.ollama_unload_unused_var.get()
+        self.settings.ollama_chat_context = self.settings_tab.ollama_chat_context_var.get()
+        self.settings.ollama_num_ctx = self.settings_tab.ollama_num_ctx_var.get()
         self.settings.sample_rate = self.settings_tab.sample_rate_var.get()
         self.settings.system_prompt = self.settings_tab.system_prompt_var.get()
+        self.settings.whisper_batch_size = self.settings_tab.whisper_batch_size_var.get()
+        self.settings.transcription_deadline_minutes = self.settings_tab.transcription_deadline_var.get()
+        self.settings.preload_whisper = self.settings_tab.preload_whisper_var.get()
+        self.settings.warmup_whisper = self.settings_tab.warmup_whisper_var.get()
+        language = self.settings_tab.transcription_language_var.get().strip()
+        self.settings.transcription_language = "" if language == "auto" else language
+        vocabulary = self.settings_tab.transcription_vocabulary_var.get()
+        self.settings.transcription_vocabulary = [term.strip() for term in vocabulary.split(",") if term.strip()]
+        self.settings.realtime_transcription = self.settings_tab.realtime_transcription_var.get()
+        self.settings.realtime_url = self.settings_tab.realtime_url_var.get().strip()
         
         # Update transcription method
         if hasattr(self.settings_tab, 'transcription_method_var'):
@@ -493,13 +865,39 @@ class SpeechToLatexApp:
         if hasattr(self.settings_tab, 'openai_transcription_model_var'):
             self.settings.selected_openai_transcription_model = self.settings_tab.openai_transcription_model_var.get()
         
+        # Update chunk context settings
+        for strategy, label in CONTEXT_STRATEGIES.items():
+            if label == self.settings_tab.context_strategy_var.get():
+                self.settings.context_strategy = strategy
+        self.settings.context_chunks = self.settings_tab.context_chunks_var.get()
+        self.settings.context_token_budget = self.settings_tab.context_token_budget_var.get()
+        self.settings.parallel_conversion = self.settings_tab.parallel_conversion_var.get()
+        self.settings.gemini_single_request_tokens = self.settings_tab.gemini_single_request_tokens_var.get()
+        
+        # Update LLM output cache settings
+        self.settings.llm_cache_enabled = self.settings_tab.llm_cache_enabled_var.get()
+        self.settings.llm_cache_max_mb = self.settings_tab.llm_cache_max_mb_var.get()
+        self.settings.llm_cache_ttl_days = self.settings_tab.llm_cache_ttl_days_var.get()
+        self.settings.max_retries = self.settings_tab.max_retries_var.get()
+        self.settings.breaker_failure_threshold = self.settings_tab.breaker_failure_threshold_var.get()
+        self.settings.hedging_enabled = self.settings_tab.hedging_enabled_var.get()
+        fallback_provider = self.settings_tab.hedge_fallback_provider_var.get()
+        self.settings.hedge_fallback_provider = "" if fallback_provider == "Same provider" else fallback_provider
+        self.settings.hedge_budget_percent = self.settings_tab.hedge_budget_percent_var.get()
+        self.settings.conversion_deadline_minutes = self.settings_tab.conversion_deadline_minutes_var.get()
+        
         # Update API settings
         self.settings.selected_provider = self.settings_tab.api_provider_var.get()
         self.settings.selected_prompt_mode = self.selected_prompt_mode.get()
         
         # Update component settings
         self.recorder.sample_rate = self.settings.sample_rate
+        self.transcriber.whisper_batch_size = self.settings.whisper_batch_size
+        self.transcriber.language = self.settings.transcription_language or None
+        self.transcriber.vocabulary = self.settings.transcription_vocabulary
         self.ollama_manager.ollama_base_url = self.settings.ollama_base_url
+        self.api_handler.cache.max_bytes = self.settings.llm_cache_max_mb * 1024 * 1024
+        self.api_handler.cache.ttl_seconds = self.settings.llm_cache_ttl_days * 24 * 3600
         
         # Update API keys
         for provider, key_var in self.settings_tab.api_key_vars.items():
@@ -544,4 +942,7 @@ class SpeechToLatexApp:
         # Clean up audio recorder
         self.recorder.clean_up()
         
+        # Close pooled API connections
+        self.api_handler.close()
+        
         self.root.destroy()
\ No newline at end of file
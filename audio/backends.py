@@ -0,0 +1,562 @@
+import gc
+import os
+import tempfile
+import time
+import wave
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_FFT, HOP_LENGTH, N_SAMPLES, SAMPLE_RATE, mel_filters
+from whisper.tokenizer import get_tokenizer
+from openai import OpenAI
+from pydub import AudioSegment
+
+from audio.segments import Segment, SegmentStore
+from audio.checkpoints import TranscriptionCheckpoint
+from audio.progress import ProgressReporter, whisper_progress
+
+try:
+    from faster_whisper import WhisperModel as FasterWhisperModel
+except ImportError:
+    FasterWhisperModel = None
+
+# Seconds per Whisper timestamp token
+TIMESTAMP_PRECISION = 0.02
+
+# Registered backend classes by name (the value stored in Settings.transcription_method)
+BACKENDS = {}
+
+def register_backend(cls):
+    """Class decorator adding a backend to the registry"""
+    BACKENDS[cls.name] = cls
+    return cls
+
+def available_backends():
+    """Names of registered backends whose dependencies are installed"""
+    return [name for name, cls in BACKENDS.items() if cls.is_available()]
+
+def get_backend_class(name):
+    """Look up a registered backend, raising ValueError if it is unknown or not installed"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription method: {name}")
+    if not BACKENDS[name].is_available():
+        raise ValueError(f"{BACKENDS[name].label} is not installed")
+    return BACKENDS[name]
+
+class TranscriptionBackend:
+    """Common interface for transcription engines
+    
+    A backend is created for a Transcriber and reads its configuration (model
+    name, language, vocabulary, API key, ...) from it, so settings changes apply
+    without recreating the backend.
+    
+    Capability flags describe what the engine supports:
+      streaming          segments are yielded while decoding, not only at the end
+      word_timestamps    segments may carry word-level timestamps
+      supports_language  a pinned language is honored
+      supports_prompt    the vocabulary prompt is honored
+      offline            runs without network access
+      requires_api_key   needs Transcriber.openai_api_key
+    """
+    name = ""
+    label = ""
+    streaming = False
+    word_timestamps = False
+    supports_language = False
+    supports_prompt = False
+    offline = True
+    requires_api_key = False
+    
+    def __init__(self, transcriber):
+        self.transcriber = transcriber
+    
+    @classmethod
+    def is_available(cls):
+        """Whether the engine's optional dependencies are installed"""
+        return True
+    
+    @property
+    def is_loaded(self):
+        raise NotImplementedError
+    
+    def load(self, warm_up=False):
+        """Load the model or client; raise on failure"""
+        raise NotImplementedError
+    
+    def unload(self):
+        """Release the model or client"""
+        pass
+    
+    def warm_up(self):
+        """Run a short inference so the first real job skips lazy initialization"""
+        pass
+    
+    def stream(self, audio_path, progress_callback=None, cancel_token=None, status_callback=None,
+               text_callback=None):
+        """Transcribe audio_path, yielding (Segment, words) pairs in time order
+        
+        words is a list of (start, end, word) tuples, empty if unavailable.
+        progress_callback receives ProgressEvents, status_callback short status
+        messages, and cancel_token is checked between units of work. Engines
+        that stream partial text pass each text delta to text_callback before
+        the segment containing it is yielded.
+        """
+        raise NotImplementedError
+
+@register_backend
+class WhisperBackend(TranscriptionBackend):
+    """Local openai-whisper, optionally decoding 30-second windows in batches"""
+    name = "whisper"
+    label = "Local Whisper"
+    supports_language = True
+    supports_prompt = True
+    # No word_timestamps: they would need whisper's extra alignment pass, which the batched path lacks
+    
+    def __init__(self, transcriber):
+        super().__init__(transcriber)
+        self.model = None
+    
+    @property
+    def streaming(self):
+        # The batched path yields segments after every batch
+        return self.transcriber.whisper_batch_size > 1
+    
+    @property
+    def is_loaded(self):
+        return self.model is not None
+    
+    def load(self, warm_up=False):
+        name = self.transcriber.whisper_model_name
+        store = self.transcriber.model_store
+        if store is None:
+            self.model = whisper.load_model(name)
+        else:
+            start_time = time.perf_counter()
+            path = store.model_path(name)
+            if path:
+                # Load the verified local checkpoint directly, skipping whisper's own re-hash
+                self.model = whisper.load_model(path)
+                if name in whisper._ALIGNMENT_HEADS:
+                    self.model.set_alignment_heads(whisper._ALIGNMENT_HEADS[name])
+            else:
+                # Not cached yet: let whisper download into the store
+                self.model = whisper.load_model(name, download_root=store.root)
+            store.record_load_time(name, time.perf_counter() - start_time)
+        if warm_up:
+            self.transcriber._set_state("warming")
+            self.warm_up()
+    
+    def unload(self):
+        self.model = None
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    
+    def warm_up(self):
+        """Run a short inference on one second of silence
+        
+        This triggers lazy kernel selection and allocator growth up front, using
+        the same decoding path that real transcriptions will take.
+        """
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        if self.transcriber.whisper_batch_size > 1:
+            windows, _ = self.split_windows(silence)
+            self.decode_windows(windows)
+        else:
+            self.model.transcribe(silence, **self._transcribe_options())
+    
+    def stream(self, audio_path, progress_callback=None, cancel_token=None, status_callback=None,
+               text_callback=None):
+        audio = whisper.load_audio(audio_path)
+        reporter = ProgressReporter(len(audio) / SAMPLE_RATE, progress_callback)
+        if self.transcriber.whisper_batch_size > 1:
+            # Decode fixed 30-second windows in batches
+            windows, spans = self.split_windows(audio)
+            tokenizer = self._get_tokenizer()
+            batch_size = self.transcriber.whisper_batch_size
+            for start in range(0, len(windows), batch_size):
+                batch_spans = spans[start:start + batch_size]
+                results = self.decode_windows(windows[start:start + batch_size], batch_spans, reporter, cancel_token)
+                for result, (offset, duration) in zip(results, batch_spans):
+                    yield from self.window_segments(result, tokenizer, offset, duration)
+        else:
+            with whisper_progress(reporter, cancel_token):
+                result = self.model.transcribe(audio, **self._transcribe_options())
+            store = SegmentStore()
+            store.add_whisper_segments(result["segments"])
+            for i, segment in enumerate(store):
+                yield segment, [(w.start, w.end, w.word) for w in store.words_for(i)]
+        reporter.finish()
+    
+    def _transcribe_options(self):
+        """Keyword arguments for whisper's transcribe()
+        
+        A pinned language skips the detection pass on the first window, and the
+        vocabulary prompt biases decoding toward domain terms.
+        """
+        options = {}
+        if self.transcriber.language:
+            options["language"] = self.transcriber.language
+        prompt = self.transcriber.initial_prompt()
+        if prompt:
+            options["initial_prompt"] = prompt
+        return options
+    
+    def split_windows(self, audio):
+        """Split a 16 kHz waveform into padded 30-second windows
+        
+        Returns the windows and an (offset, duration) pair in seconds for each.
+        """
+        windows = []
+        spans = []
+        for start in range(0, len(audio), N_SAMPLES):
+            window = audio[start:start + N_SAMPLES]
+            windows.append(whisper.pad_or_trim(window))
+            spans.append((start / SAMPLE_RATE, len(window) / SAMPLE_RATE))
+        return windows, spans
+    
+    def decode_windows(self, windows, spans=None, reporter=None, cancel_token=None):
+        """Run the encoder/decoder on batches of windows and return one DecodingResult per window
+        
+        If a reporter is given, it is advanced by the duration of each decoded batch;
+        cancel_token is checked before each batch.
+        """
+        model = self.model
+        batch_size = max(1, self.transcriber.whisper_batch_size)
+        options = whisper.DecodingOptions(
+            fp16=model.device.type != "cpu",
+            language=self.transcriber.language or None,
+            prompt=self.transcriber.initial_prompt()
+        )
+        
+        results = []
+        for start in range(0, len(windows), batch_size):
+            if cancel_token is not None:
+                cancel_token.check()
+            batch = torch.from_numpy(np.stack(windows[start:start + batch_size])).to(model.device)
+            mel = self._log_mel_batch(batch, model.dims.n_mels)
+            results.extend(whisper.decode(model, mel, options))
+            if reporter is not None and spans is not None:
+                reporter.advance(sum(duration for _, duration in spans[start:start + batch_size]))
+        return results
+    
+    def _get_tokenizer(self):
+        model = self.model
+        return get_tokenizer(model.is_multilingual, num_languages=model.num_languages, task="transcribe")
+    
+    def window_segments(self, result, tokenizer, offset, duration):
+        """Split a window's decoded tokens into segments using its timestamp tokens"""
+        timestamp_begin = tokenizer.timestamp_begin
+        segment_start = None
+        text_tokens = []
+        for token in result.tokens:
+            if token >= timestamp_begin:
+                seconds = min((token - timestamp_begin) * TIMESTAMP_PRECISION, duration)
+                if text_tokens:
+                    yield Segment(offset + (segment_start or 0.0), offset + seconds, tokenizer.decode(text_tokens)), []
+                    segment_start = None
+                    text_tokens = []
+                else:
+                    segment_start = seconds
+            elif token < tokenizer.eot:
+                text_tokens.append(token)
+        
+        # Text after the last timestamp runs to the end of the window
+        if text_tokens:
+            yield Segment(offset + (segment_start or 0.0), offset + duration, tokenizer.decode(text_tokens)), []
+    
+    def _log_mel_batch(self, audio, n_mels):
+        """Compute log-mel spectrograms for a (batch, samples) tensor in one pass
+        
+        Mirrors whisper.log_mel_spectrogram, but normalizes every window against its
+        own maximum so results match the unbatched path.
+        """
+        window = torch.hann_window(N_FFT).to(audio.device)
+        stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+        magnitudes = stft[..., :-1].abs() ** 2
+        
+        mel_spec = mel_filters(audio.device, n_mels) @ magnitudes
+        
+        log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+        log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+@register_backend
+class FasterWhisperBackend(TranscriptionBackend):
+    """CTranslate2-based faster-whisper engine (used only if the package is installed)"""
+    name = "faster-whisper"
+    label = "Faster Whisper"
+    streaming = True
+    supports_language = True
+    supports_prompt = True
+    
+    def __init__(self, transcriber):
+        super().__init__(transcriber)
+        self.model = None
+    
+    @classmethod
+    def is_available(cls):
+        return FasterWhisperModel is not None
+    
+    @property
+    def is_loaded(self):
+        return self.model is not None
+    
+    def load(self, warm_up=False):
+        # int8 keeps memory low and is the fastest CPU compute type
+        self.model = FasterWhisperModel(self.transcriber.whisper_model_name, device="auto", compute_type="int8")
+        if warm_up:
+            self.transcriber._set_state("warming")
+            self.warm_up()
+    
+    def unload(self):
+        self.model = None
+        gc.collect()
+    
+    def warm_up(self):
+        segments, _ = self.model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), **self._transcribe_options())
+        list(segments)
+    
+    def stream(self, audio_path, progress_callback=None, cancel_token=None, status_callback=None,
+               text_callback=None):
+        # faster-whisper returns a lazy generator, so segments arrive while decoding
+        segments, info = self.model.transcribe(audio_path, **self._transcribe_options())
+        reporter = ProgressReporter(info.duration, progress_callback)
+        for segment in segments:
+            if cancel_token is not None:
+                cancel_token.check()
+            words = [(w.start, w.end, w.word) for w in segment.words or []]
+            yield Segment(segment.start, segment.end, segment.text), words
+            reporter.update(segment.end)
+        reporter.finish()
+    
+    def _transcribe_options(self):
+        options = {}
+        if self.transcriber.language:
+            options["language"] = self.transcriber.language
+        prompt = self.transcriber.initial_prompt()
+        if prompt:
+            options["initial_prompt"] = prompt
+        return options
+
+@register_backend
+class OpenAIBackend(TranscriptionBackend):
+    """OpenAI transcription API, splitting files over the 25MB upload limit"""
+    name = "openai"
+    label = "OpenAI API"
+    streaming = True
+    supports_language = True
+    supports_prompt = True
+    offline = False
+    requires_api_key = True
+    
+    # OpenAI limit: 25MB per request
+    max_size_bytes = 25 * 1024 * 1024
+    # Estimate: ~1MB per minute for 16kHz, 16-bit mono WAV
+    # Conservative approach: 10 minutes per chunk
+    chunk_duration_ms = 10 * 60 * 1000
+    
+    def __init__(self, transcriber):
+        super().__init__(transcriber)
+        self.client = None
+    
+    @property
+    def word_timestamps(self):
+        # Only whisper-1 returns timestamps
+        return self.transcriber.openai_model == "whisper-1"
+    
+    @property
+    def is_loaded(self):
+        return self.client is not None
+    
+    def load(self, warm_up=False):
+        if not self.transcriber.openai_api_key:
+            raise ValueError("OpenAI API key is required for transcription")
+        self.client = OpenAI(api_key=self.transcriber.openai_api_key)
+    
+    def unload(self):
+        self.client = None
+    
+    def stream(self, audio_path, progress_callback=None, cancel_token=None, status_callback=None,
+               text_callback=None):
+        audio = AudioSegment.from_wav(audio_path)
+        total_duration_ms = len(audio)
+        reporter = ProgressReporter(total_duration_ms / 1000, progress_callback)
+        
+        file_size = os.path.getsize(audio_path)
+        if file_size <= self.max_size_bytes:
+            # Small enough to process directly
+            yield from self._transcribe_file(audio_path, 0.0, total_duration_ms / 1000, text_callback)
+            reporter.finish()
+            return
+        
+        if status_callback:
+            status_callback(f"Audio file is large ({file_size/1024/1024:.1f}MB). Splitting into chunks for processing...")
+        
+        num_chunks = (total_duration_ms + self.chunk_duration_ms - 1) // self.chunk_duration_ms  # Ceiling division
+        
+        # Finished chunks are persisted so a failed job can resume without paying for them again
+        checkpoint = self._checkpoint(audio_path)
+        if checkpoint and checkpoint.chunks and status_callback:
+            status_callback(f"Resuming transcription: {len(checkpoint.chunks)}/{num_chunks} chunks already done")
+        
+        for i in range(num_chunks):
+            start_ms = i * self.chunk_duration_ms
+            end_ms = min((i + 1) * self.chunk_duration_ms, total_duration_ms)
+            
+            if checkpoint and checkpoint.completed(i):
+                yield from checkpoint.chunk_segments(i)
+                reporter.update(end_ms / 1000, force=True)
+                continue
+            
+            # Create a temporary file for the chunk
+            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+                chunk_filename = temp_file.name
+                audio[start_ms:end_ms].export(chunk_filename, format="wav")
+            
+            try:
+                if cancel_token is not None:
+                    cancel_token.check()
+                
+                if status_callback:
+                    progress = (i * 100) // num_chunks
+                    status_callback(f"Processing chunk {i+1}/{num_chunks} ({progress}% complete)")
+                
+                chunk_segments = list(self._transcribe_file(chunk_filename, start_ms / 1000, (end_ms - start_ms) / 1000,
+                                                            text_callback))
+            finally:
+                # Clean up temporary file
+                if os.path.exists(chunk_filename):
+                    os.remove(chunk_filename)
+            
+            if checkpoint:
+                checkpoint.save_chunk(i, chunk_segments)
+            yield from chunk_segments
+            reporter.update(end_ms / 1000, force=True)
+        
+        if checkpoint:
+            checkpoint.clear()
+    
+    def _checkpoint(self, audio_path):
+        """Checkpoint for this audio file and settings, or None if checkpointing is off"""
+        if not self.transcriber.checkpoint_dir:
+            return None
+        key = TranscriptionCheckpoint.job_key(
+            audio_path,
+            model=self.transcriber.openai_model,
+            chunk_duration_ms=self.chunk_duration_ms,
+            **self._transcribe_options()
+        )
+        return TranscriptionCheckpoint(self.transcriber.checkpoint_dir, key)
+    
+    def _transcribe_options(self):
+        """Extra keyword arguments for the OpenAI transcription endpoint"""
+        options = {}
+        if self.transcriber.language:
+            options["language"] = self.transcriber.language
+        prompt = self.transcriber.initial_prompt()
+        if prompt:
+            options["prompt"] = prompt
+        return options
+    
+    def _transcribe_file(self, path, offset, duration, text_callback=None):
+        """Send one audio file to the API and yield its segments
+        
+        Only whisper-1 returns timestamps; other models produce a single segment
+        spanning the whole file, streamed as text deltas when text_callback is given.
+        """
+        if text_callback and self.transcriber.openai_model != "whisper-1":
+            yield Segment(offset, offset + duration, self._stream_file(path, text_callback)), []
+            return
+        
+        with open(path, "rb") as audio_file:
+            if self.transcriber.openai_model == "whisper-1":
+                transcription = self.client.audio.transcriptions.create(
+                    model=self.transcriber.openai_model,
+                    file=audio_file,
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment", "word"],
+                    **self._transcribe_options()
+                )
+            else:
+                transcription = self.client.audio.transcriptions.create(
+                    model=self.transcriber.openai_model,
+                    file=audio_file,
+                    **self._transcribe_options()
+                )
+        
+        api_segments = getattr(transcription, "segments", None)
+        if not api_segments:
+            yield Segment(offset, offset + duration, transcription.text), []
+            return
+        
+        words = getattr(transcription, "words", None) or []
+        word_index = 0
+        for segment in api_segments:
+            segment_words = []
+            # Words are sorted by time, so walk them alongside the segments
+            while word_index < len(words) and words[word_index].start < segment.end:
+                word = words[word_index]
+                segment_words.append((offset + word.start, offset + word.end, word.word))
+                word_index += 1
+            yield Segment(offset + segment.start, offset + segment.end, segment.text), segment_words
+    
+    def _stream_file(self, path, text_callback):
+        """Transcribe one audio file with a streamed response, returning the full text"""
+        deltas = []
+        with open(path, "rb") as audio_file:
+            events = self.client.audio.transcriptions.create(
+                model=self.transcriber.openai_model,
+                file=audio_file,
+                stream=True,
+                **self._transcribe_options()
+            )
+            for event in events:
+                if event.type == "transcript.text.delta":
+                    deltas.append(event.delta)
+                    text_callback(event.delta)
+                elif event.type == "transcript.text.done":
+                    return event.text
+        return "".join(deltas)
+
+@register_backend
+class StubBackend(TranscriptionBackend):
+    """Offline stand-in that emits one placeholder segment per 30 seconds of audio
+    
+    Useful for developing and testing the pipeline without a model or network.
+    """
+    name = "stub"
+    label = "Local Stub"
+    streaming = True
+    
+    def __init__(self, transcriber):
+        super().__init__(transcriber)
+        self.loaded = False
+    
+    @property
+    def is_loaded(self):
+        return self.loaded
+    
+    def load(self, warm_up=False):
+        self.loaded = True
+    
+    def unload(self):
+        self.loaded = False
+    
+    def stream(self, audio_path, progress_callback=None, cancel_token=None, status_callback=None,
+               text_callback=None):
+        with wave.open(audio_path, "rb") as wav_file:
+            duration = wav_file.getnframes() / wav_file.getframerate()
+        reporter = ProgressReporter(duration, progress_callback)
+        window_seconds = N_SAMPLES / SAMPLE_RATE
+        start = 0.0
+        index = 1
+        while start < duration:
+            if cancel_token is not None:
+                cancel_token.check()
+            end = min(start + window_seconds, duration)
+            yield Segment(start, end, f"[stub segment {index}]"), []
+            reporter.update(end)
+            start = end
+            index += 1
+        reporter.finish()
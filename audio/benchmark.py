@@ -0,0 +1,323 @@
+import argparse
+import multiprocessing
+import re
+import sys
+import threading
+import time
+import wave
+import whisper
+from whisper.audio import SAMPLE_RATE
+
+from audio.transcriber import Transcriber
+from audio.backends import BACKENDS, available_backends
+from audio.realtime import RealtimeSession
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def benchmark_batch_sizes(audio_path, model_name="base", batch_sizes=(1, 2, 4, 8, 16)):
+    """Measure batched Whisper throughput in audio-seconds per wall-second"""
+    transcriber = Transcriber(model_name=model_name)
+    success, message = transcriber.load_model()
+    if not success:
+        raise RuntimeError(message)
+    
+    audio = whisper.load_audio(audio_path)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    backend = transcriber.backend
+    windows, _ = backend.split_windows(audio)
+    
+    # Warm up kernels and allocators so the first batch size is not penalized
+    transcriber.whisper_batch_size = 1
+    backend.decode_windows(windows[:1])
+    
+    results = []
+    for batch_size in batch_sizes:
+        transcriber.whisper_batch_size = batch_size
+        start_time = time.perf_counter()
+        backend.decode_windows(windows)
+        elapsed = time.perf_counter() - start_time
+        results.append((batch_size, elapsed, audio_seconds / elapsed))
+    return audio_seconds, results
+
+def _run_first_transcription(audio_path, model_name, warm_up, queue):
+    """Load the model in a fresh process and time loading and the first transcription"""
+    try:
+        transcriber = Transcriber(model_name=model_name)
+        transcriber.temp_audio_file = audio_path
+        
+        start_time = time.perf_counter()
+        success, message = transcriber.load_model(warm_up=warm_up)
+        if not success:
+            raise RuntimeError(message)
+        load_seconds = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        success, message, _ = transcriber.transcribe()
+        if not success:
+            raise RuntimeError(message)
+        queue.put((None, load_seconds, time.perf_counter() - start_time))
+    except Exception as e:
+        queue.put((str(e), None, None))
+
+def benchmark_first_transcription(audio_path, model_name="base"):
+    """Measure latency of the first transcription after loading, with and without warm-up
+    
+    Returns (warm_up, load_seconds, first_transcription_seconds) tuples. Each run
+    is a separate process, so the CUDA context, compiled kernels and allocator
+    pools initialized by one run are not reused by the other.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for warm_up in (False, True):
+        queue = context.Queue()
+        process = context.Process(target=_run_first_transcription, args=(audio_path, model_name, warm_up, queue))
+        process.start()
+        error, load_seconds, first_seconds = queue.get()
+        process.join()
+        if error:
+            raise RuntimeError(error)
+        results.append((warm_up, load_seconds, first_seconds))
+    return results
+
+def benchmark_language_pinning(audio_path, model_name="base", language="en", vocabulary=None):
+    """Time transcription of a file with language detection vs. a pinned language
+    
+    Returns (label, seconds) tuples for detection, pinned language, and pinned
+    language plus vocabulary prompt.
+    """
+    transcriber = Transcriber(model_name=model_name)
+    transcriber.temp_audio_file = audio_path
+    success, message = transcriber.load_model(warm_up=True)
+    if not success:
+        raise RuntimeError(message)
+    
+    configurations = [("auto-detect", None, []), (f"pinned {language}", language, [])]
+    if vocabulary:
+        configurations.append((f"pinned {language} + vocabulary", language, vocabulary))
+    
+    results = []
+    for label, pinned_language, terms in configurations:
+        transcriber.language = pinned_language
+        transcriber.vocabulary = terms
+        start_time = time.perf_counter()
+        success, message, _ = transcriber.transcribe()
+        if not success:
+            raise RuntimeError(message)
+        results.append((label, time.perf_counter() - start_time))
+    return results
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance between two transcripts, divided by the reference length
+    
+    Case and punctuation are ignored.
+    """
+    ref_words = re.findall(r"\w+", reference.lower())
+    hyp_words = re.findall(r"\w+", hypothesis.lower())
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+    
+    # Two-row Levenshtein distance over words
+    previous = list(range(len(hyp_words) + 1))
+    for i, ref_word in enumerate(ref_words, 1):
+        current = [i] + [0] * len(hyp_words)
+        for j, hyp_word in enumerate(hyp_words, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref_words)
+
+def _peak_memory_mb():
+    """Peak resident memory of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _run_engine(name, audio_path, model_name, api_key, openai_model, queue):
+    """Transcribe audio_path with one engine in a fresh process and report the results"""
+    try:
+        transcriber = Transcriber(model_name=model_name, transcription_method=name)
+        transcriber.temp_audio_file = audio_path
+        transcriber.openai_model = openai_model
+        success, message = transcriber.load_model(api_key=api_key, warm_up=True)
+        if not success:
+            raise RuntimeError(message)
+        
+        start_time = time.perf_counter()
+        success, message, text = transcriber.transcribe()
+        if not success:
+            raise RuntimeError(message)
+        queue.put((True, text, time.perf_counter() - start_time, _peak_memory_mb()))
+    except Exception as e:
+        queue.put((False, str(e), None, None))
+
+def benchmark_engines(audio_path, reference_text=None, model_name="base", api_key=None,
+                      openai_model="gpt-4o-transcribe", engines=None):
+    """Run every available engine on the same audio
+    
+    Each engine runs in its own process so peak memory is not shared between
+    them. Returns (engine, error, rtf, peak_memory_mb, wer) tuples; wer is None
+    without a reference transcript.
+    """
+    audio_seconds = len(whisper.load_audio(audio_path)) / SAMPLE_RATE
+    if engines is None:
+        engines = [name for name in available_backends()
+                   if api_key or not BACKENDS[name].requires_api_key]
+    
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in engines:
+        queue = context.Queue()
+        process = context.Process(target=_run_engine,
+                                  args=(name, audio_path, model_name, api_key, openai_model, queue))
+        process.start()
+        success, text, elapsed, memory_mb = queue.get()
+        process.join()
+        
+        if not success:
+            results.append((name, text, None, None, None))
+            continue
+        wer = word_error_rate(reference_text, text) if reference_text else None
+        results.append((name, None, elapsed / audio_seconds, memory_mb, wer))
+    return results
+
+def _run_realtime_client(url, pcm, sample_rate, speed, api_key, results, index, chunk_seconds=0.1):
+    """Stream one recording to a realtime server at speed x real time"""
+    started = time.perf_counter()
+    first_partial = []
+    def partial_callback(text):
+        if text and not first_partial:
+            first_partial.append(time.perf_counter() - started)
+    
+    try:
+        session = RealtimeSession(url, api_key=api_key, sample_rate=sample_rate, partial_callback=partial_callback)
+        session.start()
+        chunk_bytes = int(chunk_seconds * sample_rate) * 2
+        for offset in range(0, len(pcm), chunk_bytes):
+            session.send_audio(pcm[offset:offset + chunk_bytes])
+            time.sleep(chunk_seconds / speed)
+        stop_time = time.perf_counter()
+        text = session.stop()
+        results[index] = (None, first_partial[0] if first_partial else None, time.perf_counter() - stop_time, text)
+    except Exception as e:
+        results[index] = (str(e), None, None, None)
+
+def benchmark_realtime(audio_path, url="ws://localhost:8765", clients=1, speed=1.0, api_key=None):
+    """Load-test a realtime transcription server with concurrent clients
+    
+    Every client streams the same 16-bit mono WAV. Returns (error,
+    first_partial_seconds, final_latency_seconds, text) per client, where
+    final latency is the time from the end of the audio to the last final
+    transcript.
+    """
+    with wave.open(audio_path, "rb") as wav_file:
+        if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
+            raise ValueError("Realtime benchmark needs a 16-bit mono WAV file")
+        sample_rate = wav_file.getframerate()
+        pcm = wav_file.readframes(wav_file.getnframes())
+    
+    results = [None] * clients
+    threads = [threading.Thread(target=_run_realtime_client,
+                                args=(url, pcm, sample_rate, speed, api_key, results, index))
+               for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local Whisper transcription")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    batch_parser = subparsers.add_parser("batch", help="Throughput of batched decoding per batch size")
+    batch_parser.add_argument("audio", help="Path to an audio file to transcribe")
+    batch_parser.add_argument("--model", default="base", help="Whisper model size")
+    batch_parser.add_argument("--batch-sizes", default="1,2,4,8,16", help="Comma-separated batch sizes")
+    
+    warmup_parser = subparsers.add_parser("warmup", help="First-transcription latency with and without warm-up")
+    warmup_parser.add_argument("audio", help="Path to an audio file to transcribe")
+    warmup_parser.add_argument("--model", default="base", help="Whisper model size")
+    
+    language_parser = subparsers.add_parser("language", help="Time saved by pinning the language")
+    language_parser.add_argument("audio", help="Path to an audio file to transcribe")
+    language_parser.add_argument("--model", default="base", help="Whisper model size")
+    language_parser.add_argument("--language", default="en", help="Language code to pin")
+    language_parser.add_argument("--vocabulary", default="", help="Comma-separated domain terms")
+    
+    engines_parser = subparsers.add_parser("engines", help="Compare every available transcription engine")
+    engines_parser.add_argument("audio", help="Path to a WAV file to transcribe")
+    engines_parser.add_argument("--reference", help="Path to a reference transcript for WER")
+    engines_parser.add_argument("--model", default="base", help="Model size for local engines")
+    engines_parser.add_argument("--engines", default="", help="Comma-separated engine names (default: all available)")
+    engines_parser.add_argument("--openai-key", default=None, help="OpenAI API key (enables the OpenAI engine)")
+    engines_parser.add_argument("--openai-model", default="gpt-4o-transcribe", help="OpenAI transcription model")
+    
+    realtime_parser = subparsers.add_parser("realtime", help="Load-test a realtime transcription server")
+    realtime_parser.add_argument("audio", help="Path to a 16-bit mono WAV file to stream")
+    realtime_parser.add_argument("--url", default="ws://localhost:8765", help="Realtime websocket URL")
+    realtime_parser.add_argument("--clients", type=int, default=1, help="Concurrent client sessions")
+    realtime_parser.add_argument("--speed", type=float, default=1.0, help="Streaming speed as a multiple of real time")
+    realtime_parser.add_argument("--openai-key", default=None, help="API key for the OpenAI endpoint")
+    
+    args = parser.parse_args()
+    
+    if args.command == "batch":
+        batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+        audio_seconds, results = benchmark_batch_sizes(args.audio, args.model, batch_sizes)
+        
+        print(f"Audio: {audio_seconds:.1f}s, model: {args.model}")
+        print(f"{'batch':>5}  {'wall (s)':>9}  {'audio-s/wall-s':>14}")
+        for batch_size, elapsed, throughput in results:
+            print(f"{batch_size:>5}  {elapsed:>9.2f}  {throughput:>14.2f}")
+    elif args.command == "warmup":
+        results = benchmark_first_transcription(args.audio, args.model)
+        
+        print(f"Model: {args.model}")
+        print(f"{'warm-up':>7}  {'load (s)':>9}  {'first transcription (s)':>23}")
+        for warm_up, load_seconds, first_seconds in results:
+            print(f"{'yes' if warm_up else 'no':>7}  {load_seconds:>9.2f}  {first_seconds:>23.2f}")
+    elif args.command == "language":
+        vocabulary = [term.strip() for term in args.vocabulary.split(",") if term.strip()]
+        results = benchmark_language_pinning(args.audio, args.model, args.language, vocabulary)
+        
+        baseline = results[0][1]
+        print(f"Model: {args.model}")
+        print(f"{'configuration':<28}  {'wall (s)':>9}  {'saved (s)':>9}")
+        for label, seconds in results:
+            print(f"{label:<28}  {seconds:>9.2f}  {baseline - seconds:>9.2f}")
+    elif args.command == "engines":
+        reference_text = None
+        if args.reference:
+            with open(args.reference, encoding="utf-8") as f:
+                reference_text = f.read()
+        engines = [name.strip() for name in args.engines.split(",") if name.strip()] or None
+        results = benchmark_engines(args.audio, reference_text, args.model, args.openai_key,
+                                    args.openai_model, engines)
+        
+        print(f"{'engine':<16}  {'RTF':>6}  {'peak MB':>8}  {'WER':>6}")
+        for name, error, rtf, memory_mb, wer in results:
+            if error:
+                print(f"{name:<16}  failed: {error}")
+                continue
+            memory_text = f"{memory_mb:.0f}" if memory_mb is not None else "n/a"
+            wer_text = f"{wer:.3f}" if wer is not None else "n/a"
+            print(f"{name:<16}  {rtf:>6.3f}  {memory_text:>8}  {wer_text:>6}")
+    elif args.command == "realtime":
+        results = benchmark_realtime(args.audio, args.url, args.clients, args.speed, args.openai_key)
+        
+        print(f"Server: {args.url}, clients: {args.clients}, speed: {args.speed}x")
+        print(f"{'client':>6}  {'first partial (s)':>17}  {'final latency (s)':>17}")
+        for index, (error, first_partial, final_latency, _) in enumerate(results):
+            if error:
+                print(f"{index:>6}  failed: {error}")
+                continue
+            partial_text = f"{first_partial:.2f}" if first_partial is not None else "n/a"
+            print(f"{index:>6}  {partial_text:>17}  {final_latency:>17.2f}")
+
+if __name__ == "__main__":
+    main()
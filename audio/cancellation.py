@@ -0,0 +1,35 @@
+import threading
+import time
+
+class TranscriptionCancelled(Exception):
+    """Raised inside a transcription job when its token is cancelled or expires"""
+    pass
+
+class CancellationToken:
+    """Cooperative cancellation flag with an optional wall-clock deadline
+    
+    Long-running jobs call check() between units of work (windows, batches,
+    audio chunks); it raises TranscriptionCancelled once the token has been
+    cancelled or the deadline has passed.
+    """
+    def __init__(self, deadline_seconds=None):
+        self._event = threading.Event()
+        self.deadline_seconds = deadline_seconds
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+    
+    @property
+    def is_expired(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+    
+    def check(self):
+        if self._event.is_set():
+            raise TranscriptionCancelled("Transcription cancelled")
+        if self.is_expired:
+            raise TranscriptionCancelled(f"Transcription deadline of {self.deadline_seconds / 60:.0f} min exceeded")
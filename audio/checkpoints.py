@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+
+from audio.segments import Segment
+
+class TranscriptionCheckpoint:
+    """Per-chunk results of a chunked transcription job, persisted as they complete
+    
+    The job key hashes the audio contents together with the settings that
+    affect the transcript, so a retry of the same recording with the same
+    settings picks up the finished chunks and any other job starts fresh.
+    """
+    def __init__(self, directory, key):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{key}.json")
+        self.chunks = self._load()
+    
+    @staticmethod
+    def job_key(audio_path, **settings):
+        """Hash of the audio file and the transcription settings"""
+        sha256 = hashlib.sha256()
+        with open(audio_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        sha256.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return sha256.hexdigest()
+    
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)["chunks"]
+            except Exception as e:
+                print(f"Error reading transcription checkpoint: {e}")
+        return {}
+    
+    def completed(self, index):
+        return str(index) in self.chunks
+    
+    def chunk_segments(self, index):
+        """(Segment, words) pairs saved for a finished chunk"""
+        return [(Segment(*segment), [tuple(word) for word in words])
+                for segment, words in self.chunks[str(index)]]
+    
+    def save_chunk(self, index, chunk_segments):
+        """Record a finished chunk, replacing the checkpoint file atomically"""
+        self.chunks[str(index)] = [[list(segment), [list(word) for word in words]]
+                                   for segment, words in chunk_segments]
+        os.makedirs(self.directory, exist_ok=True)
+        partial_path = self.path + ".part"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            json.dump({"chunks": self.chunks}, f)
+        os.replace(partial_path, self.path)
+    
+    def clear(self):
+        """Remove the checkpoint once the job has finished"""
+        self.chunks = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
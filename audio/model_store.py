@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.request
+import whisper
+
+class ModelStore:
+    """Local cache of Whisper checkpoints with SHA256 verification
+    
+    Checkpoints live in <app_dir>/models under the file names whisper itself
+    uses, so whisper.load_model(download_root=...) and this store agree on
+    paths. Hash checks are cached by file size and mtime, and the last load
+    time of every model is recorded for display in the settings.
+    """
+    def __init__(self, app_dir):
+        self.root = os.path.join(app_dir, "models")
+        os.makedirs(self.root, exist_ok=True)
+        self.metadata_file = os.path.join(self.root, "store.json")
+        self.lock = threading.Lock()
+        self.metadata = self._load_metadata()
+        self.downloads = set()  # Models currently being prefetched
+    
+    def _load_metadata(self):
+        if os.path.exists(self.metadata_file):
+            try:
+                with open(self.metadata_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error reading model store metadata: {e}")
+        return {"verified": {}, "load_times": {}}
+    
+    def _save_metadata(self):
+        try:
+            with open(self.metadata_file, "w", encoding="utf-8") as f:
+                json.dump(self.metadata, f, indent=2)
+        except Exception as e:
+            print(f"Error saving model store metadata: {e}")
+    
+    def available_models(self):
+        """Names of all checkpoints whisper knows how to download"""
+        return whisper.available_models()
+    
+    def checkpoint_path(self, name):
+        """Path the checkpoint for name is (or would be) stored at"""
+        return os.path.join(self.root, os.path.basename(whisper._MODELS[name]))
+    
+    def expected_sha256(self, name):
+        # Whisper's download URLs embed the checkpoint's SHA256 as a path component
+        return whisper._MODELS[name].split("/")[-2]
+    
+    def is_installed(self, name):
+        return name in whisper._MODELS and os.path.exists(self.checkpoint_path(name))
+    
+    def installed_models(self):
+        """List (name, size_bytes) for every checkpoint present on disk"""
+        return [(name, os.path.getsize(self.checkpoint_path(name)))
+                for name in self.available_models() if self.is_installed(name)]
+    
+    def size_on_disk(self, name):
+        return os.path.getsize(self.checkpoint_path(name)) if self.is_installed(name) else 0
+    
+    def verify(self, name, force=False):
+        """Check a checkpoint's SHA256; results are cached until the file changes"""
+        if not self.is_installed(name):
+            return False
+        path = self.checkpoint_path(name)
+        stat = os.stat(path)
+        fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+        
+        with self.lock:
+            cached = self.metadata["verified"].get(name)
+        if not force and cached and cached["fingerprint"] == fingerprint:
+            return cached["ok"]
+        
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        ok = sha256.hexdigest() == self.expected_sha256(name)
+        
+        with self.lock:
+            self.metadata["verified"][name] = {"fingerprint": fingerprint, "ok": ok}
+            self._save_metadata()
+        return ok
+    
+    def model_path(self, name):
+        """Local path of a verified checkpoint, or None if it must be downloaded"""
+        if name in whisper._MODELS and self.verify(name):
+            return self.checkpoint_path(name)
+        return None
+    
+    def delete(self, name):
+        if self.is_installed(name):
+            os.remove(self.checkpoint_path(name))
+        with self.lock:
+            self.metadata["verified"].pop(name, None)
+            self._save_metadata()
+    
+    def record_load_time(self, name, seconds):
+        with self.lock:
+            self.metadata["load_times"][name] = round(seconds, 2)
+            self._save_metadata()
+    
+    def load_time(self, name):
+        """Seconds the last load of this model took, or None if never loaded"""
+        return self.metadata["load_times"].get(name)
+    
+    def prefetch(self, names, callback=None):
+        """Download and verify checkpoints in a background thread"""
+        threading.Thread(target=self._prefetch_thread, args=(list(names), callback), daemon=True).start()
+    
+    def _prefetch_thread(self, names, callback=None):
+        """Thread function to download checkpoints that are missing or corrupt"""
+        for name in names:
+            if name in self.downloads:
+                continue
+            if self.model_path(name):
+                if callback:
+                    callback(True, f"Whisper {name} is already installed", 100)
+                continue
+            
+            self.downloads.add(name)
+            try:
+                self._download(name, callback)
+                if self.verify(name, force=True):
+                    if callback:
+                        callback(True, f"Whisper {name} downloaded and verified", 100)
+                else:
+                    self.delete(name)
+                    if callback:
+                        callback(False, f"Whisper {name} failed SHA256 verification", 0)
+            except Exception as e:
+                if callback:
+                    callback(False, f"Error downloading Whisper {name}: {str(e)}", 0)
+            finally:
+                self.downloads.discard(name)
+    
+    def _download(self, name, callback=None):
+        """Stream a checkpoint to a .part file and move it into place when complete"""
+        path = self.checkpoint_path(name)
+        partial_path = path + ".part"
+        try:
+            self._download_to(name, partial_path, callback)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        os.replace(partial_path, path)
+    
+    def _download_to(self, name, partial_path, callback=None):
+        with urllib.request.urlopen(whisper._MODELS[name]) as response, open(partial_path, "wb") as f:
+            total = int(response.headers.get("Content-Length", 0))
+            received = 0
+            last_percent = -1
+            for block in iter(lambda: response.read(1024 * 1024), b""):
+                f.write(block)
+                received += len(block)
+                percent = int(received * 100 / total) if total else 0
+                if callback and percent != last_percent:
+                    last_percent = percent
+                    callback(True, f"Downloading Whisper {name}: {percent}%", progress=percent, in_progress=True)
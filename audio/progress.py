@@ -0,0 +1,104 @@
+import importlib
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+import tqdm
+from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+
+class ProgressEvent(namedtuple("ProgressEvent", ["processed_seconds", "total_seconds", "rtf", "eta_seconds"])):
+    """Snapshot of transcription progress
+    
+    rtf is the real-time factor (wall seconds spent per audio second), so values
+    below 1 mean faster than real time. eta_seconds is None until some audio has
+    been processed.
+    """
+    @property
+    def percent(self):
+        if self.total_seconds <= 0:
+            return 0.0
+        return min(100.0, self.processed_seconds / self.total_seconds * 100)
+    
+    def describe(self):
+        """Short human-readable summary for status labels"""
+        text = f"{self.processed_seconds / 60:.1f}/{self.total_seconds / 60:.1f} min"
+        if self.rtf is not None:
+            text += f" | RTF {self.rtf:.2f}"
+        if self.eta_seconds is not None:
+            minutes, seconds = divmod(int(self.eta_seconds), 60)
+            text += f" | ETA {minutes}m{seconds:02d}s"
+        return text
+
+class ProgressReporter:
+    """Turns processed-audio updates into rate-limited ProgressEvents
+    
+    The listener is called at most once every min_interval seconds (plus a final
+    event), so reporting costs almost nothing inside the decoding loop.
+    """
+    def __init__(self, total_seconds, listener=None, min_interval=0.25):
+        self.total_seconds = total_seconds
+        self.listener = listener
+        self.min_interval = min_interval
+        self.processed_seconds = 0.0
+        self.start_time = time.perf_counter()
+        self._last_emit = 0.0
+    
+    def advance(self, seconds):
+        """Add newly processed audio"""
+        self.update(self.processed_seconds + seconds)
+    
+    def update(self, processed_seconds, force=False):
+        """Set the amount of processed audio and emit an event if due"""
+        self.processed_seconds = min(processed_seconds, self.total_seconds)
+        if self.listener is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        self.listener(self.snapshot(now))
+    
+    def finish(self):
+        """Emit a final 100% event"""
+        self.update(self.total_seconds, force=True)
+    
+    def snapshot(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start_time
+        if self.processed_seconds > 0:
+            rtf = elapsed / self.processed_seconds
+            eta = rtf * (self.total_seconds - self.processed_seconds)
+        else:
+            rtf = None
+            eta = None
+        return ProgressEvent(self.processed_seconds, self.total_seconds, rtf, eta)
+
+# whisper.transcribe() only exposes progress through its tqdm bar, so while a
+# reporter is attached we swap in a bar that forwards frame updates to it.
+_whisper_transcribe_module = importlib.import_module("whisper.transcribe")
+_hook_lock = threading.Lock()
+
+@contextmanager
+def whisper_progress(reporter, cancel_token=None):
+    """Report progress of whisper.transcribe() calls made inside the block
+    
+    The bar is updated once per decoded window, which also makes it the place
+    to check cancel_token between windows.
+    """
+    class _ReportingBar(tqdm.tqdm):
+        def update(self, n=1):
+            # Whisper counts mel frames (10 ms each)
+            reporter.advance(n * HOP_LENGTH / SAMPLE_RATE)
+            if cancel_token is not None:
+                cancel_token.check()
+            return super().update(n)
+    
+    class _TqdmShim:
+        tqdm = _ReportingBar
+    
+    with _hook_lock:
+        original = _whisper_transcribe_module.tqdm
+        _whisper_transcribe_module.tqdm = _TqdmShim
+        try:
+            yield reporter
+        finally:
+            _whisper_transcribe_module.tqdm = original
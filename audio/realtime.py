@@ -0,0 +1,173 @@
+import base64
+import json
+import queue
+import threading
+import numpy as np
+from websockets.sync.client import connect
+
+# OpenAI realtime transcription endpoint; the local stand-in speaks the same protocol
+OPENAI_REALTIME_URL = "wss://api.openai.com/v1/realtime?intent=transcription"
+
+# The realtime API takes 24kHz 16-bit mono PCM
+REALTIME_SAMPLE_RATE = 24000
+
+def resample_pcm16(pcm, from_rate, to_rate):
+    """Linearly resample 16-bit mono PCM bytes"""
+    if from_rate == to_rate or not pcm:
+        return pcm
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    count = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count) * (from_rate / to_rate)
+    resampled = np.interp(positions, np.arange(len(samples)), samples)
+    return resampled.astype(np.int16).tobytes()
+
+class RealtimeSession:
+    """Streams microphone PCM to a realtime transcription websocket
+
+    Audio is queued from the recording thread and sent by a sender thread;
+    a receiver thread collects partial (delta) and final transcripts per
+    speech turn. partial_callback receives the whole transcript so far,
+    finals and partials in speaking order, whenever it changes.
+    """
+    def __init__(self, url=OPENAI_REALTIME_URL, api_key=None, model="gpt-4o-transcribe", language=None,
+                 prompt=None, sample_rate=16000, partial_callback=None, error_callback=None):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.language = language
+        self.prompt = prompt
+        self.sample_rate = sample_rate  # Rate of the PCM passed to send_audio
+        self.partial_callback = partial_callback
+        self.error_callback = error_callback
+
+        self.connection = None
+        self.audio_queue = queue.Queue()
+        self.sender_thread = None
+        self.receiver_thread = None
+        self.lock = threading.Lock()
+
+        # Transcript text per turn (item_id), in the order turns started
+        self.turns = {}
+        self.completed = set()
+        self.vad_items = set()  # Turns committed by server-side voice activity detection
+        self.commit_sent = False
+        self.final_item = None  # Turn created by the closing commit
+        self.finished = threading.Event()
+
+    def start(self):
+        """Connect and configure the transcription session; raises on connection errors"""
+        headers = {"OpenAI-Beta": "realtime=v1"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self.connection = connect(self.url, additional_headers=headers)
+
+        transcription = {"model": self.model}
+        if self.language:
+            transcription["language"] = self.language
+        if self.prompt:
+            transcription["prompt"] = self.prompt
+        self._send({
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": transcription,
+                "turn_detection": {"type": "server_vad"}
+            }
+        })
+
+        self.sender_thread = threading.Thread(target=self._sender_thread, daemon=True)
+        self.receiver_thread = threading.Thread(target=self._receiver_thread, daemon=True)
+        self.sender_thread.start()
+        self.receiver_thread.start()
+
+    def send_audio(self, pcm):
+        """Queue a chunk of 16-bit mono PCM; safe to call from the recording thread"""
+        self.audio_queue.put(pcm)
+
+    def stop(self, timeout=30):
+        """Commit the remaining audio, wait for its final transcript and close
+
+        Returns the full transcript.
+        """
+        self.audio_queue.put(None)
+        self.finished.wait(timeout)
+        if self.connection is not None:
+            self.connection.close()
+        return self.transcript()
+
+    def transcript(self):
+        with self.lock:
+            return " ".join(text.strip() for text in self.turns.values() if text.strip())
+
+    def _send(self, event):
+        self.connection.send(json.dumps(event))
+
+    def _sender_thread(self):
+        """Thread function to forward queued audio to the server"""
+        try:
+            while True:
+                pcm = self.audio_queue.get()
+                if pcm is None:
+                    self.commit_sent = True
+                    self._send({"type": "input_audio_buffer.commit"})
+                    return
+                pcm = resample_pcm16(pcm, self.sample_rate, REALTIME_SAMPLE_RATE)
+                self._send({"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm).decode("ascii")})
+        except Exception as e:
+            self._fail(f"Realtime audio stream error: {str(e)}")
+
+    def _receiver_thread(self):
+        """Thread function to collect transcript events"""
+        try:
+            for message in self.connection:
+                self._handle_event(json.loads(message))
+        except Exception as e:
+            if not self.finished.is_set():
+                self._fail(f"Realtime connection error: {str(e)}")
+        finally:
+            self.finished.set()
+
+    def _handle_event(self, event):
+        event_type = event.get("type")
+        if event_type == "conversation.item.input_audio_transcription.delta":
+            with self.lock:
+                self.turns[event["item_id"]] = self.turns.get(event["item_id"], "") + event["delta"]
+            self._notify()
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            with self.lock:
+                self.turns[event["item_id"]] = event["transcript"]
+                self.completed.add(event["item_id"])
+            self._notify()
+            self._check_finished()
+        elif event_type == "input_audio_buffer.speech_stopped":
+            with self.lock:
+                self.vad_items.add(event["item_id"])
+        elif event_type == "input_audio_buffer.committed":
+            with self.lock:
+                self.turns.setdefault(event["item_id"], "")
+                # VAD turns announce speech_stopped first, so any other commit is the closing one
+                if self.commit_sent and event["item_id"] not in self.vad_items:
+                    self.final_item = event["item_id"]
+            self._check_finished()
+        elif event_type == "error":
+            message = event.get("error", {}).get("message", "Unknown error")
+            if self.commit_sent:
+                # Typically an empty buffer on the closing commit; nothing is left to wait for
+                self.finished.set()
+            else:
+                self._fail(f"Realtime transcription error: {message}")
+
+    def _check_finished(self):
+        with self.lock:
+            done = self.final_item is not None and self.final_item in self.completed
+        if done:
+            self.finished.set()
+
+    def _notify(self):
+        if self.partial_callback:
+            self.partial_callback(self.transcript())
+
+    def _fail(self, message):
+        self.finished.set()
+        if self.error_callback:
+            self.error_callback(message)
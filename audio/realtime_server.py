@@ -0,0 +1,156 @@
+import argparse
+import base64
+import json
+import threading
+import uuid
+import numpy as np
+import torch
+import whisper
+from whisper.audio import SAMPLE_RATE
+from websockets.sync.server import serve
+
+from audio.realtime import REALTIME_SAMPLE_RATE, resample_pcm16
+
+# Voice activity detection works on 30ms frames
+FRAME_SECONDS = 0.03
+
+class RealtimeStandInServer:
+    """Local stand-in for the realtime transcription endpoint, backed by local Whisper
+
+    Speaks the subset of the realtime protocol RealtimeSession uses, so the
+    realtime mode can be developed and load-tested offline. Turns are found
+    with a simple energy-based VAD. While a turn is in progress it is
+    re-transcribed every partial_interval seconds and the new text is sent as
+    deltas, followed by the final transcript once the speaker pauses or the
+    client commits. A single model is shared by all connections.
+    """
+    def __init__(self, model_name="base", host="localhost", port=8765, partial_interval=1.0,
+                 silence_seconds=0.5, energy_threshold=0.01):
+        self.model_name = model_name
+        self.host = host
+        self.port = port
+        self.partial_interval = partial_interval
+        self.silence_seconds = silence_seconds
+        self.energy_threshold = energy_threshold
+        self.model = None
+        self.model_lock = threading.Lock()
+
+    def serve_forever(self):
+        self.model = whisper.load_model(self.model_name)
+        with serve(self.handle_connection, self.host, self.port) as server:
+            print(f"Realtime stand-in listening on ws://{self.host}:{self.port} (Whisper {self.model_name})")
+            server.serve_forever()
+
+    def transcribe(self, audio, language=None, prompt=None):
+        with self.model_lock:
+            result = whisper.transcribe(self.model, audio, language=language, initial_prompt=prompt,
+                                        fp16=torch.cuda.is_available(), condition_on_previous_text=False)
+        return result["text"].strip()
+
+    def handle_connection(self, websocket):
+        """Serve one client session until it disconnects"""
+        session = _Session(self, websocket)
+        for message in websocket:
+            session.handle_event(json.loads(message))
+
+class _Session:
+    """State of one realtime connection"""
+    def __init__(self, server, websocket):
+        self.server = server
+        self.websocket = websocket
+        self.language = None
+        self.prompt = None
+        self.pending = np.zeros(0, dtype=np.float32)  # Audio not yet split into frames
+        self.turn = []  # Frames of the turn in progress
+        self.item_id = None
+        self.silent_frames = 0
+        self.sent_text = ""  # Partial text already sent as deltas for the current turn
+        self.frames_since_partial = 0
+
+    def send(self, event):
+        self.websocket.send(json.dumps(event))
+
+    def handle_event(self, event):
+        event_type = event.get("type")
+        if event_type == "transcription_session.update":
+            transcription = event.get("session", {}).get("input_audio_transcription", {})
+            self.language = transcription.get("language")
+            self.prompt = transcription.get("prompt")
+        elif event_type == "input_audio_buffer.append":
+            pcm = resample_pcm16(base64.b64decode(event["audio"]), REALTIME_SAMPLE_RATE, SAMPLE_RATE)
+            self.append(np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0)
+        elif event_type == "input_audio_buffer.commit":
+            if self.pending.size:
+                self.turn.append(self.pending)
+                self.pending = np.zeros(0, dtype=np.float32)
+            if sum(len(frame) for frame in self.turn) < 0.1 * SAMPLE_RATE:
+                self.send({"type": "error", "error": {"type": "invalid_request_error",
+                                                      "code": "input_audio_buffer_commit_empty",
+                                                      "message": "Buffer too small to commit"}})
+                return
+            self.finish_turn()
+
+    def append(self, samples):
+        """Split incoming audio into frames and run voice activity detection on each"""
+        frame_size = int(FRAME_SECONDS * SAMPLE_RATE)
+        self.pending = np.concatenate([self.pending, samples])
+        while len(self.pending) >= frame_size:
+            frame, self.pending = self.pending[:frame_size], self.pending[frame_size:]
+            self.handle_frame(frame)
+
+    def handle_frame(self, frame):
+        speech = np.sqrt(np.mean(frame ** 2)) >= self.server.energy_threshold
+        if self.item_id is None:
+            if not speech:
+                return
+            self.item_id = f"item_{uuid.uuid4().hex}"
+            self.send({"type": "input_audio_buffer.speech_started", "item_id": self.item_id})
+
+        self.turn.append(frame)
+        self.silent_frames = 0 if speech else self.silent_frames + 1
+        self.frames_since_partial += 1
+
+        if self.silent_frames * FRAME_SECONDS >= self.server.silence_seconds:
+            self.send({"type": "input_audio_buffer.speech_stopped", "item_id": self.item_id})
+            self.finish_turn()
+        elif self.frames_since_partial * FRAME_SECONDS >= self.server.partial_interval:
+            self.send_partial()
+
+    def send_partial(self):
+        """Re-transcribe the turn so far and send any text that extends what was already sent"""
+        self.frames_since_partial = 0
+        text = self.server.transcribe(np.concatenate(self.turn), self.language, self.prompt)
+        if text.startswith(self.sent_text) and len(text) > len(self.sent_text):
+            self.send({"type": "conversation.item.input_audio_transcription.delta",
+                       "item_id": self.item_id, "content_index": 0, "delta": text[len(self.sent_text):]})
+            self.sent_text = text
+
+    def finish_turn(self):
+        if self.item_id is None:
+            self.item_id = f"item_{uuid.uuid4().hex}"
+        self.send({"type": "input_audio_buffer.committed", "item_id": self.item_id})
+        transcript = self.server.transcribe(np.concatenate(self.turn), self.language, self.prompt)
+        self.send({"type": "conversation.item.input_audio_transcription.completed",
+                   "item_id": self.item_id, "content_index": 0, "transcript": transcript})
+        self.turn = []
+        self.item_id = None
+        self.silent_frames = 0
+        self.sent_text = ""
+        self.frames_since_partial = 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Local realtime transcription server backed by Whisper")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--host", default="localhost", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--partial-interval", type=float, default=1.0,
+                        help="Seconds of speech between partial transcripts")
+    parser.add_argument("--silence", type=float, default=0.5, help="Seconds of silence that end a turn")
+    parser.add_argument("--threshold", type=float, default=0.01, help="RMS energy treated as speech")
+    args = parser.parse_args()
+
+    RealtimeStandInServer(args.model, args.host, args.port, args.partial_interval,
+                          args.silence, args.threshold).serve_forever()
+
+if __name__ == "__main__":
+    main()
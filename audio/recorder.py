@@ -15,6 +15,7 @@ class AudioRecorder:
         self.frames = []
         self.temp_audio_file = "temp_recording.wav"
         self.recording_completed = False
+        self.chunk_listener = None  # Called with each raw PCM chunk while recording, e.g. for realtime streaming
     
     def start_recording(self):
         # Reset any existing recording completion flag
@@ -56,6 +57,8 @@ class AudioRecorder:
                         # Non-blocking read with timeout
                         data = stream.read(self.chunk_size, exception_on_overflow=False)
                         self.frames.append(data)
+                        if self.chunk_listener:
+                            self.chunk_listener(data)
                     except Exception as e:
                         print(f"Error during recording: {e}")
                         # Don't break the loop on errors, just continue
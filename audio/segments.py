@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+import numpy as np
+
+Segment = namedtuple("Segment", ["start", "end", "text"])
+Word = namedtuple("Word", ["start", "end", "word", "segment"])
+
+class SegmentStore:
+    """Compact, array-backed store of transcript segments and word timestamps
+    
+    Times are in seconds from the start of the audio. Segments are kept in the
+    order they were produced, which is also chronological order.
+    """
+    def __init__(self):
+        self.starts = array('d')
+        self.ends = array('d')
+        self.texts = []
+        
+        # Word timestamps (only filled when the engine provides them)
+        self.word_starts = array('d')
+        self.word_ends = array('d')
+        self.word_segments = array('l')
+        self.word_texts = []
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def __iter__(self):
+        for i in range(len(self.starts)):
+            yield Segment(self.starts[i], self.ends[i], self.texts[i])
+    
+    def __getitem__(self, index):
+        return Segment(self.starts[index], self.ends[index], self.texts[index])
+    
+    @property
+    def duration(self):
+        """End time of the last segment"""
+        return self.ends[-1] if self.ends else 0.0
+    
+    @property
+    def has_words(self):
+        return len(self.word_starts) > 0
+    
+    def add_segment(self, start, end, text, words=None):
+        """Append a segment; words is an optional iterable of (start, end, word)"""
+        text = text.strip()
+        if not text:
+            return
+        index = len(self.starts)
+        self.starts.append(float(start))
+        self.ends.append(float(end))
+        self.texts.append(text)
+        for word_start, word_end, word in words or ():
+            self.word_starts.append(float(word_start))
+            self.word_ends.append(float(word_end))
+            self.word_segments.append(index)
+            self.word_texts.append(word)
+    
+    def add_whisper_segments(self, segments, offset=0.0):
+        """Append segments in the dict format returned by whisper's transcribe()"""
+        for segment in segments:
+            words = [(offset + w["start"], offset + w["end"], w["word"]) for w in segment.get("words", [])]
+            self.add_segment(offset + segment["start"], offset + segment["end"], segment["text"], words)
+    
+    def extend(self, other, offset=0.0):
+        """Append all segments from another store, shifting their times by offset"""
+        for i, segment in enumerate(other):
+            words = [(offset + w.start, offset + w.end, w.word) for w in other.words_for(i)]
+            self.add_segment(offset + segment.start, offset + segment.end, segment.text, words)
+    
+    def text(self):
+        """Full transcript text"""
+        return " ".join(self.texts)
+    
+    def words_for(self, index):
+        """Word timestamps belonging to a segment"""
+        # Words are appended in segment order, so word_segments is sorted
+        first = bisect_left(self.word_segments, index)
+        last = bisect_right(self.word_segments, index)
+        return [Word(self.word_starts[i], self.word_ends[i], self.word_texts[i], index)
+                for i in range(first, last)]
+    
+    def index_at(self, seconds):
+        """Index of the segment playing at the given time (or the last one before it)"""
+        return max(0, bisect_right(self.starts, seconds) - 1)
+    
+    def between(self, start, end):
+        """Segments overlapping the interval [start, end)"""
+        return [segment for segment in self if segment.end > start and segment.start < end]
+    
+    def matches(self, text):
+        """Check whether text is still the unedited transcript of these segments"""
+        return len(self) > 0 and " ".join(text.split()) == " ".join(self.text().split())
+    
+    def save(self, path):
+        """Serialize the store to a compressed .npz file"""
+        text_bytes, text_offsets = _pack_strings(self.texts)
+        word_bytes, word_offsets = _pack_strings(self.word_texts)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                starts=np.frombuffer(self.starts, dtype=np.float64),
+                ends=np.frombuffer(self.ends, dtype=np.float64),
+                text_bytes=text_bytes,
+                text_offsets=text_offsets,
+                word_starts=np.frombuffer(self.word_starts, dtype=np.float64),
+                word_ends=np.frombuffer(self.word_ends, dtype=np.float64),
+                word_segments=np.array(self.word_segments, dtype=np.int64),
+                word_bytes=word_bytes,
+                word_offsets=word_offsets
+            )
+    
+    @classmethod
+    def load(cls, path):
+        """Load a store written by save()"""
+        store = cls()
+        with np.load(path) as data:
+            store.starts = array('d', data["starts"].tolist())
+            store.ends = array('d', data["ends"].tolist())
+            store.texts = _unpack_strings(data["text_bytes"], data["text_offsets"])
+            store.word_starts = array('d', data["word_starts"].tolist())
+            store.word_ends = array('d', data["word_ends"].tolist())
+            store.word_segments = array('l', data["word_segments"].tolist())
+            store.word_texts = _unpack_strings(data["word_bytes"], data["word_offsets"])
+        return store
+
+def _pack_strings(strings):
+    """Encode a list of strings as one UTF-8 buffer plus offsets"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(buffer, offsets):
+    raw = buffer.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
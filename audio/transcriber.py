@@ -1,181 +1,195 @@
 import threading
+import time
 import os
-import whisper
-from openai import OpenAI
-from pydub import AudioSegment
-import tempfile
+
+from audio.segments import SegmentStore
+from audio.cancellation import TranscriptionCancelled
+from audio.backends import get_backend_class
 
 class Transcriber:
-    def __init__(self, model_name="base", transcription_method="whisper"):
+    def __init__(self, model_name="base", transcription_method="whisper", batch_size=1,
+                 language=None, vocabulary=None):
         self.whisper_model_name = model_name
-        self.whisper_model = None
-        self.transcription_method = transcription_method  # "whisper" or "openai"
+        self.whisper_batch_size = batch_size  # Number of 30-second windows decoded together
+        self.transcription_method = transcription_method  # Backend name, e.g. "whisper" or "openai"
         self.temp_audio_file = "temp_recording.wav"
-        self.openai_client = None
         self.openai_model = "gpt-4o-transcribe"
         self.openai_api_key = None
+        self.model_store = None  # Optional ModelStore providing local Whisper checkpoints
+        self.checkpoint_dir = None  # Directory for per-chunk results of long API jobs; None disables resume
+        self.language = language  # ISO-639-1 code; None lets the engine detect the language
+        self.vocabulary = list(vocabulary or [])  # Domain terms used to prime decoding
+        self.segments = SegmentStore()  # Segments of the most recent transcription
+        self.time_to_first_word = None  # Seconds until the most recent transcription produced text
+        
+        # Backend instances by name, created on first use
+        self.backends = {}
+        
+        # Readiness of the transcription engine: "unloaded", "loading", "warming", "ready" or "error"
+        self.model_state = "unloaded"
+        self.state_callback = None  # Called with the new state whenever it changes
+    
+    @property
+    def backend(self):
+        """Backend for the current transcription method"""
+        return self.get_backend(self.transcription_method)
+    
+    def get_backend(self, name):
+        """Return the backend instance registered under name, creating it if needed"""
+        if name not in self.backends:
+            self.backends[name] = get_backend_class(name)(self)
+        return self.backends[name]
+    
+    @property
+    def is_loaded(self):
+        return self.backend.is_loaded
+    
+    @property
+    def is_ready(self):
+        """True once the model is loaded (and warmed up, if requested)"""
+        return self.model_state == "ready"
+    
+    def _set_state(self, state):
+        self.model_state = state
+        if self.state_callback:
+            self.state_callback(state)
     
-    def load_model(self, model_name=None, transcription_method=None, api_key=None):
-        """Load Whisper model or initialize OpenAI client"""
+    def load_model(self, model_name=None, transcription_method=None, api_key=None, warm_up=False):
+        """Load the model or client of the selected backend
+        
+        With warm_up, a short inference runs right after loading so the first
+        real transcription does not pay lazy initialization costs.
+        """
         if model_name:
             self.whisper_model_name = model_name
         
         if transcription_method:
             self.transcription_method = transcription_method
-            
+        
         if api_key:
             self.openai_api_key = api_key
         
         try:
-            if self.transcription_method == "whisper":
-                self.whisper_model = whisper.load_model(self.whisper_model_name)
-                return True, f"Whisper {self.whisper_model_name} model loaded"
-            elif self.transcription_method == "openai":
-                if not self.openai_api_key:
-                    return False, "OpenAI API key is required for transcription"
-                self.openai_client = OpenAI(api_key=self.openai_api_key)
-                return True, "OpenAI transcription API ready"
-            else:
-                return False, f"Unknown transcription method: {self.transcription_method}"
+            backend = self.backend
+            self._load_backend(backend, warm_up)
+            if not backend.offline:
+                return True, f"{backend.label} transcription ready"
+            if warm_up:
+                return True, f"{backend.label} {self.whisper_model_name} model loaded and warmed up"
+            return True, f"{backend.label} {self.whisper_model_name} model loaded"
         except Exception as e:
+            self._set_state("error")
             return False, f"Error initializing transcription: {str(e)}"
     
-    def transcribe(self, callback=None):
-        """Transcribe audio file and return the text via callback"""
+    def _load_backend(self, backend, warm_up=False):
+        """Load a backend, tracking readiness state"""
+        self._set_state("loading")
+        backend.load(warm_up)
+        self._set_state("ready")
+    
+    def initial_prompt(self):
+        """Prompt text listing the domain vocabulary, or None if there is none"""
+        terms = [term.strip() for term in self.vocabulary if term.strip()]
+        if not terms:
+            return None
+        return "Glossary: " + ", ".join(terms) + "."
+    
+    def transcribe(self, callback=None, progress_callback=None, cancel_token=None, partial_callback=None):
+        """Transcribe audio file and return the text via callback
+        
+        progress_callback, if given, receives rate-limited ProgressEvents with
+        processed audio seconds, real-time factor and ETA. cancel_token (a
+        CancellationToken) is checked between windows and audio chunks.
+        partial_callback receives the transcript so far whenever it grows.
+        """
         if not os.path.exists(self.temp_audio_file):
             if callback:
                 callback(False, "No recording found to transcribe", None)
             return False, "No recording found to transcribe", None
         
-        # Ensure the proper model/client is initialized based on transcription method
-        if self.transcription_method == "whisper" and self.whisper_model is None:
-            try:
-                self.whisper_model = whisper.load_model(self.whisper_model_name)
-            except Exception as e:
-                error_msg = f"Error loading Whisper model: {str(e)}"
-                if callback:
-                    callback(False, error_msg, None)
-                return False, error_msg, None
-                
-        elif self.transcription_method == "openai" and self.openai_client is None:
+        try:
+            backend = self.backend
+        except ValueError as e:
+            if callback:
+                callback(False, str(e), None)
+            return False, str(e), None
+        
+        # Ensure the backend's model/client is initialized
+        if not backend.is_loaded:
             try:
-                if not self.openai_api_key:
-                    error_msg = "OpenAI API key is required for transcription"
-                    if callback:
-                        callback(False, error_msg, None)
-                    return False, error_msg, None
-                self.openai_client = OpenAI(api_key=self.openai_api_key)
+                self._load_backend(backend)
             except Exception as e:
-                error_msg = f"Error initializing OpenAI client: {str(e)}"
+                self._set_state("error")
+                error_msg = f"Error initializing {backend.label}: {str(e)}"
                 if callback:
                     callback(False, error_msg, None)
                 return False, error_msg, None
-                
-        # Final check if initialization succeeded
-        if self.transcription_method == "whisper" and self.whisper_model is None:
-            if callback:
-                callback(False, "Whisper model not loaded yet", None)
-            return False, "Whisper model not loaded yet", None
-        elif self.transcription_method == "openai" and self.openai_client is None:
+        
+        def status_callback(message):
             if callback:
-                callback(False, "OpenAI client not initialized", None)
-            return False, "OpenAI client not initialized", None
+                callback(True, message, None)
+        
+        segments = SegmentStore()
+        started = time.perf_counter()
+        self.time_to_first_word = None
+        committed_text = ""  # Text of the finished segments
+        pending = []  # Streamed deltas of the segment in progress
+        
+        def first_word():
+            if self.time_to_first_word is None:
+                self.time_to_first_word = time.perf_counter() - started
+        
+        def text_callback(delta):
+            first_word()
+            pending.append(delta)
+            if partial_callback:
+                separator = " " if committed_text else ""
+                partial_callback(committed_text + separator + "".join(pending).lstrip())
         
         try:
-            if self.transcription_method == "whisper":
-                # Transcribe audio using the loaded Whisper model
-                result = self.whisper_model.transcribe(self.temp_audio_file)
-                transcribed_text = result["text"]
-            elif self.transcription_method == "openai":
-                # Transcribe audio using OpenAI API with chunking for large files
-                full_transcription = ""
-                
-                # Load the audio file
-                audio = AudioSegment.from_wav(self.temp_audio_file)
-                
-                # OpenAI limit: 25MB per chunk
-                max_size_bytes = 25 * 1024 * 1024
-                
-                # Check if we need to chunk the audio
-                file_size = os.path.getsize(self.temp_audio_file)
-                
-                if file_size <= max_size_bytes:
-                    # Small enough to process directly
-                    with open(self.temp_audio_file, "rb") as audio_file:
-                        transcription = self.openai_client.audio.transcriptions.create(
-                            model=self.openai_model,
-                            file=audio_file
-                        )
-                    full_transcription = transcription.text
-                else:
-                    # Need to chunk the audio
-                    if callback:
-                        callback(True, f"Audio file is large ({file_size/1024/1024:.1f}MB). Splitting into chunks for processing...", None)
-                    
-                    # Determine chunk duration
-                    # Estimate: ~1MB per minute for 16kHz, 16-bit mono WAV
-                    # Conservative approach: 10 minutes per chunk
-                    chunk_duration_ms = 10 * 60 * 1000  # 10 minutes in milliseconds
-                    
-                    # Calculate total duration and number of chunks
-                    total_duration_ms = len(audio)
-                    num_chunks = (total_duration_ms + chunk_duration_ms - 1) // chunk_duration_ms  # Ceiling division
-                    
-                    # Process each chunk
-                    for i in range(num_chunks):
-                        start_ms = i * chunk_duration_ms
-                        end_ms = min((i + 1) * chunk_duration_ms, total_duration_ms)
-                        
-                        # Extract chunk
-                        chunk = audio[start_ms:end_ms]
-                        
-                        # Create a temporary file for the chunk
-                        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                            chunk_filename = temp_file.name
-                            chunk.export(chunk_filename, format="wav")
-                        
-                        try:
-                            # Process the chunk
-                            if callback:
-                                progress = (i * 100) // num_chunks
-                                callback(True, f"Processing chunk {i+1}/{num_chunks} ({progress}% complete)", None)
-                                
-                            with open(chunk_filename, "rb") as audio_file:
-                                chunk_transcription = self.openai_client.audio.transcriptions.create(
-                                    model=self.openai_model,
-                                    file=audio_file
-                                )
-                            
-                            # Append to full transcription
-                            if full_transcription and not full_transcription.endswith(('.', '!', '?', '\n')):
-                                full_transcription += " "
-                            full_transcription += chunk_transcription.text
-                            
-                        finally:
-                            # Clean up temporary file
-                            if os.path.exists(chunk_filename):
-                                os.remove(chunk_filename)
-                
-                transcribed_text = full_transcription
-            else:
-                if callback:
-                    callback(False, f"Unknown transcription method: {self.transcription_method}", None)
-                return False, f"Unknown transcription method: {self.transcription_method}", None
+            for segment, words in backend.stream(self.temp_audio_file, progress_callback, cancel_token, status_callback,
+                                                 text_callback):
+                first_word()
+                segments.add_segment(segment.start, segment.end, segment.text, words)
+                committed_text = segments.text()
+                pending.clear()
+                if partial_callback:
+                    partial_callback(committed_text)
             
+            transcribed_text = segments.text()
+            self.segments = segments
+            
+            message = "Transcription complete"
+            if self.time_to_first_word is not None:
+                message += f" (first words after {self.time_to_first_word:.1f}s)"
             if callback:
-                callback(True, "Transcription complete", transcribed_text)
+                callback(True, message, transcribed_text)
             
-            return True, "Transcription complete", transcribed_text
+            return True, message, transcribed_text
+        except TranscriptionCancelled as e:
+            # Free local models straight away; a cancelled run is often a model picked by mistake
+            if backend.offline:
+                self.unload_model()
+            if callback:
+                callback(False, str(e), None)
+            return False, str(e), None
         except Exception as e:
             if callback:
                 callback(False, f"Transcription error: {str(e)}", None)
             return False, f"Transcription error: {str(e)}", None
     
-    def transcribe_async(self, callback):
+    def transcribe_async(self, callback, progress_callback=None, cancel_token=None, partial_callback=None):
         """Transcribe audio file asynchronously and call callback when done"""
-        threading.Thread(target=self._transcribe_thread, args=(callback,), daemon=True).start()
+        threading.Thread(target=self._transcribe_thread, args=(callback, progress_callback, cancel_token, partial_callback),
+                         daemon=True).start()
     
-    def _transcribe_thread(self, callback):
+    def _transcribe_thread(self, callback, progress_callback=None, cancel_token=None, partial_callback=None):
         """Thread function to handle transcription"""
-        success, message, text = self.transcribe()
-        callback(success, message, text)
\ No newline at end of file
+        success, message, text = self.transcribe(progress_callback=progress_callback, cancel_token=cancel_token,
+                                                 partial_callback=partial_callback)
+        callback(success, message, text)
+    
+    def unload_model(self):
+        """Release the current backend's model so its memory can be reclaimed"""
+        self.backend.unload()
+        self._set_state("unloaded")
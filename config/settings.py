@@ -11,14 +11,86 @@ class Settings:
         
         # Default settings
         self.whisper_model_name = "base"
+        self.whisper_batch_size = 1  # 30-second windows decoded per batch (1 = stock Whisper decoding)
+        self.transcription_deadline_minutes = 0  # Wall-clock limit per transcription job (0 = no limit)
+        self.preload_whisper = True  # Load the transcription model in the background at startup
+        self.warmup_whisper = True  # Run a short warm-up inference after loading
+        self.transcription_language = ""  # ISO-639-1 code ("" = auto-detect)
+        self.transcription_vocabulary = []  # Domain terms passed to the transcription engine as a prompt
+        self.prefetch_whisper_models = []  # Whisper checkpoints kept downloaded in the local model store
+        self.realtime_transcription = False  # Stream microphone audio to a realtime endpoint while recording
+        self.realtime_url = "wss://api.openai.com/v1/realtime?intent=transcription"
         self.ollama_model_name = ""
         self.ollama_base_url = "http://localhost:11434/api"
         self.auto_start_ollama = False
+        self.ollama_keep_alive = "30m"  # How long Ollama keeps the model in memory after a request
+        self.ollama_preload = True  # Load the selected Ollama model at startup and on selection
+        self.ollama_unload_unused = False  # Unload other resident Ollama models when preloading
+        self.ollama_chat_context = True  # Carry chunk context as /api/chat turns that Ollama keeps cached
+        self.ollama_num_ctx = 8192  # Context window requested from Ollama; chunks are sized to fit it
         self.sample_rate = 16000
         self.selected_provider = "Ollama (Local)"
         self.selected_prompt_mode = "Direct Transcription"
         self.transcription_method = "whisper"  # Can be "whisper" or "openai"
         
+        # Context carried between LaTeX chunks (see api.context.CONTEXT_STRATEGIES)
+        self.context_strategy = "token_budget"
+        self.context_chunks = 2  # Previous chunk outputs kept by the "last_chunks" strategy
+        self.context_token_budget = 2000  # Token limit of the "token_budget" tail and the "summary"
+        self.parallel_conversion = True  # Convert chunks of context-free prompt modes concurrently
+        self.gemini_single_request_tokens = 30000  # Longer transcripts are chunked for Gemini too
+        
+        # On-disk cache of LLM outputs (see api.cache.ConversionCache)
+        self.llm_cache_enabled = True
+        self.llm_cache_max_mb = 200
+        self.llm_cache_ttl_days = 30  # 0 = entries never expire
+        
+        # Retries of failed provider requests (see api.resilience)
+        self.max_retries = 4  # Retries per request after 429, 5xx or connection errors
+        self.breaker_failure_threshold = 5  # Consecutive failures that pause requests to a provider
+        self.breaker_reset_seconds = 30  # Pause before a probe request is let through
+        
+        # Hedged requests: a duplicate is sent when a request runs past the p95 latency
+        self.hedging_enabled = True
+        self.hedge_fallback_provider = ""  # Provider receiving duplicates ("" = the same provider)
+        self.hedge_budget_percent = 5  # Share of requests that may be duplicated
+        self.hedge_default_seconds = 60  # Used until enough latencies are known for a p95
+        
+        # Maximum concurrent requests per provider (a local Ollama server runs one model at a time)
+        self.provider_concurrency = {
+            "Ollama (Local)": 1,
+            "OpenAI": 4,
+            "Anthropic": 4,
+            "Perplexity": 2,
+            "Mistral": 4,
+            "Google Gemini": 4
+        }
+        
+        # Client-side pacing per provider as (requests per minute, tokens per minute); 0 = no limit.
+        # Set these to your account's limits to avoid running into 429 responses.
+        self.rate_limits = {
+            "Ollama (Local)": (0, 0),
+            "OpenAI": (500, 30000),
+            "Anthropic": (50, 40000),
+            "Perplexity": (50, 0),
+            "Mistral": (60, 500000),
+            "Google Gemini": (5, 250000)
+        }
+        
+        # Per-request timeouts per provider as (connect seconds, read seconds). The read timeout is the
+        # longest silence allowed before or between streamed tokens, so a hung provider fails the request.
+        self.provider_timeouts = {
+            "Ollama (Local)": (5, 300),  # The first token can wait for the model to load
+            "OpenAI": (10, 60),
+            "Anthropic": (10, 60),
+            "Perplexity": (10, 60),
+            "Mistral": (10, 60),
+            "Google Gemini": (10, 120)
+        }
+        
+        # Time limit for a whole conversion, shared out between the chunks still to convert; 0 = no limit
+        self.conversion_deadline_minutes = 0
+        
         # System prompt
         self.system_prompt = """You are an expert academic and scientific assistant specializing in mathematics, physics, and technical content. Your strengths include:
 
@@ -210,11 +282,83 @@ Always prioritize correctness over completeness - when uncertain about a specifi
                 if 'Whisper' in config:
                     self.whisper_model_name = config.get('Whisper', 'model', fallback=self.whisper_model_name)
                     self.transcription_method = config.get('Whisper', 'transcription_method', fallback=self.transcription_method)
+                    self.whisper_batch_size = config.getint('Whisper', 'batch_size', fallback=self.whisper_batch_size)
+                    self.transcription_deadline_minutes = config.getint('Whisper', 'deadline_minutes', fallback=self.transcription_deadline_minutes)
+                    self.preload_whisper = config.getboolean('Whisper', 'preload', fallback=self.preload_whisper)
+                    self.warmup_whisper = config.getboolean('Whisper', 'warmup', fallback=self.warmup_whisper)
+                    self.transcription_language = config.get('Whisper', 'language', fallback=self.transcription_language)
+                    vocabulary = config.get('Whisper', 'vocabulary', fallback="")
+                    self.transcription_vocabulary = [term.strip() for term in vocabulary.split(",") if term.strip()]
+                    prefetch = config.get('Whisper', 'prefetch', fallback="")
+                    self.prefetch_whisper_models = [name.strip() for name in prefetch.split(",") if name.strip()]
+                
+                # Load realtime transcription settings
+                if 'Realtime' in config:
+                    self.realtime_transcription = config.getboolean('Realtime', 'enabled', fallback=self.realtime_transcription)
+                    self.realtime_url = config.get('Realtime', 'url', fallback=self.realtime_url)
+                
+                # Load LaTeX conversion settings
+                if 'Conversion' in config:
+                    self.context_strategy = config.get('Conversion', 'context_strategy', fallback=self.context_strategy)
+                    self.context_chunks = config.getint('Conversion', 'context_chunks', fallback=self.context_chunks)
+                    self.context_token_budget = config.getint('Conversion', 'context_token_budget', fallback=self.context_token_budget)
+                    self.parallel_conversion = config.getboolean('Conversion', 'parallel', fallback=self.parallel_conversion)
+                    self.gemini_single_request_tokens = config.getint('Conversion', 'gemini_single_request_tokens', fallback=self.gemini_single_request_tokens)
+                    self.conversion_deadline_minutes = config.getint('Conversion', 'deadline_minutes', fallback=self.conversion_deadline_minutes)
+                
+                # Load LLM output cache settings
+                if 'Cache' in config:
+                    self.llm_cache_enabled = config.getboolean('Cache', 'enabled', fallback=self.llm_cache_enabled)
+                    self.llm_cache_max_mb = config.getint('Cache', 'max_mb', fallback=self.llm_cache_max_mb)
+                    self.llm_cache_ttl_days = config.getint('Cache', 'ttl_days', fallback=self.llm_cache_ttl_days)
+                
+                # Load retry settings
+                if 'Retry' in config:
+                    self.max_retries = config.getint('Retry', 'max_retries', fallback=self.max_retries)
+                    self.breaker_failure_threshold = config.getint('Retry', 'breaker_failure_threshold', fallback=self.breaker_failure_threshold)
+                    self.breaker_reset_seconds = config.getint('Retry', 'breaker_reset_seconds', fallback=self.breaker_reset_seconds)
+                
+                # Load hedging settings
+                if 'Hedging' in config:
+                    self.hedging_enabled = config.getboolean('Hedging', 'enabled', fallback=self.hedging_enabled)
+                    self.hedge_fallback_provider = config.get('Hedging', 'fallback_provider', fallback=self.hedge_fallback_provider)
+                    self.hedge_budget_percent = config.getint('Hedging', 'budget_percent', fallback=self.hedge_budget_percent)
+                    self.hedge_default_seconds = config.getint('Hedging', 'default_seconds', fallback=self.hedge_default_seconds)
+                
+                # Load per-provider rate limits ("rpm, tpm")
+                if 'RateLimits' in config:
+                    for provider in self.rate_limits.keys():
+                        value = config.get('RateLimits', provider, fallback="")
+                        try:
+                            rpm, tpm = (int(part) for part in value.split(","))
+                            self.rate_limits[provider] = (rpm, tpm)
+                        except ValueError:
+                            pass
+                
+                # Load per-provider timeouts ("connect, read" in seconds)
+                if 'Timeouts' in config:
+                    for provider in self.provider_timeouts.keys():
+                        value = config.get('Timeouts', provider, fallback="")
+                        try:
+                            connect, read = (float(part) for part in value.split(","))
+                            self.provider_timeouts[provider] = (connect, read)
+                        except ValueError:
+                            pass
+                
+                # Load per-provider concurrency limits
+                if 'Concurrency' in config:
+                    for provider in self.provider_concurrency.keys():
+                        self.provider_concurrency[provider] = config.getint('Concurrency', provider, fallback=self.provider_concurrency[provider])
                 
                 # Load Ollama settings
                 if 'Ollama' in config:
                     self.ollama_base_url = config.get('Ollama', 'url', fallback=self.ollama_base_url)
                     self.auto_start_ollama = config.getboolean('Ollama', 'auto_start', fallback=False)
+                    self.ollama_keep_alive = config.get('Ollama', 'keep_alive', fallback=self.ollama_keep_alive)
+                    self.ollama_preload = config.getboolean('Ollama', 'preload', fallback=self.ollama_preload)
+                    self.ollama_unload_unused = config.getboolean('Ollama', 'unload_unused', fallback=self.ollama_unload_unused)
+                    self.ollama_chat_context = config.getboolean('Ollama', 'chat_context', fallback=self.ollama_chat_context)
+                    self.ollama_num_ctx = config.getint('Ollama', 'num_ctx', fallback=self.ollama_num_ctx)
                     model = config.get('Ollama', 'model', fallback='')
                     if model:
                         self.ollama_model_name = model
@@ -260,18 +404,77 @@ Always prioritize correctness over completeness - when uncertain about a specifi
         
         # Whisper settings
         config['Whisper'] = {
-            'model': whisper_model_var.get()
+            'model': whisper_model_var.get(),
+            'batch_size': str(self.whisper_batch_size),
+            'deadline_minutes': str(self.transcription_deadline_minutes),
+            'preload': str(self.preload_whisper),
+            'warmup': str(self.warmup_whisper),
+            'language': self.transcription_language,
+            'vocabulary': ", ".join(self.transcription_vocabulary),
+            'prefetch': ", ".join(self.prefetch_whisper_models)
         }
         
         # Add transcription method if provided
         if transcription_method_var:
             config['Whisper']['transcription_method'] = transcription_method_var.get()
         
+        # Realtime transcription settings
+        config['Realtime'] = {
+            'enabled': str(self.realtime_transcription),
+            'url': self.realtime_url
+        }
+        
+        # LaTeX conversion settings
+        config['Conversion'] = {
+            'context_strategy': self.context_strategy,
+            'context_chunks': str(self.context_chunks),
+            'context_token_budget': str(self.context_token_budget),
+            'parallel': str(self.parallel_conversion),
+            'gemini_single_request_tokens': str(self.gemini_single_request_tokens),
+            'deadline_minutes': str(self.conversion_deadline_minutes)
+        }
+        
+        # LLM output cache settings
+        config['Cache'] = {
+            'enabled': str(self.llm_cache_enabled),
+            'max_mb': str(self.llm_cache_max_mb),
+            'ttl_days': str(self.llm_cache_ttl_days)
+        }
+        
+        # Retry settings
+        config['Retry'] = {
+            'max_retries': str(self.max_retries),
+            'breaker_failure_threshold': str(self.breaker_failure_threshold),
+            'breaker_reset_seconds': str(self.breaker_reset_seconds)
+        }
+        
+        # Hedging settings
+        config['Hedging'] = {
+            'enabled': str(self.hedging_enabled),
+            'fallback_provider': self.hedge_fallback_provider,
+            'budget_percent': str(self.hedge_budget_percent),
+            'default_seconds': str(self.hedge_default_seconds)
+        }
+        
+        # Per-provider concurrency limits
+        config['Concurrency'] = {provider: str(limit) for provider, limit in self.provider_concurrency.items()}
+        
+        # Per-provider rate limits
+        config['RateLimits'] = {provider: f"{rpm}, {tpm}" for provider, (rpm, tpm) in self.rate_limits.items()}
+        
+        # Per-provider timeouts
+        config['Timeouts'] = {provider: f"{connect:g}, {read:g}" for provider, (connect, read) in self.provider_timeouts.items()}
+        
         # Ollama settings
         config['Ollama'] = {
             'url': ollama_url_var.get(),
             'auto_start': str(auto_start_ollama_var.get()),
-            'model': ollama_model_var.get()
+            'model': ollama_model_var.get(),
+            'keep_alive': self.ollama_keep_alive,
+            'preload': str(self.ollama_preload),
+            'unload_unused': str(self.ollama_unload_unused),
+            'chat_context': str(self.ollama_chat_context),
+            'num_ctx': str(self.ollama_num_ctx)
         }
         
         # System prompt
@@ -34,6 +34,9 @@ class RecordingTab:
         self.transcribe_button = ttk.Button(control_frame, text="Transcribe", command=self.app.transcribe_audio, state=tk.DISABLED)
         self.transcribe_button.pack(side=tk.LEFT, padx=5)
         
+        self.cancel_button = ttk.Button(control_frame, text="Cancel", command=self.app.cancel_transcription, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        
         self.convert_button = ttk.Button(control_frame, text="Convert to LaTeX", command=self.app.convert_to_latex, state=tk.DISABLED)
         self.convert_button.pack(side=tk.LEFT, padx=5)
         
@@ -50,6 +53,9 @@ class RecordingTab:
         self.loading_label = ttk.Label(control_frame, text="")
         self.loading_label.pack(side=tk.LEFT, padx=5)
         
+        self.model_status_label = ttk.Label(control_frame, text="Model: unloaded")
+        self.model_status_label.pack(side=tk.LEFT, padx=5)
+        
         # Text display frame
         text_frame = ttk.Frame(self.parent)
         text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -92,6 +98,14 @@ class RecordingTab:
         """Enable or disable the transcribe button"""
         self.transcribe_button.config(state=state)
     
+    def update_cancel_button(self, state):
+        """Enable or disable the cancel button"""
+        self.cancel_button.config(state=state)
+    
+    def update_model_status(self, text):
+        """Update transcription model readiness label"""
+        self.model_status_label.config(text=text)
+    
     def update_progress(self, value):
         """Update progress bar value"""
         self.progress_var.set(value)
@@ -3,6 +3,9 @@ from tkinter import ttk, messagebox
 import shutil
 import os
 
+from audio.backends import BACKENDS, available_backends
+from api.context import CONTEXT_STRATEGIES
+
 class SettingsTab:
     def __init__(self, parent, app):
         self.parent = parent
@@ -27,6 +30,10 @@ class SettingsTab:
         models_frame = ttk.Frame(self.settings_notebook)
         self.settings_notebook.add(models_frame, text="Ollama Models")
 
+        # Whisper models tab
+        whisper_models_frame = ttk.Frame(self.settings_notebook)
+        self.settings_notebook.add(whisper_models_frame, text="Whisper Models")
+        
         # API settings tab
         api_frame = ttk.Frame(self.settings_notebook)
         self.settings_notebook.add(api_frame, text="API Settings")
@@ -36,6 +43,9 @@ class SettingsTab:
         
         # Setup models settings
         self.setup_models_settings(models_frame)
+        
+        # Setup Whisper checkpoint settings
+        self.setup_whisper_models_settings(whisper_models_frame)
 
         # Setup API settings
         self.setup_api_settings(api_frame)
@@ -48,19 +58,15 @@ class SettingsTab:
         ttk.Label(parent_frame, text="Transcription Method:").grid(row=0, column=0, sticky=tk.W, pady=5)
         
         self.transcription_method_var = tk.StringVar(value=self.app.settings.transcription_method)
-        transcription_methods = ["whisper", "openai"]
         transcription_method_frame = ttk.Frame(parent_frame)
         transcription_method_frame.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
         
-        rb1 = ttk.Radiobutton(transcription_method_frame, text="Local Whisper", 
-                             variable=self.transcription_method_var, value="whisper",
-                             command=lambda: self.app.load_whisper_model(self.whisper_model_var.get(), "whisper"))
-        rb1.pack(side=tk.LEFT, padx=5)
-        
-        rb2 = ttk.Radiobutton(transcription_method_frame, text="OpenAI API", 
-                             variable=self.transcription_method_var, value="openai",
-                             command=self._init_openai_transcription)
-        rb2.pack(side=tk.LEFT, padx=5)
+        # One option per installed transcription backend
+        for name in available_backends():
+            rb = ttk.Radiobutton(transcription_method_frame, text=BACKENDS[name].label, 
+                                variable=self.transcription_method_var, value=name,
+                                command=lambda name=name: self._on_transcription_method_change(name))
+            rb.pack(side=tk.LEFT, padx=5)
         
         # Whisper model selection
         ttk.Label(parent_frame, text="Whisper Model:").grid(row=1, column=0, sticky=tk.W, pady=5)
@@ -146,6 +152,55 @@ class SettingsTab:
         system_prompt_entry = ttk.Entry(parent_frame, textvariable=self.system_prompt_var, width=50)
         system_prompt_entry.grid(row=9, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=5)
         
+        # Whisper batch size (number of 30-second windows decoded together)
+        ttk.Label(parent_frame, text="Whisper Batch Size:").grid(row=10, column=0, sticky=tk.W, pady=5)
+        self.whisper_batch_size_var = tk.IntVar(value=self.app.settings.whisper_batch_size)
+        batch_sizes = [1, 2, 4, 8, 16]
+        batch_size_combo = ttk.Combobox(parent_frame, textvariable=self.whisper_batch_size_var, 
+                                       values=batch_sizes, state="readonly")
+        batch_size_combo.grid(row=10, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Wall-clock deadline for transcription jobs
+        ttk.Label(parent_frame, text="Transcription Deadline (min, 0 = none):").grid(row=11, column=0, sticky=tk.W, pady=5)
+        self.transcription_deadline_var = tk.IntVar(value=self.app.settings.transcription_deadline_minutes)
+        deadline_spinbox = ttk.Spinbox(parent_frame, from_=0, to=600, textvariable=self.transcription_deadline_var)
+        deadline_spinbox.grid(row=11, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Background preload and warm-up of the transcription model
+        self.preload_whisper_var = tk.BooleanVar(value=self.app.settings.preload_whisper)
+        preload_check = ttk.Checkbutton(parent_frame, text="Preload transcription model on launch", 
+                                       variable=self.preload_whisper_var)
+        preload_check.grid(row=12, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        self.warmup_whisper_var = tk.BooleanVar(value=self.app.settings.warmup_whisper)
+        warmup_check = ttk.Checkbutton(parent_frame, text="Warm up Whisper model after loading", 
+                                      variable=self.warmup_whisper_var)
+        warmup_check.grid(row=13, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        # Pinned transcription language (skips language detection)
+        ttk.Label(parent_frame, text="Transcription Language:").grid(row=14, column=0, sticky=tk.W, pady=5)
+        self.transcription_language_var = tk.StringVar(value=self.app.settings.transcription_language or "auto")
+        languages = ["auto", "en", "de", "fr", "es", "it", "tr"]
+        language_combo = ttk.Combobox(parent_frame, textvariable=self.transcription_language_var, values=languages)
+        language_combo.grid(row=14, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Domain vocabulary used as the transcription prompt
+        ttk.Label(parent_frame, text="Domain Vocabulary (comma-separated):").grid(row=15, column=0, sticky=tk.W, pady=5)
+        self.transcription_vocabulary_var = tk.StringVar(value=", ".join(self.app.settings.transcription_vocabulary))
+        vocabulary_entry = ttk.Entry(parent_frame, textvariable=self.transcription_vocabulary_var, width=50)
+        vocabulary_entry.grid(row=15, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Realtime transcription while recording
+        self.realtime_transcription_var = tk.BooleanVar(value=self.app.settings.realtime_transcription)
+        realtime_check = ttk.Checkbutton(parent_frame, text="Transcribe live while recording (realtime)", 
+                                        variable=self.realtime_transcription_var)
+        realtime_check.grid(row=16, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        ttk.Label(parent_frame, text="Realtime Server URL:").grid(row=17, column=0, sticky=tk.W, pady=5)
+        self.realtime_url_var = tk.StringVar(value=self.app.settings.realtime_url)
+        realtime_url_entry = ttk.Entry(parent_frame, textvariable=self.realtime_url_var, width=50)
+        realtime_url_entry.grid(row=17, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
         # Configure grid
         parent_frame.columnconfigure(1, weight=1)
     
@@ -220,10 +275,119 @@ class SettingsTab:
         download_status_label = ttk.Label(parent_frame, textvariable=self.download_status_var)
         download_status_label.grid(row=10, column=0, columnspan=3, sticky=tk.W, pady=5)
         
+        # Models currently loaded in Ollama's memory
+        ttk.Separator(parent_frame, orient='horizontal').grid(
+            row=11, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        
+        ttk.Label(parent_frame, text="Loaded in Memory:", font=("", 10, "bold")).grid(
+            row=12, column=0, columnspan=3, sticky=tk.W, pady=(10, 5))
+        
+        self.resident_model_tree = ttk.Treeview(parent_frame, columns=("memory", "gpu", "until"), height=4)
+        self.resident_model_tree.heading("#0", text="Model")
+        self.resident_model_tree.heading("memory", text="Memory")
+        self.resident_model_tree.heading("gpu", text="On GPU")
+        self.resident_model_tree.heading("until", text="Unloads At")
+        self.resident_model_tree.grid(row=13, column=0, columnspan=3, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        resident_control_frame = ttk.Frame(parent_frame)
+        resident_control_frame.grid(row=14, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Button(resident_control_frame, text="Refresh", command=self.app.refresh_resident_models).pack(side=tk.LEFT, padx=5)
+        ttk.Button(resident_control_frame, text="Load Selected Model", command=self.app.preload_ollama_model).pack(side=tk.LEFT, padx=5)
+        ttk.Button(resident_control_frame, text="Unload", command=self.app.unload_ollama_models).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(parent_frame, text="Keep Loaded For (e.g. 30m, 2h, -1 = forever):").grid(row=15, column=0, sticky=tk.W, pady=5)
+        self.ollama_keep_alive_var = tk.StringVar(value=self.app.settings.ollama_keep_alive)
+        ttk.Entry(parent_frame, textvariable=self.ollama_keep_alive_var).grid(
+            row=15, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.ollama_preload_var = tk.BooleanVar(value=self.app.settings.ollama_preload)
+        preload_check = ttk.Checkbutton(parent_frame, text="Load the selected model at startup and when selected", 
+                                       variable=self.ollama_preload_var)
+        preload_check.grid(row=16, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        self.ollama_unload_unused_var = tk.BooleanVar(value=self.app.settings.ollama_unload_unused)
+        unload_check = ttk.Checkbutton(parent_frame, text="Unload other models when loading the selected model", 
+                                      variable=self.ollama_unload_unused_var)
+        unload_check.grid(row=17, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        self.ollama_chat_context_var = tk.BooleanVar(value=self.app.settings.ollama_chat_context)
+        chat_context_check = ttk.Checkbutton(parent_frame, text="Send chunk context as chat turns Ollama keeps cached", 
+                                            variable=self.ollama_chat_context_var)
+        chat_context_check.grid(row=18, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
+        ttk.Label(parent_frame, text="Context Window (tokens):").grid(row=19, column=0, sticky=tk.W, pady=5)
+        self.ollama_num_ctx_var = tk.IntVar(value=self.app.settings.ollama_num_ctx)
+        ttk.Spinbox(parent_frame, from_=2048, to=131072, increment=2048, textvariable=self.ollama_num_ctx_var).grid(
+            row=19, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Configure grid
+        parent_frame.columnconfigure(1, weight=1)
+        parent_frame.rowconfigure(1, weight=1)
+    
+    def populate_resident_model_tree(self, rows):
+        """Fill the loaded models table with (name, memory, gpu, until) rows"""
+        self.resident_model_tree.delete(*self.resident_model_tree.get_children())
+        for name, memory, gpu, until in rows:
+            self.resident_model_tree.insert("", tk.END, iid=name, text=name, values=(memory, gpu, until))
+    
+    def get_selected_resident_models(self):
+        """Get model names selected in the loaded models table"""
+        return list(self.resident_model_tree.selection())
+    
+    def setup_whisper_models_settings(self, parent_frame):
+        """Setup the local Whisper checkpoint store tab"""
+        ttk.Label(parent_frame, text="Whisper Checkpoints:", font=("", 10, "bold")).grid(
+            row=0, column=0, columnspan=3, sticky=tk.W, pady=(10, 5))
+        
+        # Checkpoint table with scrollbar
+        table_frame = ttk.Frame(parent_frame)
+        table_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5, pady=5)
+        
+        columns = ("status", "size", "load_time")
+        self.whisper_model_tree = ttk.Treeview(table_frame, columns=columns, height=10, selectmode="extended")
+        self.whisper_model_tree.heading("#0", text="Model")
+        self.whisper_model_tree.heading("status", text="Status")
+        self.whisper_model_tree.heading("size", text="Size on Disk")
+        self.whisper_model_tree.heading("load_time", text="Last Load Time")
+        self.whisper_model_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(table_frame, command=self.whisper_model_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.whisper_model_tree.config(yscrollcommand=scrollbar.set)
+        
+        # Checkpoint controls
+        control_frame = ttk.Frame(parent_frame)
+        control_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Button(control_frame, text="Refresh", command=self.app.refresh_whisper_models).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Verify", command=self.app.verify_whisper_models).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Prefetch", command=self.app.prefetch_whisper_models).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Delete", command=self.app.delete_whisper_models).pack(side=tk.LEFT, padx=5)
+        
+        # Prefetch progress
+        self.whisper_download_progress_var = tk.DoubleVar()
+        ttk.Progressbar(parent_frame, variable=self.whisper_download_progress_var, maximum=100).grid(
+            row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.whisper_store_status_var = tk.StringVar(value="")
+        ttk.Label(parent_frame, textvariable=self.whisper_store_status_var).grid(
+            row=4, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
         # Configure grid
         parent_frame.columnconfigure(1, weight=1)
         parent_frame.rowconfigure(1, weight=1)
     
+    def populate_whisper_model_tree(self, rows):
+        """Fill the checkpoint table with (name, status, size, load_time) rows"""
+        self.whisper_model_tree.delete(*self.whisper_model_tree.get_children())
+        for name, status, size, load_time in rows:
+            self.whisper_model_tree.insert("", tk.END, iid=name, text=name, values=(status, size, load_time))
+    
+    def get_selected_whisper_models(self):
+        """Get model names selected in the checkpoint table"""
+        return list(self.whisper_model_tree.selection())
+    
     def setup_api_settings(self, parent_frame):
         """Setup API settings tab with provider selection, model selection, and API keys"""
         # API provider selection
@@ -270,10 +434,107 @@ class SettingsTab:
             key_entry = ttk.Entry(api_keys_frame, textvariable=key_var, width=50, show="*")
             key_entry.grid(row=i, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
         
+        # Context carried between chunks of long transcripts
+        context_frame = ttk.LabelFrame(parent_frame, text="Chunk Context")
+        context_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=10)
+        
+        ttk.Label(context_frame, text="Context Strategy:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.context_strategy_var = tk.StringVar(value=CONTEXT_STRATEGIES.get(self.app.settings.context_strategy, ""))
+        context_strategy_combo = ttk.Combobox(context_frame, textvariable=self.context_strategy_var,
+                                              values=list(CONTEXT_STRATEGIES.values()), state="readonly")
+        context_strategy_combo.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(context_frame, text="Previous Chunks Kept:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.context_chunks_var = tk.IntVar(value=self.app.settings.context_chunks)
+        ttk.Spinbox(context_frame, from_=1, to=20, textvariable=self.context_chunks_var).grid(
+            row=1, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(context_frame, text="Context Token Budget:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.context_token_budget_var = tk.IntVar(value=self.app.settings.context_token_budget)
+        ttk.Spinbox(context_frame, from_=100, to=32000, increment=100, textvariable=self.context_token_budget_var).grid(
+            row=2, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.parallel_conversion_var = tk.BooleanVar(value=self.app.settings.parallel_conversion)
+        parallel_check = ttk.Checkbutton(context_frame, text="Convert chunks in parallel (Direct and Clean Transcription)", 
+                                        variable=self.parallel_conversion_var)
+        parallel_check.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(context_frame, text="Gemini Single-Request Limit (tokens):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.gemini_single_request_tokens_var = tk.IntVar(value=self.app.settings.gemini_single_request_tokens)
+        ttk.Spinbox(context_frame, from_=1000, to=1000000, increment=1000,
+                    textvariable=self.gemini_single_request_tokens_var).grid(
+            row=4, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Cache of LLM outputs for repeated conversions
+        cache_frame = ttk.LabelFrame(parent_frame, text="Response Cache")
+        cache_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=10)
+        
+        self.llm_cache_enabled_var = tk.BooleanVar(value=self.app.settings.llm_cache_enabled)
+        cache_check = ttk.Checkbutton(cache_frame, text="Reuse outputs of identical requests", 
+                                     variable=self.llm_cache_enabled_var)
+        cache_check.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(cache_frame, text="Maximum Size (MB):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.llm_cache_max_mb_var = tk.IntVar(value=self.app.settings.llm_cache_max_mb)
+        ttk.Spinbox(cache_frame, from_=1, to=10000, increment=10, textvariable=self.llm_cache_max_mb_var).grid(
+            row=1, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(cache_frame, text="Expire After (days, 0 = never):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.llm_cache_ttl_days_var = tk.IntVar(value=self.app.settings.llm_cache_ttl_days)
+        ttk.Spinbox(cache_frame, from_=0, to=3650, textvariable=self.llm_cache_ttl_days_var).grid(
+            row=2, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.llm_cache_stats_var = tk.StringVar(value=self.app.api_handler.cache.describe())
+        ttk.Label(cache_frame, textvariable=self.llm_cache_stats_var).grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Button(cache_frame, text="Clear Cache", command=self.app.clear_llm_cache).grid(
+            row=3, column=1, sticky=tk.E, padx=5, pady=5)
+        
+        # Retries of failed requests and per-provider request metrics
+        retry_frame = ttk.LabelFrame(parent_frame, text="Retries and Hedging")
+        retry_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=10)
+        
+        ttk.Label(retry_frame, text="Retries per Request:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.max_retries_var = tk.IntVar(value=self.app.settings.max_retries)
+        ttk.Spinbox(retry_frame, from_=0, to=10, textvariable=self.max_retries_var).grid(
+            row=0, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(retry_frame, text="Pause Provider After (failures):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.breaker_failure_threshold_var = tk.IntVar(value=self.app.settings.breaker_failure_threshold)
+        ttk.Spinbox(retry_frame, from_=1, to=50, textvariable=self.breaker_failure_threshold_var).grid(
+            row=1, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.hedging_enabled_var = tk.BooleanVar(value=self.app.settings.hedging_enabled)
+        hedging_check = ttk.Checkbutton(retry_frame, text="Send a duplicate request when a chunk runs past its p95 latency", 
+                                       variable=self.hedging_enabled_var)
+        hedging_check.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(retry_frame, text="Duplicate To:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.hedge_fallback_provider_var = tk.StringVar(value=self.app.settings.hedge_fallback_provider or "Same provider")
+        ttk.Combobox(retry_frame, textvariable=self.hedge_fallback_provider_var,
+                     values=["Same provider"] + self.app.settings.api_providers, state="readonly").grid(
+            row=3, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(retry_frame, text="Duplicated Requests (% max):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.hedge_budget_percent_var = tk.IntVar(value=self.app.settings.hedge_budget_percent)
+        ttk.Spinbox(retry_frame, from_=0, to=100, textvariable=self.hedge_budget_percent_var).grid(
+            row=4, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        ttk.Label(retry_frame, text="Conversion Time Limit (minutes, 0 = none):").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.conversion_deadline_minutes_var = tk.IntVar(value=self.app.settings.conversion_deadline_minutes)
+        ttk.Spinbox(retry_frame, from_=0, to=600, textvariable=self.conversion_deadline_minutes_var).grid(
+            row=5, column=1, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        self.request_metrics_var = tk.StringVar(value="")
+        ttk.Label(retry_frame, textvariable=self.request_metrics_var, justify=tk.LEFT).grid(
+            row=6, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
         # Configure the grid to expand properly
         parent_frame.columnconfigure(1, weight=1)
         model_frame.columnconfigure(1, weight=1)
         api_keys_frame.columnconfigure(1, weight=1)
+        context_frame.columnconfigure(1, weight=1)
+        cache_frame.columnconfigure(1, weight=1)
+        retry_frame.columnconfigure(1, weight=1)
     
     def on_provider_change(self, event=None):
         """Handle API provider change"""
@@ -291,6 +552,13 @@ class SettingsTab:
             self.openai_model_label.grid_remove()
             self.openai_model_combo.grid_remove()
     
+    def _on_transcription_method_change(self, name):
+        """Load the selected transcription backend"""
+        if BACKENDS[name].requires_api_key:
+            self._init_openai_transcription()
+        else:
+            self.app.load_whisper_model(self.whisper_model_var.get(), name)
+    
     def _init_openai_transcription(self):
         """Initialize OpenAI transcription when option is selected"""
         # Check if API key is set
@@ -307,7 +575,8 @@ class SettingsTab:
             else:
                 # API key exists, initialize OpenAI client
                 selected_model = self.openai_transcription_model_var.get()
-                self.app.load_whisper_model(selected_model, "openai")
+                self.app.transcriber.openai_model = self.app.settings.openai_transcription_models[selected_model]
+                self.app.load_whisper_model(self.whisper_model_var.get(), "openai")
     
     def _update_openai_transcription_model(self, event=None):
         """Update OpenAI transcription model when changed"""
@@ -6,6 +6,13 @@ import threading
 import time
 import os
 
+def keep_alive_value(keep_alive):
+    """Ollama keep_alive from a settings string: numbers are seconds (-1 = forever), else a duration like 30m"""
+    try:
+        return int(keep_alive)
+    except ValueError:
+        return keep_alive
+
 class OllamaManager:
     def __init__(self, base_url="http://localhost:11434/api"):
         self.ollama_base_url = base_url
@@ -143,6 +150,82 @@ class OllamaManager:
                 callback(False, f"Error connecting to Ollama: {str(e)}")
             return False, f"Error connecting to Ollama: {str(e)}", []
     
+    def running_models(self, callback=None):
+        """List models resident in Ollama's memory as dicts with name, size, size_vram and expires_at"""
+        try:
+            response = requests.get(f"{self.ollama_base_url}/ps", timeout=5)
+            if response.status_code == 200:
+                models = response.json().get("models", [])
+                if callback:
+                    callback(True, f"{len(models)} Ollama models loaded", models)
+                return True, f"{len(models)} Ollama models loaded", models
+            else:
+                if callback:
+                    callback(False, f"Failed to list loaded Ollama models: {response.status_code}")
+                return False, f"Failed to list loaded Ollama models: {response.status_code}", []
+        except Exception as e:
+            if callback:
+                callback(False, f"Error connecting to Ollama: {str(e)}")
+            return False, f"Error connecting to Ollama: {str(e)}", []
+    
+    def preload_model(self, model, keep_alive="30m", callback=None, unload_others=False, num_ctx=None):
+        """Load a model into memory in the background and keep it there for keep_alive
+        
+        A request without a prompt only loads the model, so the first chunk of
+        a conversion does not pay the load time. With unload_others, other
+        resident models are unloaded first to free memory. num_ctx should match
+        the conversion requests, since Ollama reloads a model whose context
+        window changes.
+        """
+        threading.Thread(target=self._preload_model_thread,
+                         args=(model, keep_alive, callback, unload_others, num_ctx), daemon=True).start()
+    
+    def _preload_model_thread(self, model, keep_alive, callback=None, unload_others=False, num_ctx=None):
+        """Thread function to preload an Ollama model"""
+        try:
+            if unload_others:
+                unloaded = self.unload_other_models(model)
+                if unloaded and callback:
+                    callback(True, f"Unloaded {', '.join(unloaded)}", in_progress=True)
+            if callback:
+                callback(True, f"Loading Ollama model '{model}'...", in_progress=True)
+            start_time = time.time()
+            # Large models can take minutes to load from disk
+            request_data = {"model": model, "keep_alive": keep_alive_value(keep_alive)}
+            if num_ctx:
+                request_data["options"] = {"num_ctx": num_ctx}
+            response = requests.post(f"{self.ollama_base_url}/generate", json=request_data, timeout=600)
+            if response.status_code == 200:
+                if callback:
+                    callback(True, f"Ollama model '{model}' loaded in {time.time() - start_time:.1f}s (kept for {keep_alive})")
+            else:
+                if callback:
+                    callback(False, f"Failed to load Ollama model '{model}': {response.status_code}")
+        except Exception as e:
+            if callback:
+                callback(False, f"Error loading Ollama model: {str(e)}")
+    
+    def unload_model(self, model):
+        """Unload a model from memory immediately; returns (success, message)"""
+        try:
+            response = requests.post(f"{self.ollama_base_url}/generate",
+                                     json={"model": model, "keep_alive": 0}, timeout=30)
+            if response.status_code == 200:
+                return True, f"Unloaded Ollama model '{model}'"
+            return False, f"Failed to unload Ollama model '{model}': {response.status_code}"
+        except Exception as e:
+            return False, f"Error unloading Ollama model: {str(e)}"
+    
+    def unload_other_models(self, keep_model):
+        """Unload every resident model except keep_model to free memory; returns the unloaded names"""
+        success, _, models = self.running_models()
+        unloaded = []
+        if success:
+            for model in models:
+                if model["name"] != keep_model and self.unload_model(model["name"])[0]:
+                    unloaded.append(model["name"])
+        return unloaded
+    
     def download_model(self, model, callback=None):
         """Download a new Ollama model"""
         if not model: